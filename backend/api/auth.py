@@ -2,27 +2,46 @@
 认证相关工具函数
 """
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Set
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import Delete, Update, event, inspect as sa_inspect, update
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
+import logging
 import os
+import uuid
 from dotenv import load_dotenv
 
-from database import get_db
+from database import DBSession, async_engine, engine, get_session, run_db
 from models import User
+from utils.password_hasher import HasherSaturatedError, create_password_hasher
+from utils.password_policy import build_password_context
+from utils.principal_cache import PRINCIPAL_FIELDS, create_principal_cache, snapshot_user
+from utils.revocation import get_revocation_store, token_id
+from utils.token_cache import create_token_cache
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # JWT 配置
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7天
 
-# 密码加密
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 密码加密（方案和 bcrypt 成本见 utils/password_policy.py）
+pwd_context = build_password_context()
+
+# 密码哈希工作池（bcrypt 不在事件循环中执行）
+password_hasher = create_password_hasher()
+
+# 已认证用户缓存（按用户名）
+principal_cache = create_principal_cache()
+
+# 已验证 Token 缓存（按 Token 摘要）
+token_cache = create_token_cache()
 
 # OAuth2 令牌 URL
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
@@ -38,6 +57,58 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def _run_in_hasher(fn, *args):
+    """在密码哈希工作池中执行，池已满时快速返回 503"""
+    try:
+        return await password_hasher.run(fn, *args)
+    except HasherSaturatedError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="服务繁忙，请稍后重试",
+            headers={"Retry-After": "1"},
+        )
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """验证密码（在工作池中执行）"""
+    return await _run_in_hasher(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """加密密码（在工作池中执行）"""
+    return await _run_in_hasher(get_password_hash, password)
+
+
+def password_needs_update(hashed_password: str) -> bool:
+    """哈希方案或成本是否已过时"""
+    return pwd_context.needs_update(hashed_password)
+
+
+def _replace_password_hash(user_id: int, old_hash: str, new_hash: str) -> bool:
+    """只有哈希未被其他请求修改时才替换"""
+    with engine.begin() as connection:
+        result = connection.execute(
+            update(User)
+            .where(User.id == user_id, User.hashed_password == old_hash)
+            .values(hashed_password=new_hash)
+        )
+        return result.rowcount == 1
+
+
+async def rehash_password(user_id: int, old_hash: str, password: str):
+    """
+    用当前策略重新计算密码哈希（登录成功后作为后台任务执行，不影响登录延迟）
+    """
+    try:
+        new_hash = await password_hasher.run(get_password_hash, password)
+        await run_in_threadpool(_replace_password_hash, user_id, old_hash, new_hash)
+    except HasherSaturatedError:
+        # 繁忙时放弃，下次登录再升级
+        pass
+    except Exception as e:
+        logger.error(f"密码哈希升级失败 user_id={user_id}: {str(e)}")
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """创建访问令牌"""
     to_encode = data.copy()
@@ -46,17 +117,53 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # jti 用于退出登录时按 Token 吊销
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
-    """验证用户"""
-    user = db.query(User).filter(User.username == username).first()
+def get_user_by_username(db, username: str) -> Optional[User]:
+    """按用户名查询用户（同步会话）"""
+    return db.query(User).filter(User.username == username).first()
+
+
+def decode_access_token(token: str) -> dict:
+    """解码并校验访问令牌，校验失败时抛出 JWTError"""
+    if token_cache is not None:
+        payload = token_cache.get(token)
+        if payload is not None:
+            return payload
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    if token_cache is not None:
+        token_cache.set(token, payload)
+    return payload
+
+
+async def revoke_access_token(token: str):
+    """吊销访问令牌（退出登录），所有 worker 在下一次同步后拒绝该 Token"""
+    payload = decode_access_token(token)
+    try:
+        await run_in_threadpool(get_revocation_store().revoke, token_id(token, payload), float(payload["exp"]))
+    except SQLAlchemyError as e:
+        # 未写入数据库时不能告诉客户端已退出登录
+        logger.error(f"吊销 Token 失败: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="服务暂时不可用，请稍后重试",
+            headers={"Retry-After": "1"},
+        )
+    if token_cache is not None:
+        token_cache.invalidate(token)
+
+
+async def authenticate_user(db: DBSession, username: str, password: str) -> Optional[User]:
+    """验证用户（同步和异步会话均可）"""
+    user = await run_db(db, get_user_by_username, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     if not user.is_active:
         return None
@@ -65,7 +172,7 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_session)
 ) -> User:
     """获取当前用户"""
     credentials_exception = HTTPException(
@@ -75,20 +182,103 @@ async def get_current_user(
     )
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+
+    # 内存中的吊销集合，不查询数据库
+    if get_revocation_store().is_revoked(token_id(token, payload)):
+        raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    snapshot = await principal_cache.get(username)
+    if snapshot is not None:
+        return User(**snapshot)
+
+    user = await run_db(db, get_user_by_username, username)
     if user is None:
         raise credentials_exception
     
+    await principal_cache.set(username, snapshot_user(user))
     return user
 
 
+def invalidate_principal(*usernames: str):
+    """用户信息变更或被禁用后使缓存失效（修改提交之后调用）"""
+    principal_cache.invalidate(*usernames)
+
+
+# 用户表被修改后，缓存在事务提交之后才失效（在提交前失效，并发请求可能把旧数据重新写入缓存）：
+# 修改时把用户名记录在连接上，提交时确认，连接在提交后归还连接池时执行失效；回滚则丢弃。
+# None 表示无法确定具体用户（Core 的批量 update/delete），提交后清空整个缓存。
+_PENDING_INVALIDATIONS = "principal_invalidations"
+_COMMITTED_INVALIDATIONS = "principal_invalidations_committed"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _record_user_change(mapper, connection, target):
+    """ORM flush 修改或删除了用户行（包括改名前的旧用户名）"""
+    pending = connection.info.setdefault(_PENDING_INVALIDATIONS, set())
+    pending.add(target.username)
+    pending.update(sa_inspect(target).attrs.username.history.deleted)
+
+
+def _changed_columns(statement: Update, multiparams, params) -> Set[str]:
+    names = {getattr(key, "key", key) for key in (statement._values or {})}
+    names.update(getattr(key, "key", key) for key, _ in (statement._ordered_values or ()))
+    for row in list(multiparams or ()) + [params or {}]:
+        if isinstance(row, dict):
+            names.update(row)
+    return names
+
+
+def _record_core_statement(connection, statement, multiparams, params, execution_options):
+    """Core / ORM 批量语句修改了用户表（flush 生成的语句由 _record_user_change 精确记录）"""
+    if "compiled_cache" in execution_options:
+        return
+    if not isinstance(statement, (Update, Delete)) or statement.table.name != User.__tablename__:
+        return
+    if isinstance(statement, Update) and not _changed_columns(statement, multiparams, params) & set(PRINCIPAL_FIELDS):
+        # 只修改了不缓存的列（如重新计算的密码哈希）
+        return
+    connection.info.setdefault(_PENDING_INVALIDATIONS, set()).add(None)
+
+
+def _confirm_invalidations(connection):
+    pending = connection.info.pop(_PENDING_INVALIDATIONS, None)
+    if pending:
+        connection.info.setdefault(_COMMITTED_INVALIDATIONS, set()).update(pending)
+
+
+def _discard_invalidations(connection):
+    connection.info.pop(_PENDING_INVALIDATIONS, None)
+
+
+def _apply_invalidations(dbapi_connection, connection_record):
+    committed = connection_record.info.pop(_COMMITTED_INVALIDATIONS, None)
+    if not committed:
+        return
+    if None in committed:
+        principal_cache.clear()
+    else:
+        invalidate_principal(*committed)
+
+
+def _track_user_changes(target_engine):
+    event.listen(target_engine, "before_execute", _record_core_statement)
+    event.listen(target_engine, "commit", _confirm_invalidations)
+    event.listen(target_engine, "rollback", _discard_invalidations)
+    event.listen(target_engine, "checkin", _apply_invalidations)
+
+
+_track_user_changes(engine)
+if async_engine is not None:
+    _track_user_changes(async_engine.sync_engine)
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -96,3 +286,12 @@ async def get_current_active_user(
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="用户已被禁用")
     return current_user
+
+
+async def get_current_superuser(
+    current_user: User = Depends(get_current_active_user)
+) -> User:
+    """获取当前管理员用户"""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="需要管理员权限")
+    return current_user
@@ -0,0 +1 @@
+# 基准测试与压测脚本
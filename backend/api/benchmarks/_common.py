@@ -0,0 +1,44 @@
+"""
+基准测试公共工具
+"""
+import argparse
+import math
+from typing import Dict, List
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """计算百分位数（最近秩法）"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies_ms: List[float], elapsed_s: float = 0.0) -> Dict[str, float]:
+    """汇总延迟样本（毫秒）"""
+    summary = {
+        "count": len(latencies_ms),
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p95_ms": round(percentile(latencies_ms, 95), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "max_ms": round(max(latencies_ms), 3) if latencies_ms else 0.0,
+    }
+    if elapsed_s > 0:
+        summary["rps"] = round(len(latencies_ms) / elapsed_s, 1)
+    return summary
+
+
+def format_summary(name: str, summary: Dict[str, float]) -> str:
+    """格式化输出一行汇总结果"""
+    fields = " ".join(f"{key}={value}" for key, value in summary.items())
+    return f"{name:<24} {fields}"
+
+
+def base_parser(description: str) -> argparse.ArgumentParser:
+    """压测脚本通用参数"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="API 地址")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发数")
+    parser.add_argument("--duration", type=float, default=10.0, help="持续时间（秒）")
+    return parser
@@ -0,0 +1,129 @@
+"""
+游戏访问计数压测：对比逐次 read-modify-write 更新与批量写回（AccessRecorder）。
+
+多个线程模拟用户打开少量热门游戏，统计每秒处理的访问事件数。
+使用 DATABASE_URL 指向的数据库（可以是本地 Postgres 或 sqlite:///bench.db）。
+
+用法：
+    DATABASE_URL=sqlite:///access_bench.db python -m benchmarks.bench_access_recording --threads 16
+"""
+import argparse
+import random
+import threading
+import time
+from datetime import datetime
+
+from database import SessionLocal, engine, init_db
+from models import GameAccess, GameConfig, User
+from utils.access_recorder import AccessRecorder
+
+
+def seed(users: int, games: int):
+    """准备用户和游戏数据"""
+    init_db()
+    db = SessionLocal()
+    try:
+        for i in range(games):
+            name = f"bench_game_{i}"
+            if not db.query(GameConfig).filter(GameConfig.game_name == name).first():
+                db.add(GameConfig(
+                    game_name=name, game_display_name=name, db_type="sqlite",
+                    db_host="", db_port=0, db_name=f"{name}.db", db_user="", db_password=""
+                ))
+        for i in range(users):
+            username = f"bench_access_{i}"
+            if not db.query(User).filter(User.username == username).first():
+                db.add(User(username=username, email=f"{username}@example.com", hashed_password="x"))
+        db.commit()
+        user_ids = [u.id for u in db.query(User).filter(User.username.like("bench_access_%"))]
+        game_ids = [g.id for g in db.query(GameConfig).filter(GameConfig.game_name.like("bench_game_%"))]
+        # 写回只更新已有的访问记录，先为每个 (用户, 游戏) 授予权限
+        existing = set(
+            db.query(GameAccess.user_id, GameAccess.game_id)
+            .filter(GameAccess.user_id.in_(user_ids), GameAccess.game_id.in_(game_ids))
+            .all()
+        )
+        db.add_all([
+            GameAccess(user_id=user_id, game_id=game_id, access_count=0, can_access=True)
+            for user_id in user_ids for game_id in game_ids
+            if (user_id, game_id) not in existing
+        ])
+        db.commit()
+        return user_ids, game_ids
+    finally:
+        db.close()
+
+
+def per_request_update(user_id: int, game_id: int):
+    """每次访问一次 read-modify-write"""
+    db = SessionLocal()
+    try:
+        access = (
+            db.query(GameAccess)
+            .filter(GameAccess.user_id == user_id, GameAccess.game_id == game_id)
+            .with_for_update()
+            .first()
+        )
+        if access is None:
+            access = GameAccess(user_id=user_id, game_id=game_id, access_count=0)
+            db.add(access)
+        access.access_count = (access.access_count or 0) + 1
+        access.last_access_at = datetime.utcnow()
+        db.commit()
+    except Exception:
+        db.rollback()
+    finally:
+        db.close()
+
+
+def drive(label: str, handler, threads: int, duration: float, user_ids, game_ids):
+    counts = [0] * threads
+    deadline = time.perf_counter() + duration
+
+    def worker(index: int):
+        rng = random.Random(index)
+        while time.perf_counter() < deadline:
+            handler(rng.choice(user_ids), rng.choice(game_ids))
+            counts[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} events={sum(counts)} events_per_s={sum(counts) / elapsed:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="访问计数写入压测")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--games", type=int, default=3, help="热门游戏数（越少竞争越激烈）")
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    user_ids, game_ids = seed(args.users, args.games)
+
+    drive("per-request update", per_request_update, args.threads, args.duration, user_ids, game_ids)
+
+    recorder = AccessRecorder(engine, flush_interval=args.flush_interval)
+    stop = threading.Event()
+
+    def flusher():
+        while not stop.wait(args.flush_interval):
+            recorder.flush()
+
+    flush_thread = threading.Thread(target=flusher)
+    flush_thread.start()
+    drive("write-behind", recorder.record, args.threads, args.duration, user_ids, game_ids)
+    stop.set()
+    flush_thread.join()
+    recorder.flush()
+    print(f"{'recorder stats':<24} {recorder.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+并发注册压测：
+1. 大量不同用户并发注册，统计吞吐量和延迟；
+2. 同一用户名并发注册，确认只有一个请求成功，其余返回 400。
+
+用法（先启动 API 服务）：
+    python -m benchmarks.bench_concurrent_signup --users 500 --concurrency 50
+"""
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from benchmarks._common import base_parser, format_summary, summarize
+
+
+async def register(client: httpx.AsyncClient, username: str, latencies: list, statuses: dict):
+    start = time.perf_counter()
+    response = await client.post("/api/auth/register", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": "bench-password",
+    })
+    latencies.append((time.perf_counter() - start) * 1000)
+    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def bounded(semaphore: asyncio.Semaphore, coro):
+    async with semaphore:
+        await coro
+
+
+async def main():
+    parser = base_parser("并发注册吞吐量")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--race", type=int, default=20, help="同名并发注册的请求数")
+    args = parser.parse_args()
+
+    run_id = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        latencies, statuses = [], {}
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            bounded(semaphore, register(client, f"su_{run_id}_{i}", latencies, statuses))
+            for i in range(args.users)
+        ])
+        elapsed = time.perf_counter() - started
+        print(format_summary("unique signups", summarize(latencies, elapsed)))
+        print(f"{'unique statuses':<24} {statuses}")
+
+        race_latencies, race_statuses = [], {}
+        await asyncio.gather(*[
+            register(client, f"race_{run_id}", race_latencies, race_statuses)
+            for _ in range(args.race)
+        ])
+        print(f"{'same-username statuses':<24} {race_statuses} (expect exactly one 201)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
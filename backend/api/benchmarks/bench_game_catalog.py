@@ -0,0 +1,74 @@
+"""
+游戏目录基准：对比预序列化目录（GameCatalog）与每次请求查询 ORM 并序列化。
+
+在进程内直接调用两条路径，排除 HTTP 开销，只比较服务端处理成本。
+使用 DATABASE_URL 指向的数据库（本地 Postgres 或 sqlite:///catalog_bench.db）。
+
+用法：
+    DATABASE_URL=sqlite:///catalog_bench.db python -m benchmarks.bench_game_catalog --games 50
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from database import SessionLocal, init_db
+from models import GameConfig
+from routes.games import GameCatalog, _load_catalog
+
+
+def seed(games: int):
+    init_db()
+    db = SessionLocal()
+    try:
+        for i in range(games):
+            name = f"catalog_game_{i}"
+            if not db.query(GameConfig).filter(GameConfig.game_name == name).first():
+                db.add(GameConfig(
+                    game_name=name, game_display_name=f"Game {i}", description="benchmark game",
+                    db_type="postgresql", db_host="localhost", db_port=5432,
+                    db_name=name, db_user="postgres", db_password="postgres",
+                    game_url=f"https://example.com/{name}"
+                ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def per_request_orm(db) -> bytes:
+    return json.dumps(_load_catalog(db), ensure_ascii=False).encode("utf-8")
+
+
+async def run(requests: int):
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        for _ in range(requests):
+            per_request_orm(db)
+        orm_rps = requests / (time.perf_counter() - start)
+
+        catalog = GameCatalog(check_interval=5.0)
+        await catalog.get(db)
+        start = time.perf_counter()
+        for _ in range(requests):
+            await catalog.get(db)
+        cached_rps = requests / (time.perf_counter() - start)
+    finally:
+        db.close()
+
+    print(f"{'per-request ORM':<24} {orm_rps:.1f} req/s")
+    print(f"{'precomputed catalog':<24} {cached_rps:.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="游戏目录基准")
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    seed(args.games)
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
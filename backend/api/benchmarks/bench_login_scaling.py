@@ -0,0 +1,104 @@
+"""
+登录吞吐随 worker 数的扩展性：依次以 1、2、4… 个 worker 启动 gunicorn，
+对每种配置做相同的并发登录压测，输出吞吐和相对单 worker 的线性扩展效率。
+
+服务端使用当前环境的 DATABASE_URL（需要先运行 python migrate.py），压测期间关闭限流。
+
+用法：
+    python -m benchmarks.bench_login_scaling --workers 1,2,4,8 --concurrency 64 --duration 15
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks._common import summarize
+from benchmarks.bench_login_storm import ensure_user, login_worker
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), HOST="127.0.0.1", PORT=str(port),
+               RATE_LIMIT_ENABLED="false")
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+async def wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url, timeout=1) as client:
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError("gunicorn 启动失败")
+            try:
+                if (await client.get("/api/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    raise TimeoutError("服务未就绪")
+
+
+async def run_load(base_url: str, concurrency: int, duration: float, warmup: float):
+    limits = httpx.Limits(max_connections=concurrency + 10)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await ensure_user(client)
+        # 预热：让每个 worker 都建立好数据库连接
+        await asyncio.gather(*[
+            login_worker(client, time.perf_counter() + warmup, [], {}) for _ in range(concurrency)
+        ])
+
+        latencies, statuses = [], {}
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*[
+            login_worker(client, deadline, latencies, statuses) for _ in range(concurrency)
+        ])
+        return summarize(latencies, time.perf_counter() - started), statuses
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="登录吞吐随 worker 数的扩展性")
+    parser.add_argument("--workers", default="1,2,4", help="逗号分隔的 worker 数")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    args = parser.parse_args()
+
+    baseline_rps = None
+    print(f"{'workers':<8} {'rps':>8} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'efficiency':>10}  statuses")
+    for workers in (int(value) for value in args.workers.split(",")):
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        process = start_server(workers, port)
+        try:
+            await wait_ready(base_url, process)
+            summary, statuses = await run_load(base_url, args.concurrency, args.duration, args.warmup)
+        finally:
+            process.terminate()
+            process.wait()
+
+        rps = summary.get("rps", 0.0)
+        if baseline_rps is None:
+            baseline_rps = rps / workers
+        efficiency = rps / (baseline_rps * workers) if baseline_rps else 0.0
+        print(f"{workers:<8} {rps:>8} {summary['p50_ms']:>8} {summary['p95_ms']:>8} "
+              f"{summary['p99_ms']:>8} {efficiency:>10.2f}  {statuses}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
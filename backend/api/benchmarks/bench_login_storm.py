@@ -0,0 +1,75 @@
+"""
+登录风暴压测：并发登录的同时持续探测 /api/health，
+观察 bcrypt 是否阻塞事件循环。
+
+压测流量全部来自同一个 IP 和同一个账号，服务端需要关闭限流，否则大部分登录只会得到 429。
+
+用法（先启动 API 服务）：
+    RATE_LIMIT_ENABLED=false uvicorn main:app --port 8000
+    python -m benchmarks.bench_login_storm --concurrency 100 --duration 15
+"""
+import asyncio
+import sys
+import time
+
+import httpx
+
+from benchmarks._common import base_parser, format_summary, summarize
+
+BENCH_USERNAME = "bench_login_user"
+BENCH_PASSWORD = "bench-password"
+
+
+async def ensure_user(client: httpx.AsyncClient):
+    """确保压测账号存在（已存在时注册接口返回 400，忽略即可）"""
+    await client.post("/api/auth/register", json={
+        "username": BENCH_USERNAME,
+        "email": f"{BENCH_USERNAME}@example.com",
+        "password": BENCH_PASSWORD,
+    })
+
+
+async def login_worker(client: httpx.AsyncClient, deadline: float, latencies: list, statuses: dict):
+    form = {"username": BENCH_USERNAME, "password": BENCH_PASSWORD}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.post("/api/auth/login", data=form)
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def health_prober(client: httpx.AsyncClient, deadline: float, latencies: list, interval: float):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await client.get("/api/health")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+
+
+async def main():
+    parser = base_parser("登录风暴下的登录与健康检查延迟")
+    parser.add_argument("--health-interval", type=float, default=0.05, help="健康检查间隔（秒）")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency + 10)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        await ensure_user(client)
+
+        login_latencies, health_latencies, statuses = [], [], {}
+        started = time.perf_counter()
+        deadline = started + args.duration
+        tasks = [login_worker(client, deadline, login_latencies, statuses) for _ in range(args.concurrency)]
+        tasks.append(health_prober(client, deadline, health_latencies, args.health_interval))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    print(format_summary("login", summarize(login_latencies, elapsed)))
+    print(format_summary("health", summarize(health_latencies)))
+    print(f"{'login status':<24} {statuses}")
+    if statuses.get(429):
+        print("登录被限流，结果无效：请以 RATE_LIMIT_ENABLED=false 启动被测服务")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
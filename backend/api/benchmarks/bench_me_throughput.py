@@ -0,0 +1,77 @@
+"""
+/api/auth/me 吞吐量压测，用于对比 DB_MODE=sync 与 DB_MODE=async。
+
+服务端需要关闭限流（RATE_LIMIT_ENABLED=false），避免反复运行时注册/登录被限流。
+
+用法（分别以两种模式启动 API 服务后各运行一次）：
+    RATE_LIMIT_ENABLED=false DB_MODE=sync  uvicorn main:app --port 8000
+    python -m benchmarks.bench_me_throughput --label sync --concurrency 500
+
+    RATE_LIMIT_ENABLED=false DB_MODE=async uvicorn main:app --port 8000
+    python -m benchmarks.bench_me_throughput --label async --concurrency 500
+"""
+import asyncio
+import time
+
+import httpx
+
+from benchmarks._common import base_parser, format_summary, summarize
+
+BENCH_USERNAME = "bench_me_user"
+BENCH_PASSWORD = "bench-password"
+
+
+async def get_token(client: httpx.AsyncClient) -> str:
+    await client.post("/api/auth/register", json={
+        "username": BENCH_USERNAME,
+        "email": f"{BENCH_USERNAME}@example.com",
+        "password": BENCH_PASSWORD,
+    })
+    response = await client.post(
+        "/api/auth/login",
+        data={"username": BENCH_USERNAME, "password": BENCH_PASSWORD}
+    )
+    if response.status_code == 429:
+        raise SystemExit("登录被限流：请以 RATE_LIMIT_ENABLED=false 启动被测服务")
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def me_worker(client: httpx.AsyncClient, headers: dict, deadline: float,
+                    latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get("/api/auth/me", headers=headers)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def main():
+    parser = base_parser("/api/auth/me 吞吐量")
+    parser.add_argument("--label", default="run", help="结果标签（如 sync / async）")
+    parser.set_defaults(concurrency=500)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        headers = {"Authorization": f"Bearer {await get_token(client)}"}
+
+        latencies, errors = [], []
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            me_worker(client, headers, deadline, latencies, errors)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    print(format_summary(f"me[{args.label}]", summarize(latencies, elapsed)))
+    print(f"{'errors':<24} {len(errors)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
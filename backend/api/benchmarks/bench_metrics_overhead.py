@@ -0,0 +1,57 @@
+"""
+指标中间件开销基准：在进程内通过 ASGI 直接调用一个最小接口，
+对比启用与不启用 MetricsMiddleware 的单请求耗时。
+
+用法：
+    python -m benchmarks.bench_metrics_overhead --requests 20000
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from utils.metrics import MetricsMiddleware
+
+
+def build_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/health")
+    async def health():
+        return {"status": "healthy"}
+
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def measure(app: FastAPI, requests: int) -> float:
+    """返回每个请求的平均耗时（微秒）"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(200):
+            await client.get("/api/health")
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/api/health")
+        return (time.perf_counter() - start) / requests * 1_000_000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="指标中间件开销")
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    baseline = await measure(build_app(False), args.requests)
+    instrumented = await measure(build_app(True), args.requests)
+    overhead = (instrumented - baseline) / baseline * 100
+
+    print(f"{'without metrics':<24} {baseline:.1f} us/req")
+    print(f"{'with metrics':<24} {instrumented:.1f} us/req")
+    print(f"{'overhead':<24} {overhead:.2f}%")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
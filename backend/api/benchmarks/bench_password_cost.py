@@ -0,0 +1,51 @@
+"""
+密码校验成本基准：测量不同 bcrypt 成本（以及已安装时的 argon2）下单次校验的耗时，
+用于选择 BCRYPT_ROUNDS / PASSWORD_HASH_TARGET_MS。
+
+用法：
+    python -m benchmarks.bench_password_cost --min-rounds 8 --max-rounds 14
+"""
+import argparse
+import time
+
+from passlib.hash import bcrypt
+
+from utils.password_policy import _argon2_available
+
+PASSWORD = "bench-password"
+
+
+def time_verify(hashed: str, verify, samples: int) -> float:
+    """返回单次校验的中位耗时（毫秒）"""
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        verify(PASSWORD, hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="密码校验成本")
+    parser.add_argument("--min-rounds", type=int, default=8)
+    parser.add_argument("--max-rounds", type=int, default=14)
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        hasher = bcrypt.using(rounds=rounds)
+        hashed = hasher.hash(PASSWORD)
+        print(f"{f'bcrypt rounds={rounds}':<24} {time_verify(hashed, hasher.verify, args.samples):.1f} ms/verify")
+
+    if _argon2_available():
+        from passlib.hash import argon2
+
+        hashed = argon2.hash(PASSWORD)
+        print(f"{'argon2 (default)':<24} {time_verify(hashed, argon2.verify, args.samples):.1f} ms/verify")
+    else:
+        print(f"{'argon2':<24} 未安装 argon2-cffi，跳过")
+
+
+if __name__ == "__main__":
+    main()
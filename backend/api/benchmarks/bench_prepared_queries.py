@@ -0,0 +1,115 @@
+"""
+参数化查询基准：在本地 PostgreSQL 上重复执行小的主键查询，对比
+- interpolated：把值拼接进 SQL（每条语句文本不同，编译缓存和语句缓存都无法命中）
+- parameterized：execute 绑定参数
+- named：register_statement 登记命名语句后 execute_named（进程内复用语句对象，psycopg2 不做服务端预处理）
+- async_parameterized：异步连接器（asyncpg 按连接缓存服务端预处理语句），需要 --async
+
+用法：
+    python -m benchmarks.bench_prepared_queries --host 127.0.0.1 --user postgres --password postgres --db bench
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks._common import format_summary, summarize
+from models import GameConfig
+
+TABLE = "bench_lookup"
+LOOKUP_SQL = f"SELECT id, player, score FROM {TABLE} WHERE id = :id"
+
+
+def make_config(args) -> GameConfig:
+    return GameConfig(
+        id=0, game_name="prepared_bench", game_display_name="prepared_bench",
+        db_type="postgresql", db_host=args.host, db_port=args.port, db_name=args.db,
+        db_user=args.user, db_password=args.password
+    )
+
+
+def seed(connector, rows: int):
+    """建表并用 execute_many 批量写入测试数据（行数一致时跳过）"""
+    from sqlalchemy import text
+
+    connector.connect()
+    with connector.engine.begin() as connection:
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {TABLE} (id INTEGER PRIMARY KEY, player TEXT, score INTEGER)"
+        ))
+        existing = connection.execute(text(f"SELECT COUNT(*) FROM {TABLE}")).scalar()
+        if existing == rows:
+            return
+        connection.execute(text(f"DELETE FROM {TABLE}"))
+    connector.execute_many(
+        f"INSERT INTO {TABLE} (id, player, score) VALUES (:id, :player, :score)",
+        [{"id": i, "player": f"player_{i}", "score": i % 10000} for i in range(rows)]
+    )
+
+
+def run_sync(name: str, lookup, ids) -> None:
+    latencies = []
+    start = time.perf_counter()
+    for key in ids:
+        t0 = time.perf_counter()
+        lookup(key)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    print(format_summary(name, summarize(latencies, time.perf_counter() - start)))
+
+
+async def run_async(config: GameConfig, ids) -> None:
+    from utils.async_db_connector import create_async_connector
+
+    connector = create_async_connector(config)
+    # 预热：让连接上的服务端预处理语句缓存就绪
+    await connector.execute(LOOKUP_SQL, {"id": ids[0]})
+
+    latencies = []
+    start = time.perf_counter()
+    for key in ids:
+        t0 = time.perf_counter()
+        await connector.execute(LOOKUP_SQL, {"id": key})
+        latencies.append((time.perf_counter() - t0) * 1000)
+    print(format_summary("async_parameterized", summarize(latencies, time.perf_counter() - start)))
+    await connector.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="参数化 / 命名语句查询延迟")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5432)
+    parser.add_argument("--db", default="postgres")
+    parser.add_argument("--user", default="postgres")
+    parser.add_argument("--password", default="postgres")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--async", dest="run_async", action="store_true", help="同时测试 asyncpg 异步连接器")
+    args = parser.parse_args()
+
+    from utils.db_connector import create_connector
+
+    config = make_config(args)
+    connector = create_connector(config)
+    seed(connector, args.rows)
+
+    rng = random.Random(42)
+    ids = [rng.randrange(args.rows) for _ in range(args.iterations)]
+
+    connector.register_statement("lookup", LOOKUP_SQL)
+    # 预热连接池
+    connector.execute_named("lookup", {"id": ids[0]})
+
+    run_sync(
+        "interpolated",
+        lambda key: connector.execute_query(f"SELECT id, player, score FROM {TABLE} WHERE id = {key}"),
+        ids
+    )
+    run_sync("parameterized", lambda key: connector.execute(LOOKUP_SQL, {"id": key}), ids)
+    run_sync("named", lambda key: connector.execute_named("lookup", {"id": key}), ids)
+
+    if args.run_async:
+        asyncio.run(run_async(config, ids))
+
+
+if __name__ == "__main__":
+    main()
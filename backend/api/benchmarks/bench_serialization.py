@@ -0,0 +1,100 @@
+"""
+响应序列化微基准：对 /me、/verify、/api/games/mine 的响应体，对比
+- pydantic：FastAPI 默认路径（按 response_model 校验 + jsonable 转换 + JSONResponse）
+- fast_json：直接构造字典 + JSONResponse
+- fast_orjson：直接构造字典 + ORJSONResponse（需要安装 orjson）
+并给出 gzip 压缩前后的大小，用于选择 COMPRESSION_MIN_SIZE。
+
+用法：
+    python -m benchmarks.bench_serialization --iterations 50000
+"""
+import argparse
+import gzip
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from schemas import APIResponse, UserGameResponse, UserResponse
+from utils.responses import user_payload
+
+
+def sample_user():
+    return SimpleNamespace(
+        id=42, username="bench_user", email="bench_user@example.com",
+        is_active=True, is_superuser=False, created_at=datetime(2024, 1, 1, 12, 0, 0, 123456)
+    )
+
+
+def sample_games(count: int) -> List[dict]:
+    return [
+        UserGameResponse(
+            game_id=i, game_name=f"game_{i}", game_display_name=f"Game {i}",
+            description="x" * 80, game_url=f"https://games.example.com/{i}",
+            access_count=i * 3, last_access_at=datetime(2024, 5, 1), first_access_at=datetime(2024, 1, 1)
+        ).model_dump(mode="json")
+        for i in range(count)
+    ]
+
+
+def per_op_us(fn, iterations: int) -> float:
+    for _ in range(min(1000, iterations)):
+        fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="响应序列化开销")
+    parser.add_argument("--iterations", type=int, default=50000)
+    parser.add_argument("--games", type=int, default=30, help="/mine 响应中的游戏数")
+    args = parser.parse_args()
+
+    try:
+        from fastapi.responses import ORJSONResponse
+        import orjson  # noqa: F401
+    except ImportError:
+        ORJSONResponse = None
+
+    user = sample_user()
+    games = sample_games(args.games)
+    games_adapter = TypeAdapter(List[UserGameResponse])
+
+    def verify_payload():
+        return {"success": True, "message": "Token 有效", "data": {"username": user.username, "user_id": user.id}}
+
+    endpoints = {
+        "/me": (
+            lambda: JSONResponse(jsonable_encoder(UserResponse.model_validate(user))),
+            lambda: user_payload(user),
+        ),
+        "/verify": (
+            lambda: JSONResponse(jsonable_encoder(APIResponse(**verify_payload()))),
+            verify_payload,
+        ),
+        "/api/games/mine": (
+            lambda: JSONResponse(jsonable_encoder(games_adapter.validate_python(games))),
+            lambda: games,
+        ),
+    }
+
+    for name, (pydantic_path, build_payload) in endpoints.items():
+        pydantic_us = per_op_us(pydantic_path, args.iterations)
+        fast_us = per_op_us(lambda: JSONResponse(build_payload()), args.iterations)
+        line = f"{name:<24} pydantic={pydantic_us:.2f}us fast_json={fast_us:.2f}us"
+        if ORJSONResponse is not None:
+            orjson_us = per_op_us(lambda: ORJSONResponse(build_payload()), args.iterations)
+            line += f" fast_orjson={orjson_us:.2f}us"
+        body = JSONResponse(build_payload()).body
+        line += f" bytes={len(body)} gzip_bytes={len(gzip.compress(body, compresslevel=5))}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+启动耗时基准：每轮在新的子进程中测量
+- import_s：import main 的耗时（冷启动导入）
+- first_request_s：从启动 uvicorn 到 /api/health 首次返回 200 的耗时
+并列出 -X importtime 统计中累计耗时最高的模块。
+
+结果可追加到 benchmarks/results/startup.jsonl（带 git 提交号），用于跟踪启动耗时的变化。
+
+用法：
+    python -m benchmarks.bench_startup --runs 5 --record
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "startup.jsonl")
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def measure_import() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=API_DIR, check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def top_imports(limit: int):
+    """解析 -X importtime 输出，返回累计耗时最高的模块 [(模块, 毫秒)]"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=API_DIR, check=True, capture_output=True, text=True
+    ).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        modules.append((name.strip(), int(cumulative) / 1000))
+    # 只看顶层包，避免同一个包的子模块重复出现
+    top_level = [(name, ms) for name, ms in modules if "." not in name]
+    return sorted(top_level, key=lambda item: item[1], reverse=True)[:limit]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_request(timeout: float) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=API_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/api/health", timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                pass
+            if process.poll() is not None:
+                raise RuntimeError("uvicorn 启动失败")
+            time.sleep(0.01)
+        raise TimeoutError(f"{timeout}s 内未就绪")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=API_DIR, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--top", type=int, default=10, help="列出累计导入耗时最高的模块数")
+    parser.add_argument("--record", action="store_true", help=f"追加结果到 {RESULTS_PATH}")
+    args = parser.parse_args()
+
+    import_times = [measure_import() for _ in range(args.runs)]
+    first_request_times = [measure_first_request(args.timeout) for _ in range(args.runs)]
+
+    result = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "runs": args.runs,
+        "import_s": round(statistics.median(import_times), 4),
+        "first_request_s": round(statistics.median(first_request_times), 4),
+    }
+    print(f"{'import main':<24} median={result['import_s']}s min={min(import_times):.4f}s")
+    print(f"{'first request':<24} median={result['first_request_s']}s min={min(first_request_times):.4f}s")
+    print("slowest imports (cumulative):")
+    for name, ms in top_imports(args.top):
+        print(f"  {name:<30} {ms:.1f} ms")
+
+    if args.record:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "a") as f:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+流式查询内存基准：在本地 SQLite 文件（默认 100 万行）上对比
+execute_query（全部加载）与 iter_query（流式）的峰值 RSS。
+
+每种模式在独立子进程中运行，保证峰值 RSS 互不影响。
+
+用法：
+    python -m benchmarks.bench_stream_memory --rows 1000000
+"""
+import argparse
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import time
+
+from models import GameConfig
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), "stream_bench.sqlite3")
+
+
+def peak_rss_mb() -> float:
+    # Linux 上 ru_maxrss 单位为 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(path: str, rows: int):
+    """生成测试数据（已存在且行数一致时跳过）"""
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS game_stats ("
+        "id INTEGER PRIMARY KEY, player TEXT, score INTEGER, level INTEGER, note TEXT)"
+    )
+    existing = conn.execute("SELECT COUNT(*) FROM game_stats").fetchone()[0]
+    if existing != rows:
+        conn.execute("DELETE FROM game_stats")
+        conn.executemany(
+            "INSERT INTO game_stats (id, player, score, level, note) VALUES (?, ?, ?, ?, ?)",
+            ((i, f"player_{i}", i % 10000, i % 100, "x" * 32) for i in range(rows))
+        )
+        conn.commit()
+    conn.close()
+
+
+def run_mode(mode: str, path: str, batch_size: int):
+    from utils.db_connector import create_connector
+
+    config = GameConfig(
+        id=0, game_name="stream_bench", game_display_name="stream_bench",
+        db_type="sqlite", db_host="", db_port=0, db_name=path, db_user="", db_password=""
+    )
+    connector = create_connector(config)
+    query = "SELECT * FROM game_stats"
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    count = 0
+    if mode == "materialize":
+        count = len(connector.execute_query(query))
+    else:
+        for _ in connector.iter_query(query, batch_size=batch_size):
+            count += 1
+    elapsed = time.perf_counter() - start
+    print(f"{mode:<24} rows={count} seconds={elapsed:.2f} "
+          f"baseline_rss_mb={baseline:.1f} peak_rss_mb={peak_rss_mb():.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式查询内存基准")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--db-path", default=DEFAULT_DB_PATH)
+    parser.add_argument("--mode", choices=["materialize", "stream"], help="内部使用：单独运行一种模式")
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.db_path, args.batch_size)
+        return
+
+    seed(args.db_path, args.rows)
+    for mode in ("stream", "materialize"):
+        subprocess.run([
+            sys.executable, "-m", "benchmarks.bench_stream_memory",
+            "--mode", mode, "--db-path", args.db_path, "--batch-size", str(args.batch_size)
+        ], check=True)
+
+
+if __name__ == "__main__":
+    main()
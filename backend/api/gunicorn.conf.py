@@ -0,0 +1,75 @@
+"""
+生产环境 gunicorn 配置（uvicorn worker）
+
+    gunicorn -c gunicorn.conf.py main:app
+
+- worker 数默认等于 CPU 核数（WEB_CONCURRENCY 覆盖），登录的 bcrypt 计算分摊到所有核
+- 预加载应用：导入和 bcrypt 成本校准只在 master 进程做一次，fork 后共享
+- 处理 max_requests（加随机抖动）个请求后重启 worker，限制内存增长
+- SIGTERM 时停止接收新连接，在 graceful_timeout 内处理完进行中的请求，再释放连接池
+"""
+import logging
+import multiprocessing
+import os
+
+logger = logging.getLogger("gunicorn.error")
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+# worker 无响应超时，以及收到 SIGTERM 后等待进行中请求完成的时间
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+# 多个 worker 共享 CPU，默认每个 worker 的密码哈希线程数按核数平分，避免过度订阅
+os.environ.setdefault(
+    "PASSWORD_HASH_WORKERS",
+    str(max(1, multiprocessing.cpu_count() // max(1, workers)))
+)
+
+
+def _discard_inherited_pools():
+    """
+    丢弃从 master 继承的连接池
+
+    预加载时 master 可能已经建立过数据库连接，子进程不能复用这些套接字；
+    close=False 只丢弃池而不关闭连接，避免影响仍在使用它们的其他进程。
+    """
+    from database import async_engine, engine
+
+    engine.dispose(close=False)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close=False)
+
+
+def post_fork(server, worker):
+    if preload_app:
+        _discard_inherited_pools()
+
+
+def worker_exit(server, worker):
+    """
+    worker 退出时释放连接池
+
+    正常退出时应用的 shutdown 事件已经写回计数并释放连接池，这里兜底处理
+    超时被强制结束或 max_requests 重启时遗留的连接，dispose 可以重复调用。
+    """
+    try:
+        from database import engine
+        from utils.connector_registry import get_registry
+
+        get_registry().close_all()
+        engine.dispose()
+    except Exception as e:
+        logger.error(f"worker {worker.pid} 释放连接池失败: {str(e)}")
@@ -1,20 +1,37 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
+import logging
 import os
 
 # 加载环境变量
 load_dotenv()
 
 # 导入路由
-from routes import auth
-from database import init_db
+from routes import auth, games
+from database import DB_AUTO_CREATE, init_db, dispose_engines, engine, async_engine
+from auth import password_hasher, principal_cache, token_cache
+from utils.async_db_connector import wait_for_disposals
+from utils.connector_registry import get_registry
+from utils.access_recorder import get_access_recorder
+from utils.db_instrumentation import pool_collector, pool_stats
+from utils.health import health_monitor
+from utils.internal_access import require_internal_token
+from utils.rate_limit import rate_limiter
+from utils.revocation import get_revocation_store
+from utils.query_cache import query_cache
+from utils.metrics import CONTENT_TYPE_LATEST, REGISTRY, MetricsMiddleware, stats_collector
+from utils.responses import DefaultJSONResponse, add_compression
+
+logger = logging.getLogger(__name__)
 
 # 创建 FastAPI 应用实例
 app = FastAPI(
     title="Main Page API",
     description="主页面后端 API - DeepBrain Tech",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=DefaultJSONResponse
 )
 
 # 配置 CORS - 允许前端访问
@@ -43,18 +60,72 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# 超过阈值的响应体才压缩
+add_compression(app)
+
+# 请求耗时与并发数指标
+app.add_middleware(MetricsMiddleware)
+
+# 抓取 /metrics 时采集的运行状态
+REGISTRY.register_collector(pool_collector(engine, "main"))
+if async_engine is not None:
+    REGISTRY.register_collector(pool_collector(async_engine, "main_async"))
+REGISTRY.register_collector(stats_collector("password_hasher", "密码哈希工作池", password_hasher.stats))
+REGISTRY.register_collector(stats_collector("game_connector_registry", "游戏数据库连接池注册表", lambda: get_registry().stats()))
+REGISTRY.register_collector(stats_collector("principal_cache", "用户缓存", principal_cache.stats))
+if token_cache is not None:
+    REGISTRY.register_collector(stats_collector("token_cache", "Token 缓存", token_cache.stats))
+REGISTRY.register_collector(stats_collector("game_query_cache", "游戏查询结果缓存", query_cache.stats))
+REGISTRY.register_collector(stats_collector("rate_limiter", "请求限流", rate_limiter.stats))
+REGISTRY.register_collector(stats_collector("game_access_recorder", "访问计数写回", lambda: get_access_recorder().stats()))
+REGISTRY.register_collector(stats_collector("token_revocation", "Token 吊销列表", lambda: get_revocation_store().stats()))
+
+
+def _health_probe_collector():
+    for name, result in list(health_monitor.results.items()):
+        yield "health_probe_up", "就绪探测是否成功", {"probe": name}, 1 if result.ok else 0
+        yield "health_probe_latency_ms", "就绪探测耗时（毫秒）", {"probe": name}, result.latency_ms
+
+
+REGISTRY.register_collector(_health_probe_collector)
+
 # 注册路由
 app.include_router(auth.router)
+app.include_router(games.router)
 
 
 @app.on_event("startup")
 async def startup_event():
-    """应用启动时初始化数据库"""
-    try:
-        init_db()
-        print("数据库初始化成功")
-    except Exception as e:
-        print(f"数据库初始化失败: {str(e)}")
+    """
+    应用启动时启动后台任务
+
+    表结构由单独的迁移步骤（python migrate.py）创建和升级，多个 worker 启动时不再各自检查 DDL。
+    """
+    if DB_AUTO_CREATE:
+        try:
+            init_db()
+            logger.info("数据库初始化成功")
+        except Exception as e:
+            logger.error(f"数据库初始化失败: {str(e)}")
+
+    # 启动游戏访问计数的定期写回、就绪探测、Token 吊销列表同步和空闲游戏连接池释放
+    get_access_recorder().start()
+    health_monitor.start()
+    get_revocation_store().start()
+    get_registry().start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """应用关闭时写回访问计数，释放密码哈希工作池和数据库连接池"""
+    await health_monitor.stop()
+    await get_revocation_store().stop()
+    await get_access_recorder().stop()
+    password_hasher.shutdown(wait=False)
+    await get_registry().stop()
+    get_registry().close_all()
+    await wait_for_disposals()
+    await dispose_engines()
 
 
 @app.get("/")
@@ -74,3 +145,33 @@ async def health_check():
         "status": "healthy",
         "service": "main-page-api"
     }
+
+
+@app.get("/api/ready")
+async def readiness_check():
+    """就绪检查端点（返回缓存的探测结果，不直接访问数据库）"""
+    snapshot = health_monitor.snapshot()
+    status_code = 503 if snapshot["status"] == "not_ready" else 200
+    return JSONResponse(status_code=status_code, content=snapshot)
+
+
+@app.get("/api/pools", dependencies=[Depends(require_internal_token)])
+async def pools_status():
+    """
+    数据库连接池状态：大小、饱和度、借出等待时间分位数（用于按实际负载调整连接池参数）
+
+    暴露各游戏数据库连接池的内部状态，需要 INTERNAL_API_TOKEN。
+    """
+    pools = [pool_stats(engine, "main")]
+    if async_engine is not None:
+        pools.append(pool_stats(async_engine, "main_async"))
+    for (_, kind), resource in get_registry().resources():
+        if kind in ("sqlalchemy", "sqlalchemy_async"):
+            pools.append(pool_stats(resource))
+    return {"pools": pools, "game_connector_registry": get_registry().stats()}
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_internal_token)])
+async def metrics():
+    """Prometheus 指标（需要 INTERNAL_API_TOKEN，抓取配置中使用 Bearer 认证）"""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,57 @@
+"""
+数据库迁移（部署时在启动 API worker 之前运行一次）
+
+    python migrate.py            # 升级到最新版本
+    python migrate.py <revision> # 升级到指定版本（降级等其他操作直接使用 alembic 命令）
+
+引入迁移之前由 create_all 创建的数据库（有表但没有 alembic_version），
+会先标记为初始版本，再执行后续迁移。
+"""
+import logging
+import os
+import sys
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, pool
+
+from database import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INITIAL_REVISION = "0001_initial_schema"
+
+
+def alembic_config() -> Config:
+    config = Config(os.path.join(BASE_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BASE_DIR, "migrations"))
+    return config
+
+
+def is_unversioned_legacy_db() -> bool:
+    """数据库里已有表但没有迁移记录"""
+    engine = create_engine(DATABASE_URL, poolclass=pool.NullPool)
+    try:
+        with engine.connect() as connection:
+            tables = set(inspect(connection).get_table_names())
+    finally:
+        engine.dispose()
+    return "users" in tables and "alembic_version" not in tables
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    target = sys.argv[1] if len(sys.argv) > 1 else "head"
+    config = alembic_config()
+
+    if is_unversioned_legacy_db():
+        logger.info(f"检测到未纳入迁移管理的已有数据库，标记为 {INITIAL_REVISION}")
+        command.stamp(config, INITIAL_REVISION)
+
+    command.upgrade(config, target)
+    logger.info(f"数据库迁移完成: {target}")
+
+
+if __name__ == "__main__":
+    main()
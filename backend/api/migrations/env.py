@@ -0,0 +1,58 @@
+"""
+Alembic 迁移环境
+数据库地址与应用一致（DATABASE_URL），模型元数据来自 models.py
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+import models  # noqa: F401  注册所有模型到 Base.metadata
+from database import DATABASE_URL, Base
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """生成 SQL 脚本而不连接数据库（alembic upgrade head --sql）"""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=DATABASE_URL.startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """连接数据库执行迁移（迁移只运行一次，不需要连接池）"""
+    connectable = config.attributes.get("connection") or create_engine(DATABASE_URL, poolclass=pool.NullPool)
+
+    def run(connection):
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite 不支持大部分 ALTER TABLE，通过复制表的方式执行
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+    if hasattr(connectable, "connect"):
+        with connectable.connect() as connection:
+            run(connection)
+    else:
+        run(connectable)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,72 @@
+"""初始表结构（users、game_configs、game_accesses）
+
+与引入迁移之前 create_all 创建的表一致；已有数据库由 migrate.py 标记为此版本后继续升级。
+
+Revision ID: 0001_initial_schema
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001_initial_schema"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(50), nullable=False),
+        sa.Column("email", sa.String(100), nullable=False),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("is_superuser", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "game_configs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("game_name", sa.String(100), nullable=False),
+        sa.Column("game_display_name", sa.String(200), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("db_type", sa.String(50), nullable=False),
+        sa.Column("db_host", sa.String(200), nullable=False),
+        sa.Column("db_port", sa.Integer(), nullable=False),
+        sa.Column("db_name", sa.String(100), nullable=False),
+        sa.Column("db_user", sa.String(100), nullable=False),
+        sa.Column("db_password", sa.String(255), nullable=False),
+        sa.Column("game_url", sa.String(500)),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_game_configs_id", "game_configs", ["id"])
+    op.create_index("ix_game_configs_game_name", "game_configs", ["game_name"], unique=True)
+
+    op.create_table(
+        "game_accesses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("game_id", sa.Integer(), sa.ForeignKey("game_configs.id"), nullable=False),
+        sa.Column("access_count", sa.Integer()),
+        sa.Column("last_access_at", sa.DateTime()),
+        sa.Column("first_access_at", sa.DateTime()),
+        sa.Column("can_access", sa.Boolean()),
+        sa.Column("access_metadata", sa.JSON()),
+    )
+    op.create_index("ix_game_accesses_id", "game_accesses", ["id"])
+
+
+def downgrade():
+    op.drop_table("game_accesses")
+    op.drop_table("game_configs")
+    op.drop_table("users")
@@ -0,0 +1,68 @@
+"""game_accesses 唯一约束和部分索引
+
+- (user_id, game_id) 唯一约束：访问计数写回按 (用户, 游戏) 更新唯一一条记录，添加前先合并重复记录
+- 只包含 can_access 记录的 user_id 部分索引："我的游戏" 查询
+
+Revision ID: 0002_game_access_unique
+Revises: 0001_initial_schema
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_game_access_unique"
+down_revision = "0001_initial_schema"
+branch_labels = None
+depends_on = None
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def upgrade():
+    # 在引入迁移之前由 create_all 创建的库可能已经有部分结构，已存在的跳过
+    inspector = _inspector()
+    unique_constraints = {c["name"] for c in inspector.get_unique_constraints("game_accesses")}
+    indexes = {i["name"] for i in inspector.get_indexes("game_accesses")}
+
+    # 合并重复的访问记录（已有唯一约束时不会有重复）：计数累加到 id 最小的一条，其余删除
+    op.execute(
+        """
+        UPDATE game_accesses
+        SET access_count = (
+            SELECT SUM(COALESCE(dup.access_count, 0)) FROM game_accesses dup
+            WHERE dup.user_id = game_accesses.user_id AND dup.game_id = game_accesses.game_id
+        )
+        WHERE id IN (
+            SELECT MIN(id) FROM game_accesses GROUP BY user_id, game_id HAVING COUNT(*) > 1
+        )
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM game_accesses
+        WHERE id NOT IN (SELECT MIN(id) FROM game_accesses GROUP BY user_id, game_id)
+        """
+    )
+
+    if "uq_game_accesses_user_game" not in unique_constraints:
+        with op.batch_alter_table("game_accesses") as batch_op:
+            batch_op.create_unique_constraint("uq_game_accesses_user_game", ["user_id", "game_id"])
+
+    if "ix_game_accesses_user_can_access" not in indexes:
+        op.create_index(
+            "ix_game_accesses_user_can_access",
+            "game_accesses",
+            ["user_id"],
+            postgresql_where=sa.text("can_access"),
+            sqlite_where=sa.text("can_access"),
+        )
+
+
+def downgrade():
+    op.drop_index("ix_game_accesses_user_can_access", table_name="game_accesses")
+
+    with op.batch_alter_table("game_accesses") as batch_op:
+        batch_op.drop_constraint("uq_game_accesses_user_game", type_="unique")
@@ -0,0 +1,27 @@
+"""game_configs.pool_options：按游戏覆盖连接池参数
+
+Revision ID: 0003_game_config_pool_options
+Revises: 0002_game_access_unique
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_game_config_pool_options"
+down_revision = "0002_game_access_unique"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 在引入迁移之前由 create_all 创建的库可能已经有这一列
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("game_configs")}
+    if "pool_options" not in columns:
+        with op.batch_alter_table("game_configs") as batch_op:
+            batch_op.add_column(sa.Column("pool_options", sa.JSON()))
+
+
+def downgrade():
+    with op.batch_alter_table("game_configs") as batch_op:
+        batch_op.drop_column("pool_options")
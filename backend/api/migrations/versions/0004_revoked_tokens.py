@@ -0,0 +1,43 @@
+"""revoked_tokens：按 jti 吊销的访问令牌
+
+Revision ID: 0004_revoked_tokens
+Revises: 0003_game_config_pool_options
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_revoked_tokens"
+down_revision = "0003_game_config_pool_options"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # DB_AUTO_CREATE（create_all）创建的库可能已经有这张表和索引，已存在的跳过
+    inspector = sa.inspect(op.get_bind())
+    if "revoked_tokens" not in inspector.get_table_names():
+        _create_table()
+        inspector = sa.inspect(op.get_bind())
+
+    indexes = {i["name"] for i in inspector.get_indexes("revoked_tokens")}
+    if "ix_revoked_tokens_expires_at" not in indexes:
+        op.create_index("ix_revoked_tokens_expires_at", "revoked_tokens", ["expires_at"])
+    if "ix_revoked_tokens_revoked_at" not in indexes:
+        op.create_index("ix_revoked_tokens_revoked_at", "revoked_tokens", ["revoked_at"])
+
+
+def _create_table():
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("jti", sa.String(64), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("revoked_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("jti", name="uq_revoked_tokens_jti"),
+    )
+
+
+def downgrade():
+    op.drop_table("revoked_tokens")
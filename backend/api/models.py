@@ -1,7 +1,7 @@
 """
 数据库模型
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -41,6 +41,10 @@ class GameConfig(Base):
     db_user = Column(String(100), nullable=False)
     db_password = Column(String(255), nullable=False)  # 实际应用中应该加密
     
+    # 连接池参数覆盖（JSON），例如 {"pool_size": 20, "max_overflow": 0, "pre_ping": "never"}
+    # 未设置的项使用 GAME_DB_* 环境变量，见 utils.pool_config
+    pool_options = Column(JSON)
+
     # 游戏访问URL
     game_url = Column(String(500))
     
@@ -56,6 +60,17 @@ class GameConfig(Base):
 class GameAccess(Base):
     """游戏访问记录 - 记录用户对游戏的访问情况"""
     __tablename__ = "game_accesses"
+    __table_args__ = (
+        # 每个用户对每个游戏只有一条记录（访问计数写回按这两列更新）
+        UniqueConstraint("user_id", "game_id", name="uq_game_accesses_user_game"),
+        # "我的游戏" 查询只关心有权限的记录
+        Index(
+            "ix_game_accesses_user_can_access",
+            "user_id",
+            postgresql_where=text("can_access"),
+            sqlite_where=text("can_access")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -75,3 +90,17 @@ class GameAccess(Base):
     # 关系
     user = relationship("User", back_populates="game_accesses")
     game = relationship("GameConfig", back_populates="game_accesses")
+
+
+class RevokedToken(Base):
+    """已吊销的访问令牌（退出登录），Token 过期后由各 worker 清理"""
+    __tablename__ = "revoked_tokens"
+    __table_args__ = (
+        UniqueConstraint("jti", name="uq_revoked_tokens_jti"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # Token 的 jti（没有 jti 的旧 Token 为其 SHA-256）
+    jti = Column(String(64), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
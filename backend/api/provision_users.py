@@ -0,0 +1,221 @@
+"""
+批量开通用户命令行工具
+
+从 CSV（列：username,email,password）读取用户，按注册接口的规则（schemas.UserCreate）校验，
+使用多进程并行计算 bcrypt 哈希，并通过 COPY 批量写入 PostgreSQL（本地 SQLite 使用批量 INSERT）。
+校验失败的行写入拒绝文件，不会写入数据库。已存在的用户名/邮箱会被跳过，可重复执行；
+进度记录在检查点文件中，中断后再次运行会从上次完成的位置继续。
+
+用法：
+    python provision_users.py users.csv
+    python provision_users.py users.csv --batch-size 2000 --workers 8 --rejects rejects.csv
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.dialects import sqlite
+
+from auth import get_password_hash
+from database import engine
+from models import User
+from schemas import UserCreate
+
+UserRow = Tuple[str, str, str]  # (username, email, password)
+
+# 支持的主数据库方言：PostgreSQL 使用 COPY，SQLite 使用批量 INSERT
+SUPPORTED_DIALECTS = ("postgresql", "sqlite")
+
+
+def read_rows(path: str, skip: int) -> Iterator[UserRow]:
+    """读取 CSV，跳过已经处理过的前 skip 行"""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in islice(reader, skip, None):
+            yield row["username"].strip(), row["email"].strip(), row["password"]
+
+
+def batched(rows: Iterator[UserRow], size: int) -> Iterator[List[UserRow]]:
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def validate_batch(batch: List[UserRow], first_line: int) -> Tuple[List[UserCreate], List[Tuple[int, str, str, str]]]:
+    """
+    按 UserCreate 校验一批行
+
+    返回 (通过校验的用户, 拒绝的行)，拒绝的行为 (CSV 数据行号, 用户名, 邮箱, 错误)。
+    """
+    valid = []
+    rejected = []
+    for line, (username, email, password) in enumerate(batch, start=first_line):
+        try:
+            valid.append(UserCreate(username=username, email=email, password=password))
+        except ValidationError as e:
+            errors = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            )
+            rejected.append((line, username, email, errors))
+    return valid, rejected
+
+
+def write_rejects(path: str, rejected: List[Tuple[int, str, str, str]]):
+    """追加到拒绝文件（CSV：line,username,email,error），不记录密码"""
+    if not rejected:
+        return
+    new_file = not os.path.exists(path)
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(("line", "username", "email", "error"))
+        writer.writerows(rejected)
+
+
+def load_checkpoint(path: str) -> int:
+    try:
+        with open(path) as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def save_checkpoint(path: str, done: int):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(done))
+    os.replace(tmp_path, path)
+
+
+def copy_users_postgres(records: List[dict]) -> int:
+    """
+    COPY 到临时表，再 INSERT ... ON CONFLICT DO NOTHING 合并到 users，
+    重复的用户名或邮箱会被跳过。records 已经过 validate_batch 校验。返回实际新增的行数。
+    """
+    columns = ("username", "email", "hashed_password", "is_active", "is_superuser", "created_at", "updated_at")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for record in records:
+        writer.writerow([record[column] for column in columns])
+    buffer.seek(0)
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS users_import "
+            "(LIKE users INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        cursor.copy_expert(
+            f"COPY users_import ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+        cursor.execute(
+            f"INSERT INTO users ({', '.join(columns)}) "
+            f"SELECT {', '.join(columns)} FROM users_import "
+            "ON CONFLICT DO NOTHING"
+        )
+        inserted = cursor.rowcount
+        raw.commit()
+        return inserted
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+
+def insert_users_sqlite(records: List[dict]) -> int:
+    """SQLite（本地开发）使用 executemany 的 INSERT ... ON CONFLICT DO NOTHING"""
+    stmt = sqlite.insert(User).on_conflict_do_nothing()
+    with engine.begin() as connection:
+        return connection.execute(stmt, records).rowcount
+
+
+def write_batch(records: List[dict]) -> int:
+    if not records:
+        return 0
+    if engine.dialect.name == "postgresql":
+        return copy_users_postgres(records)
+    return insert_users_sqlite(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量开通用户")
+    parser.add_argument("csv_path", help="CSV 文件（列：username,email,password）")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每批写入的用户数")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="哈希进程数")
+    parser.add_argument("--checkpoint", help="检查点文件（默认 <csv_path>.progress）")
+    parser.add_argument("--rejects", help="校验失败的行写入的文件（默认 <csv_path>.rejects.csv）")
+    parser.add_argument("--restart", action="store_true", help="忽略检查点，从头开始")
+    args = parser.parse_args()
+    if engine.dialect.name not in SUPPORTED_DIALECTS:
+        parser.error(f"不支持的数据库方言: {engine.dialect.name}（仅支持 {', '.join(SUPPORTED_DIALECTS)}）")
+
+    checkpoint = args.checkpoint or args.csv_path + ".progress"
+    rejects_path = args.rejects or args.csv_path + ".rejects.csv"
+    done = 0 if args.restart else load_checkpoint(checkpoint)
+    if done:
+        print(f"从第 {done} 行继续", file=sys.stderr)
+
+    inserted_total = 0
+    rejected_total = 0
+    processed = 0
+    started = time.perf_counter()
+    chunksize = max(1, args.batch_size // (args.workers * 4))
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for batch in batched(read_rows(args.csv_path, done), args.batch_size):
+            # 校验失败的行不计算哈希，也不写入数据库
+            users, rejected = validate_batch(batch, done + 1)
+            write_rejects(rejects_path, rejected)
+            rejected_total += len(rejected)
+
+            hashes = pool.map(get_password_hash, [user.password for user in users], chunksize=chunksize)
+            now = datetime.utcnow()
+            records = [
+                {
+                    "username": user.username,
+                    "email": user.email,
+                    "hashed_password": hashed_password,
+                    "is_active": True,
+                    "is_superuser": False,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for user, hashed_password in zip(users, hashes)
+            ]
+            inserted_total += write_batch(records)
+            processed += len(batch)
+            done += len(batch)
+            save_checkpoint(checkpoint, done)
+
+            elapsed = time.perf_counter() - started
+            print(
+                f"已处理 {done} 行，新增 {inserted_total}，拒绝 {rejected_total}，"
+                f"跳过 {processed - inserted_total - rejected_total}，{processed / elapsed:.1f} 用户/秒",
+                file=sys.stderr
+            )
+
+    elapsed = time.perf_counter() - started
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(
+        f"完成：处理 {processed} 行，新增 {inserted_total}，拒绝 {rejected_total}，"
+        f"耗时 {elapsed:.1f}s，{rate:.1f} 用户/秒"
+    )
+    if rejected_total:
+        print(f"校验失败的行已写入 {rejects_path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
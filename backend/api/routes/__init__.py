@@ -1,2 +1,3 @@
 # 路由模块
-from . import auth
\ No newline at end of file
+from . import auth
+from . import games
@@ -1,57 +1,112 @@
 """
 认证相关路由
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from datetime import timedelta
+from typing import Optional
+import logging
 
-from database import get_db
+from database import DBSession, get_session, run_db
 from models import User
 from schemas import UserCreate, UserResponse, Token, APIResponse
 from auth import (
     authenticate_user,
     create_access_token,
-    get_password_hash,
+    get_password_hash_async,
     ACCESS_TOKEN_EXPIRE_MINUTES,
-    get_current_active_user
+    get_current_active_user,
+    oauth2_scheme,
+    password_needs_update,
+    rehash_password,
+    revoke_access_token
 )
+from utils.rate_limit import limit_login, limit_register
+from utils.responses import FAST_JSON, fast_json, user_payload
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/auth", tags=["认证"])
 
 
+def _insert_user(db, username: str, email: str, hashed_password: str):
+    """
+    单条 INSERT ... RETURNING 创建用户
+
+    用户名/邮箱冲突交给 users 表上的唯一索引判断，并发注册也不会越过检查。
+    """
+    try:
+        row = db.execute(
+            insert(User)
+            .values(
+                username=username,
+                email=email,
+                hashed_password=hashed_password,
+                is_active=True
+            )
+            .returning(User.id, User.username)
+        ).one()
+        db.commit()
+        return row
+    except IntegrityError:
+        db.rollback()
+        raise
+
+
+def _conflict_detail(error: IntegrityError) -> Optional[str]:
+    """
+    根据违反的唯一约束返回对应的错误信息，不是用户名/邮箱冲突时返回 None
+
+    PostgreSQL 提供约束名（ix_users_username、users_email_key 等），
+    SQLite 的错误信息为 "UNIQUE constraint failed: users.username"。
+    只看约束名或错误信息的第一行，不看包含用户输入的 DETAIL。
+    """
+    orig = error.orig
+    constraint = (
+        getattr(getattr(orig, "diag", None), "constraint_name", None)
+        or getattr(getattr(orig, "__cause__", None), "constraint_name", None)
+    )
+    if not constraint:
+        lines = str(orig).splitlines()
+        constraint = lines[0] if lines else ""
+    target = constraint.lower()
+    if "username" in target:
+        return "用户名已存在"
+    if "email" in target:
+        return "邮箱已被注册"
+    return None
+
+
 @router.post("/register", response_model=APIResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(
+    user_data: UserCreate,
+    request: Request,
+    db: DBSession = Depends(get_session)
+):
     """用户注册"""
-    # 检查用户名是否已存在
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="用户名已存在"
+    await limit_register(request)
+    hashed_password = await get_password_hash_async(user_data.password)
+    try:
+        new_user = await run_db(
+            db,
+            _insert_user,
+            user_data.username,
+            user_data.email,
+            hashed_password
         )
-    
-    # 检查邮箱是否已存在
-    existing_email = db.query(User).filter(User.email == user_data.email).first()
-    if existing_email:
+    except IntegrityError as e:
+        detail = _conflict_detail(e)
+        if detail is None:
+            # 其他约束失败不是用户输入的问题，按服务端错误处理
+            logger.error(f"注册失败: {str(e.orig)}")
+            raise
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="邮箱已被注册"
+            detail=detail
         )
     
-    # 创建新用户
-    hashed_password = get_password_hash(user_data.password)
-    new_user = User(
-        username=user_data.username,
-        email=user_data.email,
-        hashed_password=hashed_password,
-        is_active=True
-    )
-    
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
     return APIResponse(
         success=True,
         message="注册成功",
@@ -61,11 +116,14 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
+    background_tasks: BackgroundTasks,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_session)
 ):
     """用户登录"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    await limit_login(request, form_data.username)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -73,6 +131,10 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # 旧方案或低成本的哈希在响应返回后升级
+    if password_needs_update(user.hashed_password):
+        background_tasks.add_task(rehash_password, user.id, user.hashed_password, form_data.password)
+    
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username},
@@ -91,14 +153,32 @@ async def get_current_user_info(
     current_user: User = Depends(get_current_active_user)
 ):
     """获取当前用户信息"""
+    if FAST_JSON:
+        return fast_json(user_payload(current_user))
     return current_user
 
 
 @router.get("/verify", response_model=APIResponse)
 async def verify_token(current_user: User = Depends(get_current_active_user)):
     """验证 Token 是否有效"""
+    if FAST_JSON:
+        return fast_json({
+            "success": True,
+            "message": "Token 有效",
+            "data": {"username": current_user.username, "user_id": current_user.id},
+        })
     return APIResponse(
         success=True,
         message="Token 有效",
         data={"username": current_user.username, "user_id": current_user.id}
     )
+
+
+@router.post("/logout", response_model=APIResponse)
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_active_user)
+):
+    """退出登录：吊销当前 Token"""
+    await revoke_access_token(token)
+    return APIResponse(success=True, message="已退出登录")
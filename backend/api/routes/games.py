@@ -0,0 +1,324 @@
+"""
+游戏相关路由
+"""
+from contextlib import aclosing
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import event, func, select
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+from database import USE_ASYNC_DB, DBSession, async_engine, engine, get_session, run_db
+from models import User, GameConfig, GameAccess
+from schemas import GameConfigResponse, UserGameResponse, APIResponse
+from auth import get_current_active_user, get_current_superuser
+from utils.access_recorder import get_access_recorder
+from utils.streaming import iterate_in_threadpool_closing, ndjson_response
+from utils.ttl_cache import TTLCache
+from utils.responses import FAST_JSON, fast_json
+
+router = APIRouter(prefix="/api/games", tags=["游戏"])
+
+# "我的游戏" 缓存（按用户 ID）
+MY_GAMES_CACHE_SIZE = int(os.getenv("MY_GAMES_CACHE_SIZE", "10000"))
+MY_GAMES_CACHE_TTL = float(os.getenv("MY_GAMES_CACHE_TTL", "60"))
+my_games_cache = TTLCache(maxsize=MY_GAMES_CACHE_SIZE, ttl=MY_GAMES_CACHE_TTL)
+
+# 游戏目录缓存：两次检查版本之间的最短间隔，以及客户端缓存时间
+GAME_CATALOG_CHECK_INTERVAL = float(os.getenv("GAME_CATALOG_CHECK_INTERVAL", "5"))
+GAME_CATALOG_MAX_AGE = int(os.getenv("GAME_CATALOG_MAX_AGE", "60"))
+
+# 导出访问记录时每批读取的行数
+GAME_ACCESS_EXPORT_BATCH_SIZE = int(os.getenv("GAME_ACCESS_EXPORT_BATCH_SIZE", "1000"))
+
+
+def _catalog_version(db) -> str:
+    """目录版本：游戏数量 + 最近更新时间（增删改都会改变版本）"""
+    count, last_updated = db.query(func.count(GameConfig.id), func.max(GameConfig.updated_at)).one()
+    return f"{count}:{last_updated.isoformat() if last_updated else ''}"
+
+
+def _load_catalog(db) -> List[dict]:
+    games = (
+        db.query(GameConfig)
+        .filter(GameConfig.is_active == True)
+        .order_by(GameConfig.game_display_name)
+        .all()
+    )
+    return [GameConfigResponse.model_validate(game).model_dump(mode="json") for game in games]
+
+
+class GameCatalog:
+    """
+    预先序列化的游戏目录
+
+    只有目录版本变化时才重新查询和序列化；版本检查最多每
+    GAME_CATALOG_CHECK_INTERVAL 秒一次，本进程内修改游戏配置会立即标记为过期。
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self.version: Optional[str] = None
+        self.body = b"[]"
+        self.etag = ""
+        self.rebuilds = 0
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def mark_stale(self):
+        self._checked_at = 0.0
+
+    def _is_fresh(self) -> bool:
+        return bool(self.etag) and time.monotonic() - self._checked_at < self.check_interval
+
+    async def get(self, db: DBSession) -> Tuple[bytes, str]:
+        """返回 (响应体, ETag)"""
+        if self._is_fresh():
+            return self.body, self.etag
+
+        async with self._lock:
+            if not self._is_fresh():
+                version = await run_db(db, _catalog_version)
+                if version != self.version:
+                    games = await run_db(db, _load_catalog)
+                    self.body = json.dumps(games, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                    self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+                    self.version = version
+                    self.rebuilds += 1
+                self._checked_at = time.monotonic()
+        return self.body, self.etag
+
+
+game_catalog = GameCatalog(check_interval=GAME_CATALOG_CHECK_INTERVAL)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """解析 If-None-Match（支持多个值、弱校验和 *）"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _load_user_games(db, user_id: int) -> List[dict]:
+    """一次联表查询取出用户可访问的全部游戏，不经过 ORM 关系懒加载"""
+    rows = (
+        db.query(
+            GameConfig.id.label("game_id"),
+            GameConfig.game_name,
+            GameConfig.game_display_name,
+            GameConfig.description,
+            GameConfig.game_url,
+            GameAccess.access_count,
+            GameAccess.last_access_at,
+            GameAccess.first_access_at,
+        )
+        .join(GameAccess, GameAccess.game_id == GameConfig.id)
+        .filter(
+            GameAccess.user_id == user_id,
+            GameAccess.can_access == True,
+            GameConfig.is_active == True,
+        )
+        .order_by(GameConfig.game_display_name)
+        .all()
+    )
+    return [
+        UserGameResponse(**row._asdict()).model_dump(mode="json")
+        for row in rows
+    ]
+
+
+async def get_user_games(db: DBSession, user_id: int) -> List[dict]:
+    """读取用户可访问的游戏（带缓存）"""
+    games = my_games_cache.get(user_id)
+    if games is None:
+        games = await run_db(db, _load_user_games, user_id)
+        my_games_cache.set(user_id, games)
+    return games
+
+
+def invalidate_user_games(user_id: int):
+    """用户的游戏权限或访问记录变化后使缓存失效"""
+    my_games_cache.pop(user_id)
+
+
+# 与用户缓存相同（见 auth._track_user_changes）：flush 时只把受影响的用户记录在连接上，
+# 提交时确认、回滚时丢弃，连接归还连接池时才失效缓存，
+# 避免并发请求在提交前读到旧数据并重新写入缓存。None 表示游戏信息变化，影响目录和所有用户。
+_PENDING_GAME_INVALIDATIONS = "my_games_invalidations"
+_COMMITTED_GAME_INVALIDATIONS = "my_games_invalidations_committed"
+
+
+@event.listens_for(GameAccess, "after_insert")
+@event.listens_for(GameAccess, "after_update")
+@event.listens_for(GameAccess, "after_delete")
+def _record_access_change(mapper, connection, target):
+    connection.info.setdefault(_PENDING_GAME_INVALIDATIONS, set()).add(target.user_id)
+
+
+@event.listens_for(GameConfig, "after_insert")
+@event.listens_for(GameConfig, "after_update")
+@event.listens_for(GameConfig, "after_delete")
+def _record_game_change(mapper, connection, target):
+    connection.info.setdefault(_PENDING_GAME_INVALIDATIONS, set()).add(None)
+
+
+def _confirm_game_invalidations(connection):
+    pending = connection.info.pop(_PENDING_GAME_INVALIDATIONS, None)
+    if pending:
+        connection.info.setdefault(_COMMITTED_GAME_INVALIDATIONS, set()).update(pending)
+
+
+def _discard_game_invalidations(connection):
+    connection.info.pop(_PENDING_GAME_INVALIDATIONS, None)
+
+
+def _apply_game_invalidations(dbapi_connection, connection_record):
+    committed = connection_record.info.pop(_COMMITTED_GAME_INVALIDATIONS, None)
+    if not committed:
+        return
+    if None in committed:
+        game_catalog.mark_stale()
+        my_games_cache.clear()
+        return
+    for user_id in committed:
+        invalidate_user_games(user_id)
+
+
+def _track_game_changes(target_engine):
+    event.listen(target_engine, "commit", _confirm_game_invalidations)
+    event.listen(target_engine, "rollback", _discard_game_invalidations)
+    event.listen(target_engine, "checkin", _apply_game_invalidations)
+
+
+_track_game_changes(engine)
+if async_engine is not None:
+    _track_game_changes(async_engine.sync_engine)
+
+
+def _invalidate_flushed_users(keys):
+    """访问计数写回后使相关用户的缓存失效"""
+    for user_id in {user_id for user_id, _ in keys}:
+        invalidate_user_games(user_id)
+
+
+get_access_recorder().add_flush_listener(_invalidate_flushed_users)
+
+
+@router.get("", response_model=List[GameConfigResponse])
+async def get_game_catalog(request: Request, db: DBSession = Depends(get_session)):
+    """获取启用的游戏目录（支持 ETag / If-None-Match）"""
+    body, etag = await game_catalog.get(db)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={GAME_CATALOG_MAX_AGE}",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/mine", response_model=List[UserGameResponse])
+async def get_my_games(
+    current_user: User = Depends(get_current_active_user),
+    db: DBSession = Depends(get_session)
+):
+    """获取当前用户可访问的游戏"""
+    games = await get_user_games(db, current_user.id)
+    if FAST_JSON:
+        # 缓存中的数据已按 UserGameResponse 校验过
+        return fast_json(games)
+    return games
+
+
+@router.post("/{game_id}/access", response_model=APIResponse)
+async def record_game_access(
+    game_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: DBSession = Depends(get_session)
+):
+    """记录一次游戏访问（计数批量写回数据库）"""
+    games = await get_user_games(db, current_user.id)
+    if not any(game["game_id"] == game_id for game in games):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="没有该游戏的访问权限"
+        )
+
+    get_access_recorder().record(current_user.id, game_id)
+    return APIResponse(success=True, message="访问已记录")
+
+
+def _game_exists(db, game_id: int) -> bool:
+    return db.query(GameConfig.id).filter(GameConfig.id == game_id).first() is not None
+
+
+def _game_accesses_query(game_id: int):
+    return (
+        select(
+            GameAccess.user_id,
+            User.username,
+            GameAccess.can_access,
+            GameAccess.access_count,
+            GameAccess.first_access_at,
+            GameAccess.last_access_at,
+        )
+        .join(User, User.id == GameAccess.user_id)
+        .where(GameAccess.game_id == game_id)
+        .order_by(GameAccess.user_id)
+    )
+
+
+def _iter_game_accesses(game_id: int) -> Iterator[List[Dict[str, Any]]]:
+    """同步模式：服务端游标按批读取（在线程池中迭代）"""
+    with engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True,
+            yield_per=GAME_ACCESS_EXPORT_BATCH_SIZE
+        ).execute(_game_accesses_query(game_id))
+        for partition in result.mappings().partitions(GAME_ACCESS_EXPORT_BATCH_SIZE):
+            yield [dict(row) for row in partition]
+
+
+async def _aiter_game_accesses(game_id: int) -> AsyncIterator[Dict[str, Any]]:
+    """
+    逐行产出游戏的访问记录
+
+    使用独立的连接而不是请求的会话：依赖中的会话在响应开始发送前就会关闭。
+    客户端断开时游标和连接随迭代器关闭一起释放。
+    """
+    if USE_ASYNC_DB:
+        async with async_engine.connect() as connection:
+            result = await connection.stream(
+                _game_accesses_query(game_id),
+                execution_options={"yield_per": GAME_ACCESS_EXPORT_BATCH_SIZE}
+            )
+            async for partition in result.mappings().partitions(GAME_ACCESS_EXPORT_BATCH_SIZE):
+                for row in partition:
+                    yield dict(row)
+        return
+
+    batches = iterate_in_threadpool_closing(_iter_game_accesses(game_id))
+    async with aclosing(batches):
+        async for batch in batches:
+            for row in batch:
+                yield row
+
+
+@router.get("/{game_id}/accesses", response_class=StreamingResponse)
+async def export_game_accesses(
+    game_id: int,
+    current_user: User = Depends(get_current_superuser),
+    db: DBSession = Depends(get_session)
+):
+    """导出游戏的全部访问记录（NDJSON 流式返回，仅管理员）"""
+    if not await run_db(db, _game_exists, game_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="游戏不存在")
+    return ndjson_response(_aiter_game_accesses(game_id))
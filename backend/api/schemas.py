@@ -60,6 +60,7 @@ class GameConfigBase(BaseModel):
     db_name: str
     db_user: str
     db_password: str
+    pool_options: Optional[Dict[str, Any]] = None
     game_url: Optional[str] = None
     is_active: bool = True
 
@@ -93,6 +94,18 @@ class GameAccessResponse(BaseModel):
         from_attributes = True
 
 
+class UserGameResponse(BaseModel):
+    """用户可访问的游戏（游戏信息与访问记录合并）"""
+    game_id: int
+    game_name: str
+    game_display_name: str
+    description: Optional[str] = None
+    game_url: Optional[str] = None
+    access_count: int = 0
+    last_access_at: Optional[datetime] = None
+    first_access_at: Optional[datetime] = None
+
+
 # ========== API 响应 ==========
 class APIResponse(BaseModel):
     """通用 API 响应"""
@@ -0,0 +1,173 @@
+"""
+测试公共配置
+
+应用模块在导入时就创建引擎和各个单例，必须先设置环境变量：
+主数据库使用临时 SQLite 文件，关闭限流，降低 bcrypt 成本。
+"""
+import os
+import tempfile
+
+TEST_DIR = tempfile.mkdtemp(prefix="main_page_tests_")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'main.sqlite3')}"
+os.environ["DB_MODE"] = "sync"
+os.environ["DB_AUTO_CREATE"] = "false"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["FAST_JSON"] = "false"
+os.environ["COMPRESSION"] = "off"
+os.environ["PRINCIPAL_CACHE_REDIS_URL"] = ""
+os.environ["RATE_LIMIT_REDIS_URL"] = ""
+
+from contextlib import contextmanager  # noqa: E402
+from typing import List  # noqa: E402
+
+import pytest  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    """建好表的主数据库引擎（整个测试会话共用）"""
+    import models  # noqa: F401  先注册所有表，再建表
+    from database import Base, engine, init_db
+
+    init_db()
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(db_engine):
+    """主数据库会话；测试结束后清空所有表和进程内缓存"""
+    from database import Base, SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with db_engine.begin() as connection:
+            for table in reversed(Base.metadata.sorted_tables):
+                connection.execute(table.delete())
+        _clear_caches()
+
+
+def _clear_caches():
+    from auth import principal_cache, token_cache
+    from routes.games import game_catalog, my_games_cache
+
+    principal_cache.clear()
+    if token_cache is not None:
+        token_cache.clear()
+    my_games_cache.clear()
+    game_catalog.mark_stale()
+
+
+@pytest.fixture
+def client(db):
+    """
+    不触发 startup/shutdown 的测试客户端
+
+    后台任务（访问计数写回、就绪探测、吊销列表同步）不启动，
+    不会在统计 SQL 语句数时混入额外的查询。
+    """
+    from fastapi.testclient import TestClient
+    from main import app
+
+    return TestClient(app)
+
+
+class StatementCounter:
+    """记录引擎上执行的 SQL 语句"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _before_cursor_execute(self, connection, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_statements(engine):
+    """在 with 块内统计 before_cursor_execute 事件"""
+    counter = StatementCounter()
+    event.listen(engine, "before_cursor_execute", counter._before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter._before_cursor_execute)
+
+
+@pytest.fixture
+def statement_counter(db_engine):
+    """count_statements(engine) 的 fixture 形式，默认统计主数据库"""
+    return lambda engine=db_engine: count_statements(engine)
+
+
+@pytest.fixture
+def make_user(db):
+    """创建用户，返回 User 对象"""
+    from auth import get_password_hash
+    from models import User
+
+    hashed = get_password_hash("password123")
+
+    def _make_user(username: str = "alice", **fields) -> User:
+        user = User(
+            username=username,
+            email=fields.pop("email", f"{username}@example.com"),
+            hashed_password=fields.pop("hashed_password", hashed),
+            **fields
+        )
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return user
+
+    return _make_user
+
+
+@pytest.fixture
+def auth_headers():
+    """为用户名签发 Token，返回 Authorization 请求头"""
+    from auth import create_access_token
+
+    return lambda username: {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
+
+
+@pytest.fixture
+def make_sqlite_game(tmp_path):
+    """
+    创建一个 SQLite 游戏数据库文件（scores 表），返回对应的 GameConfig（不写入主数据库）
+
+    游戏名带上临时目录名，不同测试不会共用连接池注册表中的引擎。
+    """
+    import sqlite3
+
+    from models import GameConfig
+    from utils.connector_registry import get_registry
+
+    def _make_sqlite_game(name: str, rows: int = 3) -> GameConfig:
+        path = tmp_path / f"{name}.sqlite3"
+        connection = sqlite3.connect(path)
+        with connection:
+            connection.execute("CREATE TABLE scores (id INTEGER PRIMARY KEY, player TEXT, score INTEGER)")
+            connection.executemany(
+                "INSERT INTO scores (id, player, score) VALUES (?, ?, ?)",
+                [(i, f"player_{i}", i * 10) for i in range(rows)]
+            )
+        connection.close()
+        return GameConfig(
+            game_name=f"{tmp_path.name}_{name}", game_display_name=name,
+            db_type="sqlite", db_host="", db_port=0, db_name=str(path),
+            db_user="", db_password=""
+        )
+
+    yield _make_sqlite_game
+    get_registry().close_all()
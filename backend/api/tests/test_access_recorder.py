@@ -0,0 +1,69 @@
+"""
+访问计数批量写回：只累加已有记录，不授予权限
+"""
+from datetime import datetime
+
+from models import GameAccess, GameConfig
+from utils.access_recorder import AccessRecorder
+
+
+def _make_game(db, name: str) -> GameConfig:
+    game = GameConfig(
+        game_name=name, game_display_name=name, db_type="sqlite",
+        db_host="", db_port=0, db_name=f"{name}.sqlite3", db_user="", db_password=""
+    )
+    db.add(game)
+    db.commit()
+    return game
+
+
+def test_flush_accumulates_existing_access(db, db_engine, make_user):
+    user = make_user()
+    game = _make_game(db, "chess")
+    db.add(GameAccess(user_id=user.id, game_id=game.id, access_count=5, can_access=True))
+    db.commit()
+
+    recorder = AccessRecorder(db_engine)
+    last = datetime(2026, 1, 2, 3, 4, 5)
+    for _ in range(3):
+        recorder.record(user.id, game.id, at=last)
+    assert recorder.flush() == 3
+
+    db.expire_all()
+    access = db.query(GameAccess).filter_by(user_id=user.id, game_id=game.id).one()
+    assert access.access_count == 8
+    assert access.last_access_at == last
+    assert recorder.stats()["orphaned"] == 0
+
+
+def test_flush_does_not_grant_access(db, db_engine, make_user):
+    user = make_user()
+    granted = _make_game(db, "chess")
+    not_granted = _make_game(db, "go")
+    db.add(GameAccess(user_id=user.id, game_id=granted.id, access_count=0, can_access=True))
+    db.commit()
+
+    recorder = AccessRecorder(db_engine)
+    recorder.record(user.id, granted.id)
+    # 例如权限在记录之后、写回之前被删除
+    recorder.record(user.id, not_granted.id)
+    recorder.flush()
+
+    db.expire_all()
+    assert db.query(GameAccess).filter_by(user_id=user.id, game_id=not_granted.id).count() == 0
+    assert db.query(GameAccess).filter_by(user_id=user.id, game_id=granted.id).one().access_count == 1
+    assert recorder.stats()["orphaned"] == 1
+    assert recorder.pending == 0
+
+
+def test_flush_failure_restores_pending():
+    from sqlalchemy import create_engine
+
+    broken_engine = create_engine("sqlite:////nonexistent-dir/main.sqlite3")
+    recorder = AccessRecorder(broken_engine)
+    recorder.record(1, 1)
+    recorder.record(1, 1)
+
+    assert recorder.flush() == 0
+    assert recorder.pending == 1
+    assert recorder.stats()["failed_flushes"] == 1
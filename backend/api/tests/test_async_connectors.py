@@ -0,0 +1,175 @@
+"""
+异步游戏数据库连接器：aiosqlite 和 mongomock-motor
+"""
+import asyncio
+import threading
+
+import mongomock_motor
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from models import GameConfig
+from utils import async_db_connector
+from utils.async_db_connector import AsyncMongoDBConnector, create_async_connector, wait_for_disposals
+from utils.connector_registry import get_registry
+from utils.db_connector import _registry_key
+
+QUERY = "SELECT player, score FROM scores WHERE score >= :min_score ORDER BY id"
+
+
+def test_sqlite_execute_and_named_statements(make_sqlite_game):
+    config = make_sqlite_game("async_sqlite", rows=5)
+
+    async def scenario():
+        connector = create_async_connector(config)
+        assert await connector.test_connection()
+
+        rows = await connector.execute(QUERY, {"min_score": 30})
+        assert rows == [{"player": "player_3", "score": 30}, {"player": "player_4", "score": 40}]
+
+        inserted = await connector.execute_many(
+            "INSERT INTO scores (id, player, score) VALUES (:id, :player, :score)",
+            [{"id": 10 + i, "player": f"new_{i}", "score": 100 + i} for i in range(3)]
+        )
+        assert inserted == 3
+
+        connector.register_statement("top", "SELECT player FROM scores WHERE score >= :min_score ORDER BY score DESC")
+        rows = await connector.execute_named("top", {"min_score": 100})
+        assert [row["player"] for row in rows] == ["new_2", "new_1", "new_0"]
+        with pytest.raises(KeyError):
+            await connector.execute_named("missing")
+
+        await connector.disconnect()
+        await wait_for_disposals()
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_aiter_query_streams_in_batches(make_sqlite_game):
+    config = make_sqlite_game("async_stream", rows=25)
+
+    async def scenario():
+        connector = create_async_connector(config)
+        rows = [row async for row in connector.aiter_query(
+            "SELECT id FROM scores WHERE score >= :min_score ORDER BY id", 4, params={"min_score": 0}
+        )]
+        await wait_for_disposals()
+        return rows
+
+    assert [row["id"] for row in asyncio.run(scenario())] == list(range(25))
+
+
+def test_evicted_engine_is_disposed_inside_event_loop(make_sqlite_game):
+    config = make_sqlite_game("async_dispose")
+    key = _registry_key(config, "sqlalchemy_async")
+
+    async def scenario():
+        connector = create_async_connector(config)
+        await connector.execute(QUERY, {"min_score": 0})
+        pool = connector.engine.sync_engine.pool
+        assert pool.checkedin() == 1
+
+        get_registry().invalidate(key)
+        # 关闭任务被保存在模块级集合中，不会在完成前被回收
+        assert len(async_db_connector._pending_disposals) == 1
+        await wait_for_disposals()
+        assert not async_db_connector._pending_disposals
+        return pool
+
+    assert asyncio.run(scenario()).checkedin() == 0
+
+
+def test_evicted_engine_is_disposed_on_owner_loop_from_another_thread(make_sqlite_game, monkeypatch):
+    config = make_sqlite_game("async_dispose_thread")
+    key = _registry_key(config, "sqlalchemy_async")
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    dispose_loops = []
+    original_dispose = AsyncEngine.dispose
+
+    async def recording_dispose(self, close=True):
+        dispose_loops.append(asyncio.get_running_loop())
+        await original_dispose(self, close)
+
+    monkeypatch.setattr(AsyncEngine, "dispose", recording_dispose)
+    try:
+        connector = create_async_connector(config)
+        asyncio.run_coroutine_threadsafe(connector.execute(QUERY, {"min_score": 0}), loop).result()
+        pool = connector.engine.sync_engine.pool
+        assert pool.checkedin() == 1
+
+        # 在其他线程中淘汰（如线程池中的同步借用触发 LRU 淘汰）
+        get_registry().invalidate(key)
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result()
+        asyncio.run_coroutine_threadsafe(wait_for_disposals(), loop).result()
+
+        assert dispose_loops == [loop]
+        assert pool.checkedin() == 0
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def test_evicted_engine_with_closed_loop_is_dropped_without_closing(make_sqlite_game):
+    config = make_sqlite_game("async_dispose_no_loop")
+    key = _registry_key(config, "sqlalchemy_async")
+    connector = create_async_connector(config)
+
+    asyncio.run(connector.execute(QUERY, {"min_score": 0}))
+    engine = connector.engine
+    old_pool = engine.sync_engine.pool
+    assert old_pool.checkedin() == 1
+
+    # 所属事件循环已关闭，不能在其他事件循环中关闭连接，只丢弃连接池
+    get_registry().invalidate(key)
+    assert engine.sync_engine.pool is not old_pool
+    assert key not in dict(get_registry().resources())
+    assert not async_db_connector._pending_disposals
+
+
+@pytest.fixture
+def mongo_game(monkeypatch, tmp_path):
+    """使用 mongomock-motor 替代 motor 客户端的 MongoDB 游戏配置"""
+    client = mongomock_motor.AsyncMongoMockClient()
+    monkeypatch.setattr(AsyncMongoDBConnector, "_create_client", lambda self: client)
+    config = GameConfig(
+        game_name=f"{tmp_path.name}_mongo", game_display_name="mongo",
+        db_type="mongodb", db_host="localhost", db_port=27017, db_name="game",
+        db_user="", db_password=""
+    )
+    asyncio.run(client["game"]["scores"].insert_many([
+        {"player": f"player_{i}", "score": i * 10} for i in range(6)
+    ]))
+    yield config
+    get_registry().close_all()
+
+
+def test_mongo_execute_query_and_stream(mongo_game):
+    async def scenario():
+        connector = create_async_connector(mongo_game)
+        assert await connector.test_connection()
+
+        documents = await connector.execute_query({"score": {"$gte": 30}}, "scores")
+        assert [document["player"] for document in documents] == ["player_3", "player_4", "player_5"]
+
+        streamed = [document async for document in connector.aiter_query({}, "scores", batch_size=2)]
+        assert len(streamed) == 6
+
+    asyncio.run(scenario())
+
+
+def test_mongo_rejects_sql_methods(mongo_game):
+    connector = create_async_connector(mongo_game)
+
+    async def scenario():
+        for call in (connector.execute("SELECT 1"), connector.execute_many("SELECT 1", [{}]),
+                     connector.execute_named("top")):
+            with pytest.raises(NotImplementedError):
+                await call
+        with pytest.raises(NotImplementedError):
+            connector.register_statement("top", "SELECT 1")
+
+    asyncio.run(scenario())
@@ -0,0 +1,156 @@
+"""
+注册 / 登录 / me / verify / 退出登录：每个请求执行的 SQL 语句数和冲突处理
+"""
+import asyncio
+import threading
+import time
+
+from sqlalchemy.exc import IntegrityError
+
+import auth
+from routes.auth import _conflict_detail
+from utils.password_hasher import PasswordHasher
+
+
+def _register(client, username: str, email: str = None):
+    return client.post("/api/auth/register", json={
+        "username": username,
+        "email": email or f"{username}@example.com",
+        "password": "password123",
+    })
+
+
+def test_register_runs_one_statement(client, statement_counter):
+    with statement_counter() as counter:
+        response = _register(client, "alice")
+
+    assert response.status_code == 201, response.text
+    assert response.json()["data"]["username"] == "alice"
+    # 单条 INSERT ... RETURNING，不再先查用户名和邮箱
+    assert counter.count == 1, counter.statements
+    assert counter.statements[0].lstrip().upper().startswith("INSERT")
+
+
+def test_login_runs_one_statement(client, make_user, statement_counter):
+    make_user("alice")
+
+    with statement_counter() as counter:
+        response = client.post("/api/auth/login", data={"username": "alice", "password": "password123"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["access_token"]
+    assert counter.count == 1, counter.statements
+
+
+def test_login_wrong_password(client, make_user, statement_counter):
+    make_user("alice")
+
+    with statement_counter() as counter:
+        response = client.post("/api/auth/login", data={"username": "alice", "password": "wrong-password"})
+
+    assert response.status_code == 401
+    assert counter.count == 1, counter.statements
+
+
+def test_login_returns_503_when_hasher_is_saturated(client, make_user, monkeypatch):
+    make_user("alice")
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    monkeypatch.setattr(auth, "password_hasher", hasher)
+
+    # 另一个线程占满工作池（唯一的名额正在执行）
+    release = threading.Event()
+    occupant = threading.Thread(target=lambda: asyncio.run(hasher.run(release.wait, 5)))
+    occupant.start()
+    try:
+        deadline = time.monotonic() + 5
+        while hasher.pending < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        response = client.post("/api/auth/login", data={"username": "alice", "password": "password123"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert hasher.rejected == 1
+    finally:
+        release.set()
+        occupant.join()
+        hasher.shutdown()
+
+    response = client.post("/api/auth/login", data={"username": "alice", "password": "password123"})
+    assert response.status_code == 200, response.text
+
+
+def test_register_duplicate_username_and_email(client):
+    assert _register(client, "alice").status_code == 201
+
+    response = _register(client, "alice", email="other@example.com")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "用户名已存在"
+
+    response = _register(client, "bob", email="alice@example.com")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "邮箱已被注册"
+
+
+def _integrity_error(message: str) -> IntegrityError:
+    return IntegrityError("INSERT INTO users ...", {}, Exception(message))
+
+
+def test_conflict_detail_classifies_constraints():
+    assert _conflict_detail(_integrity_error("UNIQUE constraint failed: users.username")) == "用户名已存在"
+    assert _conflict_detail(_integrity_error("UNIQUE constraint failed: users.email")) == "邮箱已被注册"
+    assert _conflict_detail(_integrity_error(
+        'duplicate key value violates unique constraint "ix_users_email"\n'
+        "DETAIL:  Key (email)=(username@example.com) already exists."
+    )) == "邮箱已被注册"
+
+
+def test_conflict_detail_unknown_constraint():
+    assert _conflict_detail(_integrity_error('duplicate key value violates unique constraint "users_pkey"')) is None
+    assert _conflict_detail(_integrity_error("NOT NULL constraint failed: users.hashed_password")) is None
+
+
+def _warm_token(client, make_user, auth_headers, username: str = "alice"):
+    """登录用户并请求一次 /me，使用户缓存命中"""
+    make_user(username)
+    headers = auth_headers(username)
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+    return headers
+
+
+def test_me_runs_no_statements_on_warm_cache(client, make_user, auth_headers, statement_counter):
+    headers = _warm_token(client, make_user, auth_headers)
+
+    with statement_counter() as counter:
+        response = client.get("/api/auth/me", headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["username"] == "alice"
+    assert counter.count == 0, counter.statements
+
+
+def test_verify_runs_no_statements_on_warm_cache(client, make_user, auth_headers, statement_counter):
+    headers = _warm_token(client, make_user, auth_headers)
+
+    with statement_counter() as counter:
+        response = client.get("/api/auth/verify", headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["data"]["username"] == "alice"
+    assert counter.count == 0, counter.statements
+
+
+def test_logout_runs_one_statement(client, make_user, auth_headers, statement_counter):
+    headers = _warm_token(client, make_user, auth_headers)
+
+    with statement_counter() as counter:
+        response = client.post("/api/auth/logout", headers=headers)
+
+    assert response.status_code == 200, response.text
+    # 只写入吊销记录，用户来自缓存
+    assert counter.count == 1, counter.statements
+    assert counter.statements[0].lstrip().upper().startswith("INSERT")
+
+    # 吊销后的 Token 在内存中被拒绝，不查询数据库
+    with statement_counter() as counter:
+        assert client.get("/api/auth/me", headers=headers).status_code == 401
+    assert counter.count == 0, counter.statements
@@ -0,0 +1,144 @@
+"""
+游戏数据库连接池注册表：借用、重建和空闲释放
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.connector_registry import ConnectorRegistry, get_registry
+from utils.db_connector import _registry_key, create_connector
+
+
+class _Resource:
+    def __init__(self, name: str):
+        self.name = name
+        self.closed = False
+
+
+def _entry_args(name: str, disposed: list, version=1, cost=10):
+    def dispose(resource):
+        resource.closed = True
+        disposed.append(resource.name)
+
+    return dict(key=name, version=version, factory=lambda: _Resource(name), cost=cost, dispose=dispose)
+
+
+def test_leased_resource_is_not_evicted_for_budget():
+    registry = ConnectorRegistry(max_connections=20)
+    disposed = []
+
+    with registry.lease(**_entry_args("a", disposed)) as resource:
+        registry.acquire(**_entry_args("b", disposed))
+        # 预算不足时跳过借用中的 a，淘汰空闲的 b
+        registry.acquire(**_entry_args("c", disposed))
+        assert disposed == ["b"]
+        assert not resource.closed
+
+
+def test_rebuild_while_leased_defers_dispose():
+    registry = ConnectorRegistry()
+    disposed = []
+
+    with registry.lease(**_entry_args("a", disposed, version=1)) as old:
+        new = registry.acquire(**_entry_args("a", disposed, version=2))
+        assert new is not old
+        assert not old.closed
+        assert registry.stats()["retired"] == 1
+        # 被替换的连接池在归还前仍计入预算
+        assert registry.total_cost == 20
+
+    assert old.closed
+    assert registry.stats()["retired"] == 0
+    assert registry.total_cost == 10
+
+
+def test_older_version_reuses_current_resource():
+    registry = ConnectorRegistry()
+    disposed = []
+
+    current = registry.acquire(**_entry_args("a", disposed, version=2))
+    # 持有旧配置快照的请求不会把连接池重建回旧配置
+    assert registry.acquire(**_entry_args("a", disposed, version=1)) is current
+    assert registry.acquire(**_entry_args("a", disposed, version=None)) is current
+    assert registry.acquire(**_entry_args("a", disposed, version=2)) is current
+    assert disposed == []
+    assert registry.rebuilt == 0
+
+    newer = registry.acquire(**_entry_args("a", disposed, version=3))
+    assert newer is not current
+    assert disposed == ["a"]
+    assert registry.rebuilt == 1
+
+
+def test_evict_idle_skips_leased_and_busy_resources():
+    registry = ConnectorRegistry()
+    disposed = []
+    busy = {"c"}
+
+    registry.acquire(**_entry_args("a", disposed))
+    registry.acquire(**_entry_args("c", disposed), is_idle=lambda resource: resource.name not in busy)
+    with registry.lease(**_entry_args("b", disposed)):
+        time.sleep(0.02)
+        assert registry.evict_idle(0.01) == 1
+        assert disposed == ["a"]
+
+    busy.clear()
+    time.sleep(0.02)
+    assert registry.evict_idle(0.01) == 2
+    assert sorted(disposed) == ["a", "b", "c"]
+
+
+def test_start_schedules_idle_eviction():
+    registry = ConnectorRegistry()
+    disposed = []
+    registry.acquire(**_entry_args("a", disposed))
+
+    async def scenario():
+        registry.start(max_idle_seconds=0.01, interval=0.02)
+        await asyncio.sleep(0.1)
+        await registry.stop()
+
+    asyncio.run(scenario())
+    assert disposed == ["a"]
+    assert registry.stats()["entries"] == 0
+
+
+def test_connector_follows_rebuilt_engine(make_sqlite_game):
+    config = make_sqlite_game("rebuild")
+    config.updated_at = datetime(2026, 1, 1)
+    connector = create_connector(config)
+    first = connector.engine
+    assert connector.execute("SELECT COUNT(*) AS n FROM scores") == [{"n": 3}]
+
+    # 配置更新后同一个连接器使用新的引擎，而不是已释放的旧引擎
+    config.updated_at += timedelta(minutes=1)
+    assert connector.execute("SELECT COUNT(*) AS n FROM scores") == [{"n": 3}]
+    assert connector.engine is not first
+    assert first.pool.checkedin() == 0
+
+
+def test_sqlite_engine_with_checked_out_connection_is_busy(make_sqlite_game):
+    config = make_sqlite_game("busy")
+    connector = create_connector(config)
+    rows = connector.iter_query("SELECT id FROM scores ORDER BY id", batch_size=1)
+    assert next(rows) == {"id": 0}
+
+    # 游标未读完时引擎处于借用中，不会被释放
+    time.sleep(0.02)
+    assert get_registry().evict_idle(0.01) == 0
+    rows.close()
+    time.sleep(0.02)
+    assert get_registry().evict_idle(0.01) == 1
+    assert _registry_key(config, "sqlalchemy") not in dict(get_registry().resources())
+
+
+def test_iter_query_params_are_keyword_only(make_sqlite_game):
+    config = make_sqlite_game("stream", rows=5)
+    connector = create_connector(config)
+
+    rows = list(connector.iter_query("SELECT id FROM scores WHERE id >= :min_id ORDER BY id", 2, params={"min_id": 3}))
+    assert rows == [{"id": 3}, {"id": 4}]
+    with pytest.raises(TypeError):
+        list(connector.iter_query("SELECT id FROM scores", {"min_id": 3}, 2))
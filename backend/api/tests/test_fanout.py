@@ -0,0 +1,107 @@
+"""
+多游戏数据库并发查询（SQLite 游戏库）
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+
+from utils import fanout
+from utils.fanout import fan_out_query
+
+QUERY = "SELECT player, score FROM scores WHERE score >= :min_score ORDER BY id"
+
+
+def test_fan_out_returns_rows_per_game(make_sqlite_game):
+    configs = [make_sqlite_game("alpha", rows=3), make_sqlite_game("beta", rows=5)]
+
+    results = asyncio.run(fan_out_query(configs, QUERY, params={"min_score": 10}))
+
+    assert [result.game_name for result in results] == [config.game_name for config in configs]
+    assert all(result.ok for result in results)
+    assert [len(result.rows) for result in results] == [2, 4]
+    assert results[0].rows[0] == {"player": "player_1", "score": 10}
+
+
+def test_fan_out_partial_failure(make_sqlite_game, tmp_path):
+    good = make_sqlite_game("good")
+    # 数据库文件存在但没有 scores 表
+    broken = make_sqlite_game("broken")
+    with sqlite3.connect(broken.db_name) as connection:
+        connection.execute("DROP TABLE scores")
+    unsupported = make_sqlite_game("unsupported")
+    unsupported.db_type = "oracle"
+
+    results = asyncio.run(fan_out_query([good, broken, unsupported], QUERY, params={"min_score": 0}))
+
+    assert results[0].ok and len(results[0].rows) == 3
+    assert not results[1].ok and not results[1].timed_out
+    assert "scores" in results[1].error
+    assert not results[2].ok and "oracle" in results[2].error
+
+
+def test_fan_out_timeout_does_not_block_other_games(make_sqlite_game):
+    fast = make_sqlite_game("fast")
+    slow = make_sqlite_game("slow")
+
+    # 另一个连接持有排他锁，slow 上的查询会一直等待锁
+    blocker = sqlite3.connect(slow.db_name)
+    blocker.execute("BEGIN EXCLUSIVE")
+    try:
+        started = time.perf_counter()
+        results = asyncio.run(fan_out_query([slow, fast], QUERY, params={"min_score": 0}, timeout=0.3))
+        elapsed = time.perf_counter() - started
+    finally:
+        blocker.rollback()
+        blocker.close()
+
+    assert results[0].timed_out and not results[0].ok
+    assert results[0].rows is None
+    assert results[1].ok and len(results[1].rows) == 3
+    assert elapsed < 2
+
+
+def test_fan_out_respects_concurrency_cap(make_sqlite_game, monkeypatch):
+    configs = [make_sqlite_game(f"game_{i}") for i in range(6)]
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+    run_query = fanout._run_query
+
+    def tracked_run_query(*args, **kwargs):
+        nonlocal active, max_active
+        with lock:
+            active += 1
+            max_active = max(max_active, active)
+        try:
+            time.sleep(0.05)
+            return run_query(*args, **kwargs)
+        finally:
+            with lock:
+                active -= 1
+
+    monkeypatch.setattr(fanout, "_run_query", tracked_run_query)
+
+    results = asyncio.run(fan_out_query(configs, QUERY, params={"min_score": 0}, concurrency=2))
+
+    assert all(result.ok for result in results)
+    assert max_active == 2
+
+
+def test_fan_out_rejects_sql_for_mongodb(make_sqlite_game, monkeypatch):
+    sqlite_game = make_sqlite_game("sql")
+    mongo_game = make_sqlite_game("mongo")
+    mongo_game.db_type = "mongodb"
+    calls = []
+    monkeypatch.setattr(fanout, "_run_query", lambda config, *args: calls.append(config.game_name) or [])
+
+    results = asyncio.run(fan_out_query([sqlite_game, mongo_game], QUERY, params={"min_score": 0}))
+    # SQL 查询在提交到线程池之前就被拒绝
+    assert calls == [sqlite_game.game_name]
+    assert not results[1].ok and "查询字典" in results[1].error
+
+    query = {"sqlite": QUERY, "mongodb": {"score": {"$gte": 0}}}
+    results = asyncio.run(fan_out_query([mongo_game], query, params={"min_score": 0}, collection="scores"))
+    assert "params" in results[0].error
+    results = asyncio.run(fan_out_query([mongo_game], query))
+    assert "collection" in results[0].error
@@ -0,0 +1,83 @@
+"""
+游戏目录：ETag / If-None-Match 和按目录版本重建
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from models import GameConfig
+from routes.games import game_catalog
+
+
+def _add_games(db, count: int = 2):
+    games = [
+        GameConfig(
+            game_name=f"catalog_{i}", game_display_name=f"Catalog {i}",
+            db_type="sqlite", db_host="", db_port=0, db_name=f"catalog_{i}.sqlite3",
+            db_user="", db_password=""
+        )
+        for i in range(count)
+    ]
+    db.add_all(games)
+    db.commit()
+    return games
+
+
+def test_if_none_match_returns_304(db, client, statement_counter):
+    _add_games(db)
+    response = client.get("/api/games")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert [game["game_name"] for game in response.json()] == ["catalog_0", "catalog_1"]
+
+    # 版本检查间隔内直接返回预先序列化的目录，不查询数据库
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        with statement_counter() as counter:
+            response = client.get("/api/games", headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304, if_none_match
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+        assert counter.count == 0, counter.statements
+
+    response = client.get("/api/games", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == etag
+
+
+def test_orm_update_rebuilds_catalog(db, client):
+    games = _add_games(db)
+    etag = client.get("/api/games").headers["ETag"]
+
+    games[0].game_display_name = "Renamed"
+    db.commit()
+
+    response = client.get("/api/games", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert [game["game_display_name"] for game in response.json()] == ["Catalog 1", "Renamed"]
+
+
+def test_version_change_from_another_worker_rebuilds_catalog(db, db_engine, client):
+    _add_games(db)
+    etag = client.get("/api/games").headers["ETag"]
+    rebuilds = game_catalog.rebuilds
+
+    # 版本检查到期、目录版本未变：不重新序列化
+    game_catalog.mark_stale()
+    assert client.get("/api/games").headers["ETag"] == etag
+    assert game_catalog.rebuilds == rebuilds
+
+    # 其他 worker 通过 Core 语句修改（本进程没有 ORM 事件），max(updated_at) 变化
+    with db_engine.begin() as connection:
+        connection.execute(
+            update(GameConfig)
+            .where(GameConfig.game_name == "catalog_1")
+            .values(is_active=False, updated_at=datetime.utcnow() + timedelta(seconds=1))
+        )
+    assert client.get("/api/games").headers["ETag"] == etag
+
+    game_catalog.mark_stale()
+    response = client.get("/api/games")
+    assert response.headers["ETag"] != etag
+    assert [game["game_name"] for game in response.json()] == ["catalog_0"]
+    assert game_catalog.rebuilds == rebuilds + 1
@@ -0,0 +1,63 @@
+"""
+就绪探测：粗粒度错误和日志
+"""
+import asyncio
+import logging
+
+from models import GameConfig
+from utils.health import MAIN_DB_PROBE, PROBE_ERROR_FAILED, PROBE_ERROR_UNSUPPORTED, HealthMonitor
+
+
+def _add_game(db, config: GameConfig) -> GameConfig:
+    db.add(config)
+    db.commit()
+    return config
+
+
+def test_probe_reports_coarse_errors(db, make_sqlite_game, tmp_path, caplog):
+    good = _add_game(db, make_sqlite_game("healthy"))
+    secret_path = str(tmp_path / "missing-dir" / "secret-host.sqlite3")
+    _add_game(db, GameConfig(
+        game_name="broken", game_display_name="broken", db_type="sqlite",
+        db_host="", db_port=0, db_name=secret_path, db_user="", db_password=""
+    ))
+    _add_game(db, GameConfig(
+        game_name="legacy", game_display_name="legacy", db_type="oracle",
+        db_host="db.internal", db_port=1521, db_name="legacy", db_user="scott", db_password="tiger"
+    ))
+    monitor = HealthMonitor(timeout=5)
+
+    with caplog.at_level(logging.INFO, logger="utils"):
+        asyncio.run(monitor.probe_once())
+        asyncio.run(monitor.probe_once())
+
+    snapshot = monitor.snapshot()
+    assert snapshot["status"] == "degraded"
+    probes = snapshot["probes"]
+    assert probes[MAIN_DB_PROBE]["ok"]
+    assert probes[f"game:{good.game_name}"]["ok"]
+    assert probes["game:broken"]["error"] == PROBE_ERROR_FAILED
+    assert probes["game:legacy"]["error"] == PROBE_ERROR_UNSUPPORTED
+    assert "secret-host" not in str(snapshot)
+
+    # 详细错误只在状态变为失败时记录一次，成功的探测不记录连接日志
+    failures = [record for record in caplog.records if "就绪探测失败 game:broken" in record.getMessage()]
+    assert len(failures) == 1
+    assert "unable to open" in failures[0].getMessage()
+    assert not [record for record in caplog.records if "成功连接" in record.getMessage()]
+
+
+def test_ready_endpoint_returns_snapshot(client, monkeypatch):
+    from utils.health import health_monitor
+
+    monkeypatch.setattr(health_monitor, "results", {})
+    response = client.get("/api/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "not_ready"
+
+    asyncio.run(health_monitor.probe_once())
+    response = client.get("/api/ready")
+    assert response.status_code == 200
+    assert response.json()["probes"][MAIN_DB_PROBE] == {
+        **response.json()["probes"][MAIN_DB_PROBE], "ok": True, "error": None
+    }
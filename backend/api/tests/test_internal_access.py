@@ -0,0 +1,41 @@
+"""
+内部运维端点的访问控制
+"""
+import pytest
+
+from utils import internal_access
+
+TOKEN = "internal-test-token"
+
+
+@pytest.fixture
+def internal_token(monkeypatch):
+    monkeypatch.setattr(internal_access, "INTERNAL_API_TOKEN", TOKEN)
+    return TOKEN
+
+
+def test_metrics_hidden_without_configured_token(client, monkeypatch):
+    monkeypatch.setattr(internal_access, "INTERNAL_API_TOKEN", "")
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/metrics", headers={"Authorization": "Bearer "}).status_code == 404
+    assert client.get("/api/pools").status_code == 404
+
+
+def test_metrics_requires_internal_token(client, internal_token):
+    response = client.get("/metrics")
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "Bearer"
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    response = client.get("/metrics", headers={"Authorization": f"Bearer {internal_token}"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE" in response.text
+
+
+def test_pools_requires_internal_token(client, internal_token):
+    assert client.get("/api/pools").status_code == 401
+
+    response = client.get("/api/pools", headers={"Authorization": f"Bearer {internal_token}"})
+    assert response.status_code == 200
+    assert response.json()["pools"][0]["pool"] == "main"
@@ -0,0 +1,66 @@
+"""
+数据库迁移：新库升级到最新版本，以及引入迁移之前的旧库补齐结构
+"""
+import pytest
+from alembic import command
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.orm import Session
+
+from database import Base
+from migrate import INITIAL_REVISION, alembic_config
+from models import GameConfig
+
+
+@pytest.fixture
+def migration_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.sqlite3'}")
+    yield engine
+    engine.dispose()
+
+
+def _upgrade(engine, target: str = "head"):
+    config = alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, target)
+
+
+def test_upgrade_fresh_database(migration_engine):
+    _upgrade(migration_engine)
+
+    inspector = inspect(migration_engine)
+    assert "pool_options" in {c["name"] for c in inspector.get_columns("game_configs")}
+    assert "uq_game_accesses_user_game" in {c["name"] for c in inspector.get_unique_constraints("game_accesses")}
+    assert "revoked_tokens" in inspector.get_table_names()
+
+
+def test_upgrade_adds_pool_options_to_existing_game_configs(migration_engine):
+    _upgrade(migration_engine, "0001_initial_schema")
+    with migration_engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO game_configs (game_name, game_display_name, db_type, db_host, db_port, db_name, db_user, db_password)"
+            " VALUES ('chess', 'Chess', 'postgresql', 'db', 5432, 'chess', 'u', 'p')"
+        ))
+
+    _upgrade(migration_engine)
+
+    with Session(migration_engine) as session:
+        game = session.execute(select(GameConfig)).scalar_one()
+    assert game.game_name == "chess"
+    assert game.pool_options is None
+
+
+def test_upgrade_database_created_by_create_all(migration_engine):
+    # DB_AUTO_CREATE 建好的库：migrate.py 先标记为初始版本，再升级，已存在的结构不重复创建
+    Base.metadata.create_all(bind=migration_engine)
+    config = alembic_config()
+    with migration_engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.stamp(config, INITIAL_REVISION)
+
+    _upgrade(migration_engine)
+
+    inspector = inspect(migration_engine)
+    assert {"ix_revoked_tokens_expires_at", "ix_revoked_tokens_revoked_at"} <= {
+        i["name"] for i in inspector.get_indexes("revoked_tokens")
+    }
@@ -0,0 +1,116 @@
+"""
+/api/games/mine：一次联表查询取出用户的全部游戏
+"""
+import pytest
+
+from models import GameAccess, GameConfig
+from routes.games import _load_user_games, game_catalog, my_games_cache
+
+
+def _make_games(db, user, count: int, can_access: bool = True):
+    games = [
+        GameConfig(
+            game_name=f"game_{i}", game_display_name=f"Game {i:03d}",
+            db_type="sqlite", db_host="", db_port=0, db_name=f"game_{i}.sqlite3",
+            db_user="", db_password="", game_url=f"https://games.example.com/{i}"
+        )
+        for i in range(count)
+    ]
+    db.add_all(games)
+    db.flush()
+    db.add_all([
+        GameAccess(user_id=user.id, game_id=game.id, access_count=i, can_access=can_access)
+        for i, game in enumerate(games)
+    ])
+    db.commit()
+    return games
+
+
+@pytest.mark.parametrize("game_count", [1, 5, 25])
+def test_load_user_games_runs_one_statement(db, make_user, statement_counter, game_count):
+    user = make_user()
+    user_id = user.id
+    _make_games(db, user, game_count)
+    db.expire_all()
+
+    with statement_counter() as counter:
+        games = _load_user_games(db, user_id)
+
+    assert len(games) == game_count
+    assert counter.count == 1, counter.statements
+
+
+def test_my_games_endpoint_queries_once_per_user(db, client, make_user, auth_headers, statement_counter):
+    user = make_user()
+    _make_games(db, user, 10)
+    headers = auth_headers(user.username)
+
+    # 第一次请求加载用户（主体缓存未命中）和游戏列表
+    with statement_counter() as counter:
+        response = client.get("/api/games/mine", headers=headers)
+    assert response.status_code == 200
+    assert [game["game_name"] for game in response.json()] == [f"game_{i}" for i in range(10)]
+    assert counter.count == 2, counter.statements
+
+    # 之后的请求全部命中缓存
+    with statement_counter() as counter:
+        response = client.get("/api/games/mine", headers=headers)
+    assert response.status_code == 200
+    assert counter.count == 0, counter.statements
+
+
+def test_load_user_games_skips_revoked_access(db, make_user):
+    user = make_user()
+    _make_games(db, user, 3, can_access=False)
+
+    assert _load_user_games(db, user.id) == []
+
+
+def test_cache_invalidated_after_commit_not_flush(db, client, make_user, auth_headers):
+    user = make_user()
+    user_id = user.id
+    _make_games(db, user, 3)
+    headers = auth_headers(user.username)
+
+    access = db.query(GameAccess).filter(GameAccess.user_id == user_id).order_by(GameAccess.game_id).first()
+    access.can_access = False
+    db.flush()
+
+    # flush 之后、提交之前的并发请求读到旧数据并写入缓存
+    assert len(client.get("/api/games/mine", headers=headers).json()) == 3
+    assert my_games_cache.get(user_id) is not None
+
+    db.commit()
+    assert my_games_cache.get(user_id) is None
+    assert len(client.get("/api/games/mine", headers=headers).json()) == 2
+
+
+def test_game_change_clears_cache_after_commit(db, client, make_user, auth_headers):
+    user = make_user()
+    user_id = user.id
+    games = _make_games(db, user, 2)
+    headers = auth_headers(user.username)
+    client.get("/api/games/mine", headers=headers)
+
+    games[0].is_active = False
+    db.flush()
+    game_catalog._checked_at = float("inf")
+    assert my_games_cache.get(user_id) is not None
+
+    db.commit()
+    assert my_games_cache.get(user_id) is None
+    assert game_catalog._checked_at == 0.0
+    assert len(client.get("/api/games/mine", headers=headers).json()) == 1
+
+
+def test_rollback_keeps_cache(db, client, make_user, auth_headers):
+    user = make_user()
+    user_id = user.id
+    _make_games(db, user, 2)
+    client.get("/api/games/mine", headers=auth_headers(user.username))
+
+    db.query(GameAccess).filter(GameAccess.user_id == user_id).first().can_access = False
+    db.flush()
+    db.rollback()
+
+    assert len(my_games_cache.get(user_id)) == 2
@@ -0,0 +1,61 @@
+"""
+登录时升级过时的密码哈希：比较并替换，不覆盖并发修改的密码
+"""
+import asyncio
+
+import pytest
+from passlib.context import CryptContext
+
+import auth
+from models import User
+
+
+@pytest.fixture
+def stronger_policy(monkeypatch):
+    """把 bcrypt 成本从测试默认的 4 提高到 5，现有哈希变为过时"""
+    context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__default_rounds=5, bcrypt__min_rounds=5)
+    monkeypatch.setattr(auth, "pwd_context", context)
+    return context
+
+
+def _stored_hash(db, user_id: int) -> str:
+    db.expire_all()
+    return db.get(User, user_id).hashed_password
+
+
+def test_login_upgrades_outdated_hash(db, client, make_user, stronger_policy):
+    user = make_user("alice")
+    user_id, old_hash = user.id, user.hashed_password
+    assert old_hash.startswith("$2b$04$")
+    assert stronger_policy.needs_update(old_hash)
+
+    # 升级在响应之后的后台任务中执行（TestClient 返回前已执行完）
+    response = client.post("/api/auth/login", data={"username": "alice", "password": "password123"})
+    assert response.status_code == 200, response.text
+
+    new_hash = _stored_hash(db, user_id)
+    assert new_hash.startswith("$2b$05$")
+    assert stronger_policy.verify("password123", new_hash)
+    assert not stronger_policy.needs_update(new_hash)
+
+
+def test_rehash_does_not_overwrite_concurrent_password_change(db, make_user, stronger_policy):
+    user = make_user("alice")
+    user_id, old_hash = user.id, user.hashed_password
+
+    # 登录后、升级写入前，用户修改了密码
+    changed_hash = auth.get_password_hash("new-password")
+    user.hashed_password = changed_hash
+    db.commit()
+
+    asyncio.run(auth.rehash_password(user_id, old_hash, "password123"))
+    assert _stored_hash(db, user_id) == changed_hash
+    assert auth._replace_password_hash(user_id, old_hash, auth.get_password_hash("password123")) is False
+
+
+def test_replace_password_hash_swaps_matching_hash(db, make_user):
+    user = make_user("alice")
+    new_hash = auth.get_password_hash("password123")
+
+    assert auth._replace_password_hash(user.id, user.hashed_password, new_hash) is True
+    assert _stored_hash(db, user.id) == new_hash
@@ -0,0 +1,102 @@
+"""
+用户缓存：提交后失效（ORM 和 Core 语句）和 Redis 后端
+"""
+import asyncio
+
+import fakeredis
+import pytest
+import redis
+import redis.asyncio
+from sqlalchemy import delete, update
+
+from auth import principal_cache
+from models import User
+from utils.principal_cache import PrincipalCache, RedisPrincipalBackend, snapshot_user
+
+
+def _cached(username: str):
+    return asyncio.run(principal_cache.get(username))
+
+
+@pytest.fixture
+def cached_alice(make_user):
+    user = make_user("alice")
+    asyncio.run(principal_cache.set("alice", snapshot_user(user)))
+    return user
+
+
+def test_orm_update_invalidates_after_commit(db, cached_alice):
+    cached_alice.is_active = False
+    db.flush()
+    # flush 之后、提交之前缓存仍然有效
+    assert _cached("alice") is not None
+
+    db.commit()
+    assert _cached("alice") is None
+
+
+def test_orm_rename_invalidates_old_username(db, cached_alice):
+    cached_alice.username = "alice2"
+    db.commit()
+    assert _cached("alice") is None
+
+
+def test_rollback_keeps_cache(db, cached_alice):
+    cached_alice.is_active = False
+    db.flush()
+    db.rollback()
+    assert _cached("alice") is not None
+
+
+def test_core_update_invalidates_after_commit(db_engine, cached_alice):
+    with db_engine.begin() as connection:
+        connection.execute(update(User).where(User.id == cached_alice.id).values(is_active=False))
+        assert _cached("alice") is not None
+    assert _cached("alice") is None
+
+
+def test_core_delete_invalidates(db_engine, cached_alice):
+    with db_engine.begin() as connection:
+        connection.execute(delete(User).where(User.id == cached_alice.id))
+    assert _cached("alice") is None
+
+
+def test_orm_bulk_update_invalidates(db, cached_alice):
+    db.execute(update(User).where(User.id == cached_alice.id).values(email="new@example.com"))
+    db.commit()
+    assert _cached("alice") is None
+
+
+def test_password_rehash_keeps_cache(db_engine, cached_alice):
+    with db_engine.begin() as connection:
+        connection.execute(update(User).where(User.id == cached_alice.id).values(hashed_password="x"))
+    assert _cached("alice") is not None
+
+
+@pytest.fixture
+def redis_backend(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.asyncio.Redis, "from_url",
+                        classmethod(lambda cls, url: fakeredis.FakeAsyncRedis(server=server)))
+    monkeypatch.setattr(redis.Redis, "from_url", classmethod(lambda cls, url: fakeredis.FakeRedis(server=server)))
+    return RedisPrincipalBackend("redis://test", ttl=60)
+
+
+def test_redis_backend_round_trip_and_invalidate(redis_backend, make_user):
+    cache = PrincipalCache(redis_backend)
+    snapshot = snapshot_user(make_user("alice"))
+
+    async def scenario():
+        await cache.set("alice", snapshot)
+        assert await cache.get("alice") == snapshot
+        # 在事件循环中失效：后台任务使用异步客户端
+        cache.invalidate("alice")
+        await redis_backend.wait_pending()
+        assert await cache.get("alice") is None
+        await cache.set("alice", snapshot)
+
+    asyncio.run(scenario())
+
+    # 在线程池中提交时使用同步客户端
+    cache.invalidate("alice")
+    assert asyncio.run(redis_backend.get("alice")) is None
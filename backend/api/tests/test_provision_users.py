@@ -0,0 +1,57 @@
+"""
+批量开通用户：校验、拒绝文件和重复跳过（SQLite）
+"""
+import csv
+import sys
+
+import provision_users
+from models import User
+
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(("username", "email", "password"))
+        writer.writerows(rows)
+
+
+def _run(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["provision_users.py", *argv, "--workers", "1"])
+    provision_users.main()
+
+
+def test_invalid_rows_are_rejected_not_inserted(db, tmp_path, monkeypatch):
+    csv_path = tmp_path / "users.csv"
+    _write_csv(csv_path, [
+        ("alice", "alice@example.com", "password123"),
+        ("b", "b@example.com", "password123"),
+        ("carol", "not-an-email", "password123"),
+        ("dave", "dave@example.com", "short"),
+        ("erin", "erin@example.com", "password123"),
+    ])
+
+    _run(monkeypatch, str(csv_path))
+
+    assert sorted(user.username for user in db.query(User)) == ["alice", "erin"]
+    with open(f"{csv_path}.rejects.csv", newline="", encoding="utf-8") as f:
+        rejects = list(csv.DictReader(f))
+    assert [(row["line"], row["username"]) for row in rejects] == [("2", "b"), ("3", "carol"), ("4", "dave")]
+    assert "username" in rejects[0]["error"]
+    assert "email" in rejects[1]["error"]
+    assert "password" in rejects[2]["error"]
+    assert all("short" not in ",".join(row.values()) for row in rejects)
+
+
+def test_existing_users_are_skipped(db, tmp_path, monkeypatch, make_user):
+    make_user("alice")
+    csv_path = tmp_path / "users.csv"
+    _write_csv(csv_path, [
+        ("alice", "alice2@example.com", "password123"),
+        ("bob", "alice@example.com", "password123"),
+        ("carol", "carol@example.com", "password123"),
+    ])
+
+    _run(monkeypatch, str(csv_path), "--batch-size", "2")
+
+    assert sorted(user.username for user in db.query(User)) == ["alice", "carol"]
+    assert provision_users.load_checkpoint(f"{csv_path}.progress") == 3
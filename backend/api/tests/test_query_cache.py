@@ -0,0 +1,95 @@
+"""
+查询结果缓存：过期后台刷新与调用方 disconnect() 不冲突
+"""
+import asyncio
+import threading
+import time
+
+from utils.db_connector import create_connector
+from utils.fanout import fan_out_query
+from utils.query_cache import CachedConnector, QueryResultCache
+
+
+def _wait_for_refresh(cache: QueryResultCache, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while cache._inflight and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+class _DisconnectingConnector:
+    """模拟 disconnect() 后不能再查询的连接器（重构前的行为）"""
+
+    release = threading.Event()
+    calls = 0
+
+    def __init__(self, config):
+        self.config = config
+        self.connected = True
+
+    def execute(self, query, params=None):
+        type(self).calls += 1
+        if type(self).calls > 1:
+            # 后台刷新：等调用方 disconnect() 之后再执行
+            type(self).release.wait(5)
+        if not self.connected:
+            raise AttributeError("'NoneType' object has no attribute 'connect'")
+        return [{"calls": type(self).calls}]
+
+    def disconnect(self):
+        self.connected = False
+
+
+def test_stale_refresh_survives_caller_disconnect(make_sqlite_game):
+    config = make_sqlite_game("swr")
+    cache = QueryResultCache(ttl=0.01, stale_ttl=60)
+
+    first = CachedConnector(_DisconnectingConnector(config), cache, ttl=0.01)
+    assert first.execute("SELECT 1") == [{"calls": 1}]
+    first.disconnect()
+    time.sleep(0.02)
+
+    second = CachedConnector(_DisconnectingConnector(config), cache, ttl=0.01)
+    # 过期：先返回旧结果，后台刷新
+    assert second.execute("SELECT 1") == [{"calls": 1}]
+    second.disconnect()
+    _DisconnectingConnector.release.set()
+
+    _wait_for_refresh(cache)
+    assert cache.refresh_errors == 0
+    assert [entry.rows for entry in cache._entries.values()] == [[{"calls": 2}]]
+
+
+def test_fan_out_with_cache_refreshes_in_background(make_sqlite_game, monkeypatch):
+    from utils import fanout
+
+    config = make_sqlite_game("fanout_swr", rows=3)
+    cache = QueryResultCache(ttl=0.01, stale_ttl=60)
+    monkeypatch.setattr(fanout, "query_cache", cache)
+    query = "SELECT COUNT(*) AS n FROM scores"
+
+    results = asyncio.run(fan_out_query([config], query, cache_ttl=0.01))
+    assert results[0].rows == [{"n": 3}]
+    create_connector(config).execute_many(
+        "INSERT INTO scores (id, player, score) VALUES (:id, :player, :score)",
+        [{"id": 100, "player": "late", "score": 0}]
+    )
+    time.sleep(0.02)
+
+    results = asyncio.run(fan_out_query([config], query, cache_ttl=0.01))
+    assert results[0].rows == [{"n": 3}]
+    _wait_for_refresh(cache)
+    assert cache.refresh_errors == 0
+    assert [entry.rows for entry in cache._entries.values()] == [[{"n": 4}]]
+
+
+def test_whitespace_inside_literals_gets_separate_cache_entries(make_sqlite_game):
+    config = make_sqlite_game("literal_whitespace", rows=0)
+    connector = create_connector(config)
+    connector.execute_many(
+        "INSERT INTO scores (id, player, score) VALUES (:id, :player, :score)",
+        [{"id": 1, "player": "a  b", "score": 1}, {"id": 2, "player": "a b", "score": 2}]
+    )
+    cached = CachedConnector(connector, QueryResultCache(ttl=60))
+
+    assert cached.execute_query("SELECT score FROM scores WHERE player = 'a  b'") == [{"score": 1}]
+    assert cached.execute_query("SELECT score FROM scores WHERE player = 'a b'") == [{"score": 2}]
@@ -0,0 +1,144 @@
+"""
+请求限流：进程内令牌桶和 Redis 脚本令牌桶
+"""
+import asyncio
+
+import fakeredis
+import pytest
+import redis.asyncio
+from fastapi import HTTPException
+
+from utils.rate_limit import InMemoryRateLimitBackend, RateLimiter, RedisRateLimitBackend
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.asyncio.Redis, "from_url",
+                        classmethod(lambda cls, url: fakeredis.FakeAsyncRedis(server=server)))
+    return server
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        return InMemoryRateLimitBackend()
+    request.getfixturevalue("redis_server")
+    return RedisRateLimitBackend("redis://test")
+
+
+def test_bucket_allows_capacity_then_rejects(backend):
+    limiter = RateLimiter(backend)
+    rules = [("login:ip:1.2.3.4", 3, 60), ("login:user:alice", 5, 60)]
+
+    async def scenario():
+        for _ in range(3):
+            await limiter.check(rules)
+        with pytest.raises(HTTPException) as exc_info:
+            await limiter.check(rules)
+        return exc_info.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 429
+    # 每 20 秒补充一个令牌
+    assert 1 <= int(error.headers["Retry-After"]) <= 20
+    assert limiter.allowed == 3
+    assert limiter.rejected == 1
+
+
+def test_reset_restores_bucket(backend):
+    limiter = RateLimiter(backend)
+    rules = [("register:ip:1.2.3.4", 1, 600)]
+
+    async def scenario():
+        await limiter.check(rules)
+        with pytest.raises(HTTPException):
+            await limiter.check(rules)
+        await backend.reset("register:ip:1.2.3.4")
+        await limiter.check(rules)
+
+    asyncio.run(scenario())
+
+
+def test_redis_bucket_is_one_key_with_expiry(redis_server):
+    backend = RedisRateLimitBackend("redis://test")
+
+    async def scenario():
+        assert await backend.hit_many([("login:user:alice", 10, 60)]) == [0.0]
+        client = fakeredis.FakeAsyncRedis(server=redis_server)
+        assert await client.keys("*") == [b"ratelimit:login:user:alice"]
+        assert 0 < await client.pttl("ratelimit:login:user:alice") <= 60000
+        assert float(await client.hget("ratelimit:login:user:alice", "tokens")) == 9
+
+    asyncio.run(scenario())
+
+
+def test_backend_failure_allows_request():
+    class BrokenBackend(InMemoryRateLimitBackend):
+        async def hit_many(self, rules):
+            raise ConnectionError("redis down")
+
+    limiter = RateLimiter(BrokenBackend())
+    asyncio.run(limiter.check([("login:ip:1.2.3.4", 1, 60)]))
+    assert limiter.allowed == 1
+
+
+def _unreachable_redis():
+    # 没有服务监听的端口：每次检查都抛出连接错误
+    return RedisRateLimitBackend("redis://127.0.0.1:1/0")
+
+
+def test_redis_failure_uses_in_memory_fallback(caplog):
+    limiter = RateLimiter(_unreachable_redis(), fallback=InMemoryRateLimitBackend())
+    rules = [("login:user:alice", 2, 60)]
+
+    async def scenario():
+        for _ in range(2):
+            await limiter.check(rules)
+        with pytest.raises(HTTPException) as exc_info:
+            await limiter.check(rules)
+        return exc_info.value
+
+    with caplog.at_level("ERROR", logger="utils.rate_limit"):
+        error = asyncio.run(scenario())
+
+    assert error.status_code == 429
+    assert limiter.backend_errors == 3
+    assert limiter.stats()["backend_failing"]
+    # 连续失败只记录一次
+    assert len([r for r in caplog.records if "限流后端不可用" in r.message]) == 1
+
+
+def test_redis_failure_without_fallback_fails_open():
+    limiter = RateLimiter(_unreachable_redis())
+    rules = [("login:user:alice", 1, 60)]
+
+    async def scenario():
+        for _ in range(3):
+            await limiter.check(rules)
+
+    asyncio.run(scenario())
+    assert limiter.allowed == 3
+    assert limiter.rejected == 0
+
+
+def test_recovered_backend_is_used_again(redis_server):
+    backend = RedisRateLimitBackend("redis://test")
+    fallback = InMemoryRateLimitBackend()
+    limiter = RateLimiter(backend, fallback=fallback)
+    rules = [("login:ip:1.2.3.4", 5, 60)]
+    original = backend.hit_many
+
+    async def failing(rules):
+        raise redis.asyncio.ConnectionError("down")
+
+    async def scenario():
+        backend.hit_many = failing
+        await limiter.check(rules)
+        backend.hit_many = original
+        await limiter.check(rules)
+
+    asyncio.run(scenario())
+    assert not limiter.stats()["backend_failing"]
+    assert fallback.stats()["keys"] == 1
+    assert limiter.backend_errors == 1
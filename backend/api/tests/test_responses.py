@@ -0,0 +1,73 @@
+"""
+FAST_JSON：响应类的选择，以及快速路径与默认序列化输出一致
+"""
+import pytest
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from utils import responses
+
+
+def test_fast_json_uses_orjson(monkeypatch):
+    monkeypatch.setattr(responses, "FAST_JSON", True)
+    assert responses._resolve_response_class() is ORJSONResponse
+
+    monkeypatch.setattr(responses, "FAST_JSON", False)
+    assert responses._resolve_response_class() is JSONResponse
+
+
+def test_fast_json_without_orjson_fails_loudly(monkeypatch):
+    monkeypatch.setattr(responses, "FAST_JSON", True)
+    monkeypatch.setattr(responses, "_orjson_available", lambda: False)
+    with pytest.raises(RuntimeError, match="orjson"):
+        responses._resolve_response_class()
+
+
+@pytest.fixture
+def fast_json_routes(monkeypatch):
+    """打开路由中的 FAST_JSON 快速路径，使用 ORJSONResponse 序列化"""
+    import routes.auth
+    import routes.games
+
+    def enable(enabled: bool):
+        monkeypatch.setattr(routes.auth, "FAST_JSON", enabled)
+        monkeypatch.setattr(routes.games, "FAST_JSON", enabled)
+        monkeypatch.setattr(responses, "DefaultJSONResponse", ORJSONResponse if enabled else JSONResponse)
+
+    return enable
+
+
+def _requests(client, path: str, headers):
+    """清空缓存后请求两次：第一次从数据库加载，第二次来自缓存，两种来源都要比较"""
+    from auth import principal_cache
+    from routes.games import my_games_cache
+
+    principal_cache.clear()
+    my_games_cache.clear()
+    responses_ = [client.get(path, headers=headers) for _ in range(2)]
+    for response in responses_:
+        assert response.status_code == 200, response.text
+    return [response.json() for response in responses_]
+
+
+@pytest.mark.parametrize("path", ["/api/auth/me", "/api/auth/verify", "/api/games/mine"])
+def test_fast_json_routes_match_default_payloads(db, client, make_user, auth_headers, fast_json_routes, path):
+    from models import GameAccess, GameConfig
+
+    user = make_user("alice", is_superuser=True)
+    game = GameConfig(
+        game_name="fast_json", game_display_name="Fast JSON", db_type="sqlite", db_host="", db_port=0,
+        db_name="fast_json.sqlite3", db_user="", db_password="", game_url="https://games.example.com/1"
+    )
+    db.add(game)
+    db.flush()
+    db.add(GameAccess(user_id=user.id, game_id=game.id, access_count=3))
+    db.commit()
+    headers = auth_headers("alice")
+
+    fast_json_routes(False)
+    default_payloads = _requests(client, path, headers)
+    fast_json_routes(True)
+    fast_payloads = _requests(client, path, headers)
+
+    assert fast_payloads == default_payloads
+    assert default_payloads[0] == default_payloads[1]
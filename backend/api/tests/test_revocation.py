@@ -0,0 +1,70 @@
+"""
+Token 吊销：写入失败时不吊销，同步失败时退避
+"""
+import asyncio
+import logging
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+from utils.revocation import RevocationList, TokenRevocationStore, get_revocation_store
+
+
+def _store_without_table(tmp_path, **kwargs) -> TokenRevocationStore:
+    """数据库中没有 revoked_tokens 表（尚未执行迁移）"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.sqlite3'}")
+    return TokenRevocationStore(engine, RevocationList(capacity=100), **kwargs)
+
+
+def test_revoke_failure_does_not_revoke_locally(tmp_path):
+    store = _store_without_table(tmp_path)
+    try:
+        store.revoke("jti-1", time.time() + 60)
+    except OperationalError:
+        pass
+    else:
+        raise AssertionError("写入失败时应抛出异常")
+    assert not store.is_revoked("jti-1")
+
+
+def test_revoke_persists_then_revokes(db):
+    store = get_revocation_store()
+    store.revoke("jti-2", time.time() + 60)
+    # 重复吊销忽略唯一约束冲突
+    store.revoke("jti-2", time.time() + 60)
+    assert store.is_revoked("jti-2")
+
+
+def test_logout_returns_503_when_revocation_fails(client, make_user, auth_headers, monkeypatch):
+    make_user("alice")
+    headers = auth_headers("alice")
+
+    def fail(jti, exp):
+        raise OperationalError("INSERT INTO revoked_tokens", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(get_revocation_store(), "revoke", fail)
+    response = client.post("/api/auth/logout", headers=headers)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    # Token 仍然可用（没有吊销成功）
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+
+def test_sync_backs_off_and_logs_once(tmp_path, caplog):
+    store = _store_without_table(tmp_path, sync_interval=0.01, max_backoff=0.04)
+
+    async def scenario():
+        with caplog.at_level(logging.INFO, logger="utils.revocation"):
+            store.start()
+            await asyncio.sleep(0.3)
+            await store.stop()
+
+    asyncio.run(scenario())
+    errors = [record for record in caplog.records if record.levelno >= logging.ERROR]
+    assert len(errors) == 1
+    assert "revoked_tokens" in errors[0].getMessage()
+    # 退避到 0.04s：0.3s 内重试次数远少于按 0.01s 间隔的 30 次
+    assert 3 <= store.sync_errors <= 12
+    assert store.stats()["consecutive_sync_errors"] == store.sync_errors
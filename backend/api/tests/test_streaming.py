@@ -0,0 +1,116 @@
+"""
+NDJSON 流式导出：提前结束和取消时关闭同步生成器，访问记录导出路由
+"""
+import asyncio
+import json
+from contextlib import aclosing
+from datetime import datetime
+
+import anyio
+
+from models import GameAccess, GameConfig
+from utils.connector_registry import get_registry
+from utils.db_connector import _registry_key, create_connector
+from utils.streaming import iterate_in_threadpool_closing, ndjson_lines
+
+
+class _Tracked:
+    def __init__(self):
+        self.closed = False
+
+    def rows(self, count: int):
+        try:
+            for i in range(count):
+                yield {"i": i}
+        finally:
+            self.closed = True
+
+
+def test_early_exit_closes_generator():
+    tracked = _Tracked()
+
+    async def scenario():
+        rows = iterate_in_threadpool_closing(tracked.rows(100))
+        async with aclosing(rows):
+            async for row in rows:
+                if row["i"] == 2:
+                    break
+
+    asyncio.run(scenario())
+    assert tracked.closed
+
+
+def test_cancel_closes_generator():
+    tracked = _Tracked()
+
+    async def consume(lines):
+        async for _ in lines:
+            await anyio.sleep(0.01)
+
+    async def scenario():
+        lines = ndjson_lines(iterate_in_threadpool_closing(tracked.rows(10_000)))
+        # 模拟客户端断开：Starlette 取消发送响应的任务组
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(consume, lines)
+            await anyio.sleep(0.05)
+            task_group.cancel_scope.cancel()
+
+    anyio.run(scenario)
+    assert tracked.closed
+
+
+def test_aiter_query_early_exit_returns_lease(make_sqlite_game):
+    config = make_sqlite_game("stream_lease", rows=50)
+    connector = create_connector(config)
+    key = _registry_key(config, "sqlalchemy")
+
+    async def scenario():
+        rows = connector.aiter_query("SELECT id FROM scores ORDER BY id", batch_size=5)
+        async with aclosing(rows):
+            async for row in rows:
+                if row["id"] == 7:
+                    break
+
+    asyncio.run(scenario())
+    entry = get_registry()._entries[key]
+    assert entry.leases == 0
+    assert entry.resource.pool.checkedout() == 0
+
+
+def _seed_accesses(db, make_user, count: int) -> GameConfig:
+    game = GameConfig(
+        game_name="export", game_display_name="export", db_type="sqlite",
+        db_host="", db_port=0, db_name="unused", db_user="", db_password=""
+    )
+    db.add(game)
+    db.commit()
+    now = datetime(2026, 1, 1)
+    for i in range(count):
+        user = make_user(f"player{i}")
+        db.add(GameAccess(user_id=user.id, game_id=game.id, can_access=True,
+                          access_count=i, first_access_at=now, last_access_at=now))
+    db.commit()
+    return game
+
+
+def test_export_game_accesses_streams_ndjson(client, db, make_user, auth_headers):
+    make_user("root", is_superuser=True)
+    game = _seed_accesses(db, make_user, 3)
+
+    response = client.get(f"/api/games/{game.id}/accesses", headers=auth_headers("root"))
+
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["username"], row["access_count"]) for row in rows] == [
+        ("player0", 0), ("player1", 1), ("player2", 2)
+    ]
+
+
+def test_export_game_accesses_requires_superuser(client, db, make_user, auth_headers):
+    make_user("alice")
+    make_user("root", is_superuser=True)
+    game = _seed_accesses(db, make_user, 1)
+
+    assert client.get(f"/api/games/{game.id}/accesses", headers=auth_headers("alice")).status_code == 403
+    assert client.get("/api/games/9999/accesses", headers=auth_headers("root")).status_code == 404
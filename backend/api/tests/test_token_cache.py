@@ -0,0 +1,60 @@
+"""
+已验证 Token 缓存：条目不晚于 Token 的 exp 过期，退出登录时移除
+"""
+import time
+from datetime import timedelta
+
+import pytest
+
+import auth
+from utils.token_cache import VerifiedTokenCache
+
+
+def _expires_in(cache: VerifiedTokenCache, token: str) -> float:
+    expires_at, _ = cache._cache._data[cache._key(token)]
+    return expires_at - time.monotonic()
+
+
+def test_entry_expires_with_token_exp():
+    cache = VerifiedTokenCache(ttl=300)
+    cache.set("short", {"sub": "alice", "exp": time.time() + 0.2})
+    cache.set("long", {"sub": "bob", "exp": time.time() + 3600})
+
+    assert cache.get("short") == {"sub": "alice", "exp": pytest.approx(time.time() + 0.2, abs=1)}
+    assert _expires_in(cache, "short") <= 0.2
+    # exp 晚于缓存 TTL 时按 TTL 过期
+    assert 299 < _expires_in(cache, "long") <= 300
+
+    time.sleep(0.25)
+    assert cache.get("short") is None
+    assert cache.get("long") is not None
+
+
+def test_expired_token_is_not_cached():
+    cache = VerifiedTokenCache(ttl=300)
+    cache.set("expired", {"sub": "alice", "exp": time.time() - 1})
+    assert cache.get("expired") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_decoded_token_cached_until_exp():
+    assert auth.token_cache is not None
+    token = auth.create_access_token({"sub": "alice"}, expires_delta=timedelta(seconds=30))
+    payload = auth.decode_access_token(token)
+
+    assert auth.token_cache.get(token) == payload
+    assert _expires_in(auth.token_cache, token) <= payload["exp"] - time.time() + 0.01
+    auth.token_cache.invalidate(token)
+
+
+def test_logout_removes_cached_token(client, make_user, auth_headers):
+    make_user("alice")
+    headers = auth_headers("alice")
+    token = headers["Authorization"].split(" ", 1)[1]
+
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+    assert auth.token_cache.get(token) is not None
+
+    assert client.post("/api/auth/logout", headers=headers).status_code == 200
+    assert auth.token_cache.get(token) is None
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
@@ -0,0 +1,246 @@
+"""
+游戏访问计数的批量写入（write-behind）
+在内存中合并 GameAccess 的访问次数增量，定期以批量 UPDATE 写回数据库，
+避免热门游戏上逐行 read-modify-write 造成的行锁竞争
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, Integer, bindparam, column, func, update, values
+from starlette.concurrency import run_in_threadpool
+
+from database import engine
+from models import GameAccess
+
+logger = logging.getLogger(__name__)
+
+# 写回配置
+ACCESS_FLUSH_INTERVAL = float(os.getenv("ACCESS_FLUSH_INTERVAL", "5"))
+ACCESS_MAX_PENDING_KEYS = int(os.getenv("ACCESS_MAX_PENDING_KEYS", "100000"))
+
+# 单条批量 UPDATE 语句的最大行数（受数据库绑定参数个数限制）
+ACCESS_FLUSH_CHUNK_SIZE = 5000
+
+AccessKey = Tuple[int, int]  # (user_id, game_id)
+
+
+class AccessRecorder:
+    """
+    访问计数聚合器
+
+    record() 只修改内存中的计数，flush() 把累积的增量以
+    UPDATE ... SET access_count = access_count + n 一次性写回。
+    只更新已有的 game_accesses 记录、不插入新记录：访问权限由记录本身决定，
+    写回期间权限被删除的 (用户, 游戏) 的增量直接丢弃，记录访问不会授予权限。
+    待写入的 (用户, 游戏) 组合超过上限时丢弃新事件并计数。
+    """
+
+    def __init__(self, engine, flush_interval: float = 5.0, max_pending_keys: int = 100000):
+        self.engine = engine
+        self.flush_interval = flush_interval
+        self.max_pending_keys = max_pending_keys
+        # key -> [增量, 首次访问时间, 最后访问时间]
+        self._pending: Dict[AccessKey, List[Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._flush_listeners: List[Callable[[List[AccessKey]], None]] = []
+
+        self.recorded = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.flushed_events = 0
+        self.orphaned = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+
+    def record(self, user_id: int, game_id: int, at: Optional[datetime] = None) -> bool:
+        """记录一次访问，返回是否被接受"""
+        at = at or datetime.utcnow()
+        key = (user_id, game_id)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry[0] += 1
+                entry[2] = at
+            elif len(self._pending) >= self.max_pending_keys:
+                self.dropped += 1
+                return False
+            else:
+                self._pending[key] = [1, at, at]
+            self.recorded += 1
+        return True
+
+    def add_flush_listener(self, listener: Callable[[List[AccessKey]], None]):
+        """注册写回成功后的回调（参数为本次写回的 key 列表）"""
+        self._flush_listeners.append(listener)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _execute_update(self, connection, rows: List[Dict[str, Any]]) -> int:
+        """
+        累加一批已有记录的计数，返回更新的行数（驱动无法统计时返回 -1）
+
+        PostgreSQL 使用一条 UPDATE ... FROM (VALUES ...)；
+        其他数据库（SQLite 不支持 VALUES 列别名）使用 executemany。
+        """
+        if self.engine.dialect.name == "postgresql":
+            increments = values(
+                column("user_id", Integer),
+                column("game_id", Integer),
+                column("access_count", Integer),
+                column("first_access_at", DateTime),
+                column("last_access_at", DateTime),
+                name="increments",
+            ).data([
+                (row["user_id"], row["game_id"], row["access_count"], row["first_access_at"], row["last_access_at"])
+                for row in rows
+            ])
+            stmt = (
+                update(GameAccess)
+                .where(
+                    GameAccess.user_id == increments.c.user_id,
+                    GameAccess.game_id == increments.c.game_id,
+                )
+                .values(
+                    access_count=func.coalesce(GameAccess.access_count, 0) + increments.c.access_count,
+                    first_access_at=func.coalesce(GameAccess.first_access_at, increments.c.first_access_at),
+                    last_access_at=increments.c.last_access_at,
+                )
+            )
+            return connection.execute(stmt).rowcount
+
+        stmt = (
+            update(GameAccess)
+            .where(
+                GameAccess.user_id == bindparam("b_user_id"),
+                GameAccess.game_id == bindparam("b_game_id"),
+            )
+            .values(
+                access_count=func.coalesce(GameAccess.access_count, 0) + bindparam("b_access_count"),
+                first_access_at=func.coalesce(GameAccess.first_access_at, bindparam("b_first_access_at")),
+                last_access_at=bindparam("b_last_access_at"),
+            )
+        )
+        result = connection.execute(stmt, [{f"b_{key}": value for key, value in row.items()} for row in rows])
+        return result.rowcount
+
+    def _restore(self, batch: Dict[AccessKey, List[Any]]):
+        """写回失败时把增量合并回待写队列"""
+        with self._lock:
+            for key, (count, first_at, last_at) in batch.items():
+                entry = self._pending.get(key)
+                if entry is not None:
+                    entry[0] += count
+                    entry[1] = min(entry[1], first_at)
+                    entry[2] = max(entry[2], last_at)
+                elif len(self._pending) < self.max_pending_keys:
+                    self._pending[key] = [count, first_at, last_at]
+                else:
+                    self.dropped += count
+
+    def flush(self) -> int:
+        """把累积的增量写回数据库，返回写入的事件数"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            rows = [
+                {
+                    "user_id": user_id,
+                    "game_id": game_id,
+                    "access_count": count,
+                    "first_access_at": first_at,
+                    "last_access_at": last_at,
+                }
+                for (user_id, game_id), (count, first_at, last_at) in batch.items()
+            ]
+            start = time.perf_counter()
+            updated = 0
+            try:
+                with self.engine.begin() as connection:
+                    for offset in range(0, len(rows), ACCESS_FLUSH_CHUNK_SIZE):
+                        chunk = rows[offset:offset + ACCESS_FLUSH_CHUNK_SIZE]
+                        count = self._execute_update(connection, chunk)
+                        updated = -1 if updated < 0 or count < 0 else updated + count
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.error(f"访问计数写回失败: {str(e)}")
+                self._restore(batch)
+                return 0
+
+            if updated >= 0 and updated < len(rows):
+                # 没有对应记录（权限已被删除）的增量被丢弃
+                self.orphaned += len(rows) - updated
+            events = sum(count for count, _, _ in batch.values())
+            self.flushes += 1
+            self.flushed_events += events
+            self.last_batch_size = len(rows)
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+        keys = list(batch.keys())
+        for listener in self._flush_listeners:
+            try:
+                listener(keys)
+            except Exception as e:
+                logger.error(f"访问计数写回回调失败: {str(e)}")
+        return events
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await run_in_threadpool(self.flush)
+
+    def start(self):
+        """启动后台定期写回任务（需要在事件循环中调用）"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """停止后台任务并写回剩余的增量"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await run_in_threadpool(self.flush)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_keys": len(self._pending),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "flushed_events": self.flushed_events,
+            "orphaned": self.orphaned,
+            "last_batch_size": self.last_batch_size,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+
+_recorder: Optional[AccessRecorder] = None
+
+
+def get_access_recorder() -> AccessRecorder:
+    """进程级单例（绑定主数据库引擎）"""
+    global _recorder
+    if _recorder is None:
+        _recorder = AccessRecorder(
+            engine,
+            flush_interval=ACCESS_FLUSH_INTERVAL,
+            max_pending_keys=ACCESS_MAX_PENDING_KEYS
+        )
+    return _recorder
@@ -0,0 +1,396 @@
+"""
+外部游戏数据库的异步连接器
+PostgreSQL / MySQL / SQLite 使用 SQLAlchemy 异步引擎，MongoDB 使用 motor，
+查询期间不阻塞事件循环
+"""
+import asyncio
+import logging
+import os
+import weakref
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.sql.elements import TextClause
+
+from models import GameConfig
+from utils.connector_registry import get_registry
+from utils.db_connector import (
+    GAME_DB_STREAM_BATCH_SIZE,
+    MONGO_SQL_UNSUPPORTED,
+    Params,
+    Statement,
+    _registry_key,
+    as_statement,
+    game_pool_settings,
+    mongo_pool_size,
+)
+from utils.db_instrumentation import TimedAsyncAdaptedQueuePool, instrument_engine
+
+logger = logging.getLogger(__name__)
+
+# asyncpg 每个连接缓存的服务端预处理语句数量（按 SQL 文本自动复用，execute 和 execute_named 都会命中）
+GAME_DB_PREPARED_CACHE_SIZE = int(os.getenv("GAME_DB_PREPARED_CACHE_SIZE", "256"))
+
+
+# 正在关闭的异步引擎任务；保存引用，避免任务在完成前被垃圾回收
+_pending_disposals: Set["asyncio.Task[None]"] = set()
+# 创建各异步引擎的事件循环：asyncpg / aiomysql 的连接只能在创建它们的事件循环中关闭
+_engine_loops: "weakref.WeakKeyDictionary[Any, asyncio.AbstractEventLoop]" = weakref.WeakKeyDictionary()
+
+
+def _track_owner_loop(engine):
+    """记录引擎建立连接的事件循环（连接总是在查询所在的事件循环中建立）"""
+    sync_engine = engine.sync_engine
+
+    def _on_connect(dbapi_connection, connection_record):
+        _engine_loops.setdefault(sync_engine, asyncio.get_running_loop())
+
+    event.listen(sync_engine, "connect", _on_connect)
+
+
+def _schedule_disposal(engine):
+    """在当前（引擎所属的）事件循环中以任务方式关闭引擎"""
+    task = asyncio.get_running_loop().create_task(engine.dispose())
+    _pending_disposals.add(task)
+    task.add_done_callback(_pending_disposals.discard)
+
+
+def _dispose_async_engine(engine):
+    """
+    注册表淘汰异步引擎时关闭其全部连接
+
+    连接必须在引擎所属的事件循环中关闭：
+    - 在所属事件循环中调用时以任务方式关闭（注册表在同步代码中调用，不能 await），
+      应用关闭时通过 wait_for_disposals() 等待完成
+    - 在其他线程中调用（如线程池中的同步借用触发 LRU 淘汰）时提交到所属事件循环
+    - 所属事件循环已停止但未关闭时（如 gunicorn worker 退出）在该事件循环中执行完
+    - 所属事件循环已关闭时不再关闭连接，只丢弃连接池（dispose(close=False)），由进程退出回收
+    """
+    owner = _engine_loops.get(engine.sync_engine)
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+
+    if owner is None or owner.is_closed():
+        engine.sync_engine.dispose(close=False)
+    elif running is owner:
+        _schedule_disposal(engine)
+    elif owner.is_running():
+        owner.call_soon_threadsafe(_schedule_disposal, engine)
+    elif running is None:
+        owner.run_until_complete(engine.dispose())
+    else:
+        engine.sync_engine.dispose(close=False)
+
+
+async def wait_for_disposals():
+    """等待所有进行中的异步引擎关闭（应用关闭时调用）"""
+    while _pending_disposals:
+        results = await asyncio.gather(*list(_pending_disposals), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"关闭异步引擎失败: {str(result)}")
+
+
+class AsyncDatabaseConnector:
+    """异步数据库连接器基类（与 DatabaseConnector 接口一致，方法均为协程）"""
+
+    def __init__(self, config: GameConfig):
+        self.config = config
+
+    async def connect(self) -> bool:
+        """建立连接"""
+        raise NotImplementedError
+
+    async def disconnect(self):
+        """断开连接"""
+        raise NotImplementedError
+
+    async def execute_query(self, query: str) -> List[Dict[str, Any]]:
+        """执行查询"""
+        raise NotImplementedError
+
+    async def execute(self, query: Statement, params: Optional[Params] = None) -> List[Dict[str, Any]]:
+        """执行参数化查询，参数以 :name 形式绑定"""
+        raise NotImplementedError
+
+    async def execute_many(self, query: Statement, params_seq: Sequence[Params]) -> int:
+        """用多组参数批量执行同一语句（executemany），返回影响的行数"""
+        raise NotImplementedError
+
+    def register_statement(self, name: str, query: str) -> TextClause:
+        """登记命名语句，之后通过 execute_named 按名称重复执行（只在进程内保存语句对象）"""
+        raise NotImplementedError
+
+    async def execute_named(self, name: str, params: Optional[Params] = None) -> List[Dict[str, Any]]:
+        """执行已登记的命名语句"""
+        raise NotImplementedError
+
+    async def test_connection(self) -> bool:
+        """测试连接"""
+        raise NotImplementedError
+
+    def aiter_query(self, *args, batch_size: int = GAME_DB_STREAM_BATCH_SIZE, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """流式执行查询，逐行产出结果"""
+        raise NotImplementedError
+
+
+class AsyncSQLAlchemyConnector(AsyncDatabaseConnector):
+    """
+    基于 SQLAlchemy 异步引擎的关系型数据库连接器
+
+    引擎由注册表共享，每次查询时借用；注册表淘汰或重建连接池后下一次查询自动使用新的引擎。
+    """
+
+    # 子类覆盖：异步驱动前缀和日志中显示的名称
+    url_scheme = ""
+    label = ""
+
+    def __init__(self, config: GameConfig):
+        super().__init__(config)
+        self.statements: Dict[str, TextClause] = {}
+        self.pool_settings = game_pool_settings(config)
+
+    def _connection_string(self) -> str:
+        return (
+            f"{self.url_scheme}://{self.config.db_user}:{self.config.db_password}"
+            f"@{self.config.db_host}:{self.config.db_port}/{self.config.db_name}"
+        )
+
+    def _create_engine(self):
+        engine = create_async_engine(
+            self._connection_string(),
+            poolclass=TimedAsyncAdaptedQueuePool,
+            pool_logging_name=f"game_{self.config.game_name}_async",
+            **self.pool_settings.engine_kwargs()
+        )
+        self.pool_settings.apply(engine)
+        instrument_engine(engine, f"game_{self.config.game_name}_async")
+        _track_owner_loop(engine)
+        return engine
+
+    def _registry_args(self) -> Dict[str, Any]:
+        return dict(
+            key=_registry_key(self.config, "sqlalchemy_async"),
+            version=self.config.updated_at,
+            factory=self._create_engine,
+            cost=self.pool_settings.capacity,
+            dispose=_dispose_async_engine,
+            is_idle=lambda engine: engine.sync_engine.pool.checkedout() == 0,
+        )
+
+    def _lease(self):
+        """借用共享引擎（with 块内不会被注册表淘汰或释放）"""
+        return get_registry().lease(**self._registry_args())
+
+    @property
+    def engine(self):
+        """当前共享的引擎（用于查看连接池状态；执行查询使用 _lease()）"""
+        return get_registry().acquire(**self._registry_args())
+
+    async def connect(self) -> bool:
+        try:
+            with self._lease() as engine:
+                async with engine.connect():
+                    pass
+            logger.info(f"成功连接到 {self.label} 数据库（异步）: {self.config.game_name}")
+            return True
+        except Exception as e:
+            logger.error(f"连接 {self.label} 失败: {str(e)}")
+            return False
+
+    async def disconnect(self):
+        # 引擎归注册表所有，连接器不持有引擎和连接
+        pass
+
+    async def execute_query(self, query: Statement, params: Optional[Params] = None) -> List[Dict[str, Any]]:
+        return await self.execute(query, params)
+
+    async def execute(self, query: Statement, params: Optional[Params] = None) -> List[Dict[str, Any]]:
+        try:
+            with self._lease() as engine:
+                async with engine.connect() as connection:
+                    result = await connection.execute(as_statement(query), params or {})
+                    return [dict(row) for row in result.mappings().all()]
+        except SQLAlchemyError as e:
+            logger.error(f"查询执行失败: {str(e)}")
+            raise
+
+    async def execute_many(self, query: Statement, params_seq: Sequence[Params]) -> int:
+        """在一个事务中批量执行；驱动无法统计时返回 -1"""
+        params_list = list(params_seq)
+        if not params_list:
+            return 0
+        try:
+            with self._lease() as engine:
+                async with engine.begin() as connection:
+                    result = await connection.execute(as_statement(query), params_list)
+                    return result.rowcount
+        except SQLAlchemyError as e:
+            logger.error(f"批量执行失败: {str(e)}")
+            raise
+
+    def register_statement(self, name: str, query: str) -> TextClause:
+        statement = self.statements[name] = as_statement(query)
+        return statement
+
+    async def execute_named(self, name: str, params: Optional[Params] = None) -> List[Dict[str, Any]]:
+        statement = self.statements.get(name)
+        if statement is None:
+            raise KeyError(f"未登记的语句: {name}")
+        return await self.execute(statement, params)
+
+    async def aiter_query(self, query: Statement, batch_size: int = GAME_DB_STREAM_BATCH_SIZE, *,
+                          params: Optional[Params] = None) -> AsyncIterator[Dict[str, Any]]:
+        """使用服务端游标流式读取"""
+        with self._lease() as engine:
+            async with engine.connect() as connection:
+                result = await connection.stream(
+                    as_statement(query),
+                    params or {},
+                    execution_options={"yield_per": batch_size}
+                )
+                async for partition in result.mappings().partitions(batch_size):
+                    for row in partition:
+                        yield dict(row)
+
+    async def test_connection(self) -> bool:
+        try:
+            with self._lease() as engine:
+                async with engine.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.error(f"连接测试失败: {str(e)}")
+            return False
+
+
+class AsyncPostgreSQLConnector(AsyncSQLAlchemyConnector):
+    """PostgreSQL 异步连接器（asyncpg）"""
+
+    url_scheme = "postgresql+asyncpg"
+    label = "PostgreSQL"
+
+    def _connection_string(self) -> str:
+        # asyncpg 在每个连接上按 SQL 文本缓存服务端预处理语句，参数化查询重复执行时跳过解析和规划
+        return f"{super()._connection_string()}?prepared_statement_cache_size={GAME_DB_PREPARED_CACHE_SIZE}"
+
+
+class AsyncMySQLConnector(AsyncSQLAlchemyConnector):
+    """MySQL 异步连接器（aiomysql）"""
+
+    url_scheme = "mysql+aiomysql"
+    label = "MySQL"
+
+
+class AsyncSQLiteConnector(AsyncSQLAlchemyConnector):
+    """SQLite 异步连接器（aiosqlite，db_name 为数据库文件路径）"""
+
+    label = "SQLite"
+
+    def _connection_string(self) -> str:
+        return f"sqlite+aiosqlite:///{self.config.db_name}"
+
+
+class AsyncMongoDBConnector(AsyncDatabaseConnector):
+    """MongoDB 异步连接器（motor，客户端由注册表共享，每次操作时借用）"""
+
+    def _create_client(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        connection_string = (
+            f"mongodb://{self.config.db_user}:{self.config.db_password}"
+            f"@{self.config.db_host}:{self.config.db_port}/"
+        )
+        return AsyncIOMotorClient(connection_string, maxPoolSize=mongo_pool_size(self.config))
+
+    def _registry_args(self) -> Dict[str, Any]:
+        # 没有借用方时即为空闲，借用期间不会被关闭
+        return dict(
+            key=_registry_key(self.config, "mongodb_async"),
+            version=self.config.updated_at,
+            factory=self._create_client,
+            cost=mongo_pool_size(self.config),
+            dispose=lambda client: client.close(),
+        )
+
+    def _lease(self):
+        """借用共享客户端（with 块内不会被注册表淘汰或关闭）"""
+        return get_registry().lease(**self._registry_args())
+
+    @property
+    def client(self):
+        """当前共享的客户端（执行查询使用 _lease()）"""
+        return get_registry().acquire(**self._registry_args())
+
+    async def connect(self) -> bool:
+        try:
+            with self._lease() as client:
+                # 测试连接
+                await client.admin.command('ping')
+            logger.info(f"成功连接到 MongoDB 数据库（异步）: {self.config.game_name}")
+            return True
+        except Exception as e:
+            logger.error(f"连接 MongoDB 失败: {str(e)}")
+            return False
+
+    async def disconnect(self):
+        # 客户端归注册表所有，连接器不持有客户端
+        pass
+
+    async def execute_query(self, query: Dict[str, Any], collection: str) -> List[Dict[str, Any]]:
+        """执行 MongoDB 查询（query 是 MongoDB 查询字典）"""
+        try:
+            with self._lease() as client:
+                return await client[self.config.db_name][collection].find(query).to_list(length=None)
+        except Exception as e:
+            logger.error(f"查询执行失败: {str(e)}")
+            raise
+
+    async def _reject_sql(self, *args, **kwargs):
+        raise NotImplementedError(MONGO_SQL_UNSUPPORTED)
+
+    def register_statement(self, name: str, query: str):
+        raise NotImplementedError(MONGO_SQL_UNSUPPORTED)
+
+    execute = execute_many = execute_named = _reject_sql
+
+    async def aiter_query(self, query: Dict[str, Any], collection: str,
+                          batch_size: int = GAME_DB_STREAM_BATCH_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        """按批次迭代游标"""
+        with self._lease() as client:
+            cursor = client[self.config.db_name][collection].find(query).batch_size(batch_size)
+            try:
+                async for document in cursor:
+                    yield document
+            finally:
+                await cursor.close()
+
+    async def test_connection(self) -> bool:
+        try:
+            with self._lease() as client:
+                await client.admin.command('ping')
+            return True
+        except Exception as e:
+            logger.error(f"连接测试失败: {str(e)}")
+            return False
+
+
+def create_async_connector(config: GameConfig) -> Optional[AsyncDatabaseConnector]:
+    """根据配置创建相应的异步数据库连接器"""
+    db_type = config.db_type.lower()
+
+    if db_type == "postgresql":
+        return AsyncPostgreSQLConnector(config)
+    elif db_type == "mysql":
+        return AsyncMySQLConnector(config)
+    elif db_type == "mongodb":
+        return AsyncMongoDBConnector(config)
+    elif db_type == "sqlite":
+        return AsyncSQLiteConnector(config)
+    else:
+        logger.error(f"不支持的数据库类型: {db_type}")
+        return None
@@ -0,0 +1,263 @@
+"""
+游戏数据库连接池注册表
+进程内共享各游戏的 SQLAlchemy 引擎和 MongoClient，并限制所有游戏的总连接数
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 所有游戏数据库连接池的连接数上限（pool_size + max_overflow 之和）
+GAME_DB_MAX_CONNECTIONS = int(os.getenv("GAME_DB_MAX_CONNECTIONS", "200"))
+# 超过这段时间未使用的空闲连接池由后台任务释放（0 表示不释放），以及检查间隔
+GAME_DB_IDLE_TIMEOUT = float(os.getenv("GAME_DB_IDLE_TIMEOUT", "600"))
+GAME_DB_IDLE_CHECK_INTERVAL = float(os.getenv("GAME_DB_IDLE_CHECK_INTERVAL", "60"))
+
+IdleCheck = Optional[Callable[[Any], bool]]
+
+
+def _is_newer(incoming: Any, current: Any) -> bool:
+    """incoming 是否是比 current 更新的配置版本（None 表示未知版本，最旧）"""
+    if incoming is None or incoming == current:
+        return False
+    if current is None:
+        return True
+    try:
+        return incoming > current
+    except TypeError:
+        # 版本无法比较时保留当前连接池，避免交替的请求反复重建
+        return False
+
+
+class ConnectorBudgetExceeded(Exception):
+    """全局连接预算不足，且没有可淘汰的空闲连接池"""
+
+
+class _RegistryEntry:
+    __slots__ = ("resource", "version", "cost", "dispose", "is_idle", "created_at", "last_used_at",
+                 "leases", "retired")
+
+    def __init__(self, resource, version, cost, dispose, is_idle):
+        self.resource = resource
+        self.version = version
+        self.cost = cost
+        self.dispose = dispose
+        self.is_idle = is_idle
+        self.created_at = time.time()
+        self.last_used_at = self.created_at
+        # 正在借用的次数；被淘汰或重建时仍有借用的资源等最后一次归还后再释放
+        self.leases = 0
+        self.retired = False
+
+    def idle(self) -> bool:
+        """没有借用方，且资源自身的检查（如连接池没有借出的连接）认为空闲"""
+        return self.leases == 0 and (self.is_idle is None or self.is_idle(self.resource))
+
+
+class ConnectorRegistry:
+    """
+    按 (游戏, 连接类型) 缓存连接资源
+
+    - 同一个 GameConfig 的所有连接器共用一个引擎/客户端
+    - GameConfig 的版本（updated_at）更新时重建连接池；持有旧配置快照的调用方继续使用当前连接池
+    - 总连接预算不足时按 LRU 淘汰空闲的连接池，长时间未使用的由 evict_idle 释放
+    - 连接器通过 lease() 借用资源，借用期间不会被淘汰；
+      重建时旧资源等最后一个借用方归还后再释放，此前仍计入连接预算
+    """
+
+    def __init__(self, max_connections: int = 200):
+        self.max_connections = max_connections
+        self._entries: "OrderedDict[Hashable, _RegistryEntry]" = OrderedDict()
+        self._retired: List[_RegistryEntry] = []
+        self._lock = threading.RLock()
+        self._task = None
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+        self.rebuilt = 0
+
+    @property
+    def total_cost(self) -> int:
+        return sum(entry.cost for entry in self._entries.values()) + sum(entry.cost for entry in self._retired)
+
+    def acquire(
+        self,
+        key: Hashable,
+        version: Any,
+        factory: Callable[[], Any],
+        cost: int,
+        dispose: Callable[[Any], None],
+        is_idle: IdleCheck = None,
+    ) -> Any:
+        """
+        获取共享资源，不存在或版本过期时通过 factory 创建
+
+        返回的资源随时可能被淘汰或重建，执行查询时应使用 lease()。
+        """
+        return self._acquire_entry(key, version, factory, cost, dispose, is_idle).resource
+
+    @contextmanager
+    def lease(
+        self,
+        key: Hashable,
+        version: Any,
+        factory: Callable[[], Any],
+        cost: int,
+        dispose: Callable[[Any], None],
+        is_idle: IdleCheck = None,
+    ) -> Iterator[Any]:
+        """借用共享资源（参数同 acquire），with 块结束前不会被淘汰或释放"""
+        with self._lock:
+            entry = self._acquire_entry(key, version, factory, cost, dispose, is_idle)
+            entry.leases += 1
+        try:
+            yield entry.resource
+        finally:
+            with self._lock:
+                entry.leases -= 1
+                entry.last_used_at = time.time()
+                if entry.retired and entry.leases == 0:
+                    self._retired.remove(entry)
+                    self._dispose(key, entry)
+
+    def _acquire_entry(self, key, version, factory, cost, dispose, is_idle) -> _RegistryEntry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and _is_newer(version, entry.version):
+                logger.info(f"游戏数据库配置已变更，重建连接池: {key}")
+                self._remove(key)
+                self.rebuilt += 1
+                entry = None
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.last_used_at = time.time()
+                self.reused += 1
+                return entry
+
+            self._make_room(cost)
+            entry = self._entries[key] = _RegistryEntry(factory(), version, cost, dispose, is_idle)
+            self.created += 1
+            return entry
+
+    def _make_room(self, cost: int):
+        """按 LRU 顺序淘汰空闲连接池，直到预算足够"""
+        if self.total_cost + cost <= self.max_connections:
+            return
+        for key in list(self._entries.keys()):
+            entry = self._entries[key]
+            if not entry.idle():
+                continue
+            self._remove(key)
+            self.evicted += 1
+            if self.total_cost + cost <= self.max_connections:
+                return
+        raise ConnectorBudgetExceeded(
+            f"游戏数据库连接预算不足: 已用 {self.total_cost}, 需要 {cost}, 上限 {self.max_connections}"
+        )
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        if entry.leases > 0:
+            # 仍有借用方（配置变更重建、close_all），归还后再释放
+            entry.retired = True
+            self._retired.append(entry)
+            return
+        self._dispose(key, entry)
+
+    def _dispose(self, key: Hashable, entry: _RegistryEntry):
+        try:
+            entry.dispose(entry.resource)
+        except Exception as e:
+            logger.error(f"释放连接池失败 {key}: {str(e)}")
+
+    def invalidate(self, key: Hashable):
+        """释放指定游戏的连接池"""
+        with self._lock:
+            self._remove(key)
+
+    def evict_idle(self, max_idle_seconds: float) -> int:
+        """释放超过 max_idle_seconds 未使用的空闲连接池"""
+        cutoff = time.time() - max_idle_seconds
+        evicted = 0
+        with self._lock:
+            for key in list(self._entries.keys()):
+                entry = self._entries[key]
+                if entry.last_used_at < cutoff and entry.idle():
+                    self._remove(key)
+                    evicted += 1
+            self.evicted += evicted
+        return evicted
+
+    def resources(self) -> List[Tuple[Hashable, Any]]:
+        """当前缓存的 (键, 资源) 快照"""
+        with self._lock:
+            return [(key, entry.resource) for key, entry in self._entries.items()]
+
+    def close_all(self):
+        """释放所有连接池（进程退出时调用）"""
+        with self._lock:
+            for key in list(self._entries.keys()):
+                self._remove(key)
+
+    async def _run_idle_eviction(self, max_idle_seconds: float, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                # 在事件循环线程中执行：异步引擎需要在创建它的事件循环中关闭
+                evicted = self.evict_idle(max_idle_seconds)
+                if evicted:
+                    logger.info(f"释放了 {evicted} 个空闲的游戏数据库连接池")
+            except Exception as e:
+                logger.error(f"释放空闲连接池失败: {str(e)}")
+
+    def start(self, max_idle_seconds: float = GAME_DB_IDLE_TIMEOUT, interval: float = GAME_DB_IDLE_CHECK_INTERVAL):
+        """启动定期释放空闲连接池的后台任务（需要在事件循环中调用）"""
+        if self._task is None and max_idle_seconds > 0:
+            self._task = asyncio.get_running_loop().create_task(
+                self._run_idle_eviction(max_idle_seconds, interval)
+            )
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "retired": len(self._retired),
+                "connection_budget": self.max_connections,
+                "connections_reserved": self.total_cost,
+                "created": self.created,
+                "reused": self.reused,
+                "evicted": self.evicted,
+                "rebuilt": self.rebuilt,
+            }
+
+
+_registry: Optional[ConnectorRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ConnectorRegistry:
+    """进程级单例注册表"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ConnectorRegistry(max_connections=GAME_DB_MAX_CONNECTIONS)
+    return _registry
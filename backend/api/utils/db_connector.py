@@ -1,17 +1,71 @@
 """
 外部游戏数据库连接管理工具
 支持多种数据库类型：PostgreSQL, MySQL, MongoDB 等
+
+数据库驱动按 db_type 在首次创建连接时才导入（SQLAlchemy 方言在 create_engine 时加载驱动，
+pymongo 在 MongoDBConnector 中导入），不使用某种数据库的节点不会加载对应驱动。
 """
+from contextlib import aclosing, closing
+from functools import lru_cache
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
-from typing import Dict, Any, Optional, List
-import pymongo
-from pymongo import MongoClient
+from sqlalchemy.sql.elements import TextClause
+from typing import Dict, Any, Optional, List, Iterator, AsyncIterator, Sequence, Union
 from models import GameConfig
+from utils.connector_registry import get_registry
+from utils.db_instrumentation import TimedQueuePool, instrument_engine
+from utils.pool_config import GAME_POOL_SETTINGS, PoolSettings
+from utils.streaming import iterate_in_threadpool_closing
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# 游戏数据库连接池默认参数见 utils.pool_config（GAME_DB_*），MongoDB 单独配置
+GAME_MONGO_POOL_SIZE = int(os.getenv("GAME_MONGO_POOL_SIZE", "10"))
+# 流式查询每批读取的行数
+GAME_DB_STREAM_BATCH_SIZE = int(os.getenv("GAME_DB_STREAM_BATCH_SIZE", "1000"))
+# 缓存的 SQL 语句对象数量（所有连接器共享）
+GAME_DB_STATEMENT_CACHE_SIZE = int(os.getenv("GAME_DB_STATEMENT_CACHE_SIZE", "512"))
+
+Params = Dict[str, Any]
+Statement = Union[str, TextClause]
+
+MONGO_SQL_UNSUPPORTED = "MongoDB 连接器不支持 SQL 查询，请使用 execute_query(查询字典, collection)"
+
+
+@lru_cache(maxsize=GAME_DB_STATEMENT_CACHE_SIZE)
+def _text_clause(query: str) -> TextClause:
+    """
+    复用同一 SQL 文本的 TextClause
+
+    参数通过 :name 绑定而不是拼接进 SQL，相同语句的文本不变，
+    可以命中 SQLAlchemy 的编译缓存和驱动/服务端的语句缓存。
+    """
+    return text(query)
+
+
+def as_statement(query: Statement) -> TextClause:
+    """把 SQL 字符串转换为（缓存的）TextClause，已经是语句对象的原样返回"""
+    if isinstance(query, str):
+        return _text_clause(query)
+    return query
+
+
+def _registry_key(config: GameConfig, kind: str):
+    """注册表键：游戏 ID + 连接类型"""
+    return (config.id or config.game_name, kind)
+
+
+def game_pool_settings(config: GameConfig) -> PoolSettings:
+    """游戏数据库的连接池参数：GAME_DB_* 默认值，再应用 GameConfig.pool_options"""
+    return GAME_POOL_SETTINGS.merged(config.pool_options)
+
+
+def mongo_pool_size(config: GameConfig) -> int:
+    """MongoDB 客户端的 maxPoolSize（pool_options 中只有 pool_size 对 MongoDB 生效）"""
+    return int((config.pool_options or {}).get("pool_size", GAME_MONGO_POOL_SIZE))
+
 
 class DatabaseConnector:
     """数据库连接器基类"""
@@ -32,177 +86,328 @@ class DatabaseConnector:
         """执行查询"""
         raise NotImplementedError
     
+    def execute(self, query: Statement, params: Optional[Params] = None) -> List[Dict[str, Any]]:
+        """执行参数化查询，参数以 :name 形式绑定"""
+        raise NotImplementedError
+
+    def execute_many(self, query: Statement, params_seq: Sequence[Params]) -> int:
+        """用多组参数批量执行同一语句（executemany），返回影响的行数"""
+        raise NotImplementedError
+
+    def register_statement(self, name: str, query: str) -> TextClause:
+        """
+        登记命名语句，之后通过 execute_named 按名称重复执行
+
+        只在进程内保存语句对象（省去 SQL 文本到 TextClause 的转换和编译缓存查找），
+        不会在数据库上创建预处理语句；服务端是否复用执行计划取决于驱动，
+        见 AsyncPostgreSQLConnector（asyncpg 按连接缓存预处理语句）。
+        """
+        raise NotImplementedError
+
+    def execute_named(self, name: str, params: Optional[Params] = None) -> List[Dict[str, Any]]:
+        """执行已登记的命名语句"""
+        raise NotImplementedError
+
     def test_connection(self) -> bool:
         """测试连接"""
         raise NotImplementedError
 
+    def ping(self):
+        """执行一次最小的查询，失败时抛出异常，不记录日志（用于就绪探测）"""
+        raise NotImplementedError
+
+    def iter_query(self, *args, batch_size: int = GAME_DB_STREAM_BATCH_SIZE, **kwargs) -> Iterator[Dict[str, Any]]:
+        """流式执行查询，逐行产出结果，内存中最多保留一批数据"""
+        raise NotImplementedError
+
+    async def aiter_query(self, *args, batch_size: int = GAME_DB_STREAM_BATCH_SIZE, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """iter_query 的异步版本，数据库读取在线程池中进行，不阻塞事件循环（提前退出时关闭游标并归还连接）"""
+        batches = iterate_in_threadpool_closing(self._iter_batches(*args, batch_size=batch_size, **kwargs))
+        async with aclosing(batches):
+            async for batch in batches:
+                for item in batch:
+                    yield item
+
+    def _iter_batches(self, *args, batch_size: int, **kwargs) -> Iterator[List[Dict[str, Any]]]:
+        """按批产出结果，减少线程切换次数"""
+        batch = []
+        with closing(self.iter_query(*args, batch_size=batch_size, **kwargs)) as rows:
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+
+class SQLAlchemyConnector(DatabaseConnector):
+    """
+    基于 SQLAlchemy 的关系型数据库连接器
+
+    引擎由连接池注册表统一管理，同一游戏的所有连接器共享一个连接池；
+    每次查询从注册表借用引擎、从池中借出连接，用完立即归还，
+    注册表淘汰或因配置变更重建连接池后，下一次查询自动使用新的引擎。
+    查询应通过 execute/execute_many 绑定参数，不要把值拼接进 SQL。
+    """
+
+    # 子类覆盖：驱动前缀和日志中显示的名称
+    url_scheme = ""
+    label = ""
+
+    def __init__(self, config: GameConfig):
+        super().__init__(config)
+        self.statements: Dict[str, TextClause] = {}
+        self.pool_settings = game_pool_settings(config)
+
+    def _connection_string(self) -> str:
+        return (
+            f"{self.url_scheme}://{self.config.db_user}:{self.config.db_password}"
+            f"@{self.config.db_host}:{self.config.db_port}/{self.config.db_name}"
+        )
+
+    def _engine_options(self) -> Dict[str, Any]:
+        """子类覆盖：额外的 create_engine 参数"""
+        return {}
+
+    def _create_engine(self):
+        engine = create_engine(
+            self._connection_string(),
+            poolclass=TimedQueuePool,
+            pool_logging_name=f"game_{self.config.game_name}",
+            **self.pool_settings.engine_kwargs(),
+            **self._engine_options()
+        )
+        self.pool_settings.apply(engine)
+        instrument_engine(engine, f"game_{self.config.game_name}")
+        return engine
+
+    def _registry_args(self) -> Dict[str, Any]:
+        return dict(
+            key=_registry_key(self.config, "sqlalchemy"),
+            version=self.config.updated_at,
+            factory=self._create_engine,
+            cost=self.pool_settings.capacity,
+            dispose=lambda engine: engine.dispose(),
+            is_idle=lambda engine: engine.pool.checkedout() == 0,
+        )
+
+    def _lease(self):
+        """借用共享引擎（with 块内不会被注册表淘汰或释放）"""
+        return get_registry().lease(**self._registry_args())
+
+    @property
+    def engine(self):
+        """当前共享的引擎（用于查看连接池状态；执行查询使用 _lease()）"""
+        return get_registry().acquire(**self._registry_args())
 
-class PostgreSQLConnector(DatabaseConnector):
-    """PostgreSQL 连接器"""
-    
     def connect(self) -> bool:
         try:
-            connection_string = (
-                f"postgresql://{self.config.db_user}:{self.config.db_password}"
-                f"@{self.config.db_host}:{self.config.db_port}/{self.config.db_name}"
-            )
-            self.engine = create_engine(
-                connection_string,
-                pool_pre_ping=True,
-                pool_size=5,
-                max_overflow=10
-            )
-            self.connection = self.engine.connect()
-            logger.info(f"成功连接到 PostgreSQL 数据库: {self.config.game_name}")
+            with self._lease() as engine, engine.connect():
+                pass
+            logger.info(f"成功连接到 {self.label} 数据库: {self.config.game_name}")
             return True
         except Exception as e:
-            logger.error(f"连接 PostgreSQL 失败: {str(e)}")
+            logger.error(f"连接 {self.label} 失败: {str(e)}")
             return False
-    
+
     def disconnect(self):
-        if self.connection:
-            self.connection.close()
-        if hasattr(self, 'engine'):
-            self.engine.dispose()
-    
-    def execute_query(self, query: str) -> List[Dict[str, Any]]:
+        # 引擎归注册表所有，连接器不持有引擎和连接
+        pass
+
+    def execute_query(self, query: Statement, params: Optional[Params] = None) -> List[Dict[str, Any]]:
+        return self.execute(query, params)
+
+    def execute(self, query: Statement, params: Optional[Params] = None) -> List[Dict[str, Any]]:
         try:
-            if not self.connection:
-                self.connect()
-            
-            result = self.connection.execute(text(query))
-            columns = result.keys()
-            rows = result.fetchall()
-            
+            with self._lease() as engine, engine.connect() as connection:
+                result = connection.execute(as_statement(query), params or {})
+                columns = result.keys()
+                rows = result.fetchall()
+
             return [dict(zip(columns, row)) for row in rows]
         except SQLAlchemyError as e:
             logger.error(f"查询执行失败: {str(e)}")
             raise
-    
-    def test_connection(self) -> bool:
-        try:
-            if not self.connection:
-                if not self.connect():
-                    return False
-            self.connection.execute(text("SELECT 1"))
-            return True
-        except Exception as e:
-            logger.error(f"连接测试失败: {str(e)}")
-            return False
-
 
-class MySQLConnector(DatabaseConnector):
-    """MySQL 连接器"""
-    
-    def connect(self) -> bool:
-        try:
-            connection_string = (
-                f"mysql+pymysql://{self.config.db_user}:{self.config.db_password}"
-                f"@{self.config.db_host}:{self.config.db_port}/{self.config.db_name}"
-            )
-            self.engine = create_engine(
-                connection_string,
-                pool_pre_ping=True,
-                pool_size=5,
-                max_overflow=10
-            )
-            self.connection = self.engine.connect()
-            logger.info(f"成功连接到 MySQL 数据库: {self.config.game_name}")
-            return True
-        except Exception as e:
-            logger.error(f"连接 MySQL 失败: {str(e)}")
-            return False
-    
-    def disconnect(self):
-        if self.connection:
-            self.connection.close()
-        if hasattr(self, 'engine'):
-            self.engine.dispose()
-    
-    def execute_query(self, query: str) -> List[Dict[str, Any]]:
+    def execute_many(self, query: Statement, params_seq: Sequence[Params]) -> int:
+        """在一个事务中批量执行；驱动无法统计时返回 -1"""
+        params_list = list(params_seq)
+        if not params_list:
+            return 0
         try:
-            if not self.connection:
-                self.connect()
-            
-            result = self.connection.execute(text(query))
-            columns = result.keys()
-            rows = result.fetchall()
-            
-            return [dict(zip(columns, row)) for row in rows]
+            with self._lease() as engine, engine.begin() as connection:
+                result = connection.execute(as_statement(query), params_list)
+                return result.rowcount
         except SQLAlchemyError as e:
-            logger.error(f"查询执行失败: {str(e)}")
+            logger.error(f"批量执行失败: {str(e)}")
             raise
-    
+
+    def register_statement(self, name: str, query: str) -> TextClause:
+        statement = self.statements[name] = as_statement(query)
+        return statement
+
+    def execute_named(self, name: str, params: Optional[Params] = None) -> List[Dict[str, Any]]:
+        statement = self.statements.get(name)
+        if statement is None:
+            raise KeyError(f"未登记的语句: {name}")
+        return self.execute(statement, params)
+
+    def iter_query(self, query: Statement, batch_size: int = GAME_DB_STREAM_BATCH_SIZE, *,
+                   params: Optional[Params] = None) -> Iterator[Dict[str, Any]]:
+        """使用服务端游标流式读取（SQLite 等不支持的驱动会退化为逐批 fetch）"""
+        with self._lease() as engine, engine.connect() as connection:
+            result = connection.execution_options(
+                stream_results=True,
+                yield_per=batch_size
+            ).execute(as_statement(query), params or {})
+            for partition in result.mappings().partitions(batch_size):
+                for row in partition:
+                    yield dict(row)
+
+    def ping(self):
+        with self._lease() as engine, engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
     def test_connection(self) -> bool:
         try:
-            if not self.connection:
-                if not self.connect():
-                    return False
-            self.connection.execute(text("SELECT 1"))
+            self.ping()
             return True
         except Exception as e:
             logger.error(f"连接测试失败: {str(e)}")
             return False
 
 
+class PostgreSQLConnector(SQLAlchemyConnector):
+    """PostgreSQL 连接器"""
+
+    url_scheme = "postgresql"
+    label = "PostgreSQL"
+
+
+class MySQLConnector(SQLAlchemyConnector):
+    """MySQL 连接器"""
+
+    url_scheme = "mysql+pymysql"
+    label = "MySQL"
+
+
+class SQLiteConnector(SQLAlchemyConnector):
+    """SQLite 连接器（db_name 为数据库文件路径，用于本地开发和测试替身）"""
+
+    label = "SQLite"
+
+    def _connection_string(self) -> str:
+        return f"sqlite:///{self.config.db_name}"
+
+    def _engine_options(self) -> Dict[str, Any]:
+        return {"connect_args": {"check_same_thread": False}}
+
+
 class MongoDBConnector(DatabaseConnector):
-    """MongoDB 连接器"""
-    
+    """MongoDB 连接器（MongoClient 由注册表共享，每次操作时借用）"""
+
+    def _create_client(self):
+        from pymongo import MongoClient
+
+        connection_string = (
+            f"mongodb://{self.config.db_user}:{self.config.db_password}"
+            f"@{self.config.db_host}:{self.config.db_port}/"
+        )
+        return MongoClient(connection_string, maxPoolSize=mongo_pool_size(self.config))
+
+    def _registry_args(self) -> Dict[str, Any]:
+        # 没有借用方时即为空闲：MongoClient 不暴露已借出的连接数，借用期间不会被关闭
+        return dict(
+            key=_registry_key(self.config, "mongodb"),
+            version=self.config.updated_at,
+            factory=self._create_client,
+            cost=mongo_pool_size(self.config),
+            dispose=lambda client: client.close(),
+        )
+
+    def _lease(self):
+        """借用共享客户端（with 块内不会被注册表淘汰或关闭）"""
+        return get_registry().lease(**self._registry_args())
+
+    @property
+    def client(self):
+        """当前共享的客户端（执行查询使用 _lease()）"""
+        return get_registry().acquire(**self._registry_args())
+
     def connect(self) -> bool:
         try:
-            connection_string = (
-                f"mongodb://{self.config.db_user}:{self.config.db_password}"
-                f"@{self.config.db_host}:{self.config.db_port}/"
-            )
-            self.client = MongoClient(connection_string)
-            self.db = self.client[self.config.db_name]
-            # 测试连接
-            self.client.admin.command('ping')
+            with self._lease() as client:
+                # 测试连接
+                client.admin.command('ping')
             logger.info(f"成功连接到 MongoDB 数据库: {self.config.game_name}")
             return True
         except Exception as e:
             logger.error(f"连接 MongoDB 失败: {str(e)}")
             return False
-    
+
     def disconnect(self):
-        if hasattr(self, 'client'):
-            self.client.close()
-    
+        # 客户端归注册表所有，连接器不持有客户端
+        pass
+
     def execute_query(self, query: Dict[str, Any], collection: str) -> List[Dict[str, Any]]:
         """执行 MongoDB 查询（query 是 MongoDB 查询字典）"""
         try:
-            if not hasattr(self, 'db'):
-                self.connect()
-            
-            collection_obj = self.db[collection]
-            results = collection_obj.find(query)
-            return list(results)
+            with self._lease() as client:
+                return list(client[self.config.db_name][collection].find(query))
         except Exception as e:
             logger.error(f"查询执行失败: {str(e)}")
             raise
-    
+
+    def _reject_sql(self, *args, **kwargs):
+        raise NotImplementedError(MONGO_SQL_UNSUPPORTED)
+
+    execute = execute_many = register_statement = execute_named = _reject_sql
+
+    def iter_query(self, query: Dict[str, Any], collection: str,
+                   batch_size: int = GAME_DB_STREAM_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+        """按批次迭代游标，不一次性加载全部文档"""
+        with self._lease() as client:
+            cursor = client[self.config.db_name][collection].find(query).batch_size(batch_size)
+            try:
+                for document in cursor:
+                    yield document
+            finally:
+                cursor.close()
+
+    def ping(self):
+        with self._lease() as client:
+            client.admin.command('ping')
+
     def test_connection(self) -> bool:
         try:
-            if not hasattr(self, 'client'):
-                if not self.connect():
-                    return False
-            self.client.admin.command('ping')
+            self.ping()
             return True
         except Exception as e:
             logger.error(f"连接测试失败: {str(e)}")
             return False
 
 
-def create_connector(config: GameConfig) -> Optional[DatabaseConnector]:
-    """根据配置创建相应的数据库连接器"""
+def create_connector(config: GameConfig, use_async: bool = False):
+    """
+    根据配置创建相应的数据库连接器（连接池由注册表共享）
+
+    use_async=True 时返回 AsyncDatabaseConnector（方法均为协程）
+    """
+    if use_async:
+        from utils.async_db_connector import create_async_connector
+        return create_async_connector(config)
+
     db_type = config.db_type.lower()
-    
+
     if db_type == "postgresql":
         return PostgreSQLConnector(config)
     elif db_type == "mysql":
         return MySQLConnector(config)
     elif db_type == "mongodb":
         return MongoDBConnector(config)
+    elif db_type == "sqlite":
+        return SQLiteConnector(config)
     else:
         logger.error(f"不支持的数据库类型: {db_type}")
         return None
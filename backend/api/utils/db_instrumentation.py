@@ -0,0 +1,145 @@
+"""
+SQLAlchemy 引擎与连接池的指标采集
+"""
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from utils.metrics import REGISTRY
+
+db_queries_total = REGISTRY.counter(
+    "db_queries_total", "执行的 SQL 语句数", ("engine",)
+)
+db_query_duration_seconds = REGISTRY.histogram(
+    "db_query_duration_seconds", "SQL 语句耗时（秒）", ("engine",)
+)
+db_pool_checkout_wait_seconds = REGISTRY.histogram(
+    "db_pool_checkout_wait_seconds", "从连接池借出连接的等待时间（秒）", ("pool",)
+)
+db_pool_checkout_timeouts_total = REGISTRY.counter(
+    "db_pool_checkout_timeouts_total", "等待连接超过 pool_timeout 的次数", ("pool",)
+)
+
+# 每个连接池保留最近多少次借出等待时间，用于 /api/pools 计算分位数
+DB_POOL_WAIT_SAMPLES = int(os.getenv("DB_POOL_WAIT_SAMPLES", "2048"))
+
+
+class _CheckoutTimingMixin:
+    """记录每次从连接池借出连接的等待时间（标签取自 pool_logging_name）"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        label = getattr(self, "logging_name", None) or "default"
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.checkout_timeouts = getattr(self, "checkout_timeouts", 0) + 1
+            db_pool_checkout_timeouts_total.inc(label)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            db_pool_checkout_wait_seconds.observe(elapsed, label)
+            self._wait_samples().append(elapsed)
+
+    def _wait_samples(self) -> deque:
+        samples = self.__dict__.get("_checkout_wait_samples")
+        if samples is None:
+            samples = self.__dict__.setdefault(
+                "_checkout_wait_samples", deque(maxlen=DB_POOL_WAIT_SAMPLES)
+            )
+        return samples
+
+
+class TimedQueuePool(_CheckoutTimingMixin, QueuePool):
+    """带借出等待计时的 QueuePool"""
+
+
+class TimedAsyncAdaptedQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    """带借出等待计时的 AsyncAdaptedQueuePool"""
+
+
+def instrument_engine(engine, label: str):
+    """为引擎注册语句计时事件（AsyncEngine 传入其 sync_engine）"""
+    engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start_time"].pop()
+        db_query_duration_seconds.observe(time.perf_counter() - start, label)
+        db_queries_total.inc(label)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        conn = context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
+
+
+def pool_collector(engine, label: str):
+    """连接池状态 collector：大小、已借出、溢出和空闲连接数"""
+    engine = getattr(engine, "sync_engine", engine)
+
+    def collect() -> Iterable[Tuple[str, str, Dict[str, str], float]]:
+        pool = engine.pool
+        labels = {"pool": label}
+        if not hasattr(pool, "checkedout"):
+            return
+        yield "db_pool_size", "连接池大小", labels, pool.size()
+        yield "db_pool_checked_out", "已借出的连接数", labels, pool.checkedout()
+        yield "db_pool_checked_in", "池中空闲的连接数", labels, pool.checkedin()
+        yield "db_pool_overflow", "溢出连接数", labels, pool.overflow()
+    return collect
+
+
+def _percentile_ms(ordered, pct: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return round(ordered[rank - 1] * 1000, 3)
+
+
+def pool_stats(engine, label: Optional[str] = None) -> Dict[str, Any]:
+    """
+    连接池当前状态和最近的借出等待时间，用于根据实际负载调整连接池大小
+
+    saturation 为已借出连接数占 pool_size + max_overflow 的比例；
+    接近 1 且等待时间上升说明连接池偏小，长期很低说明可以调小。
+    """
+    engine = getattr(engine, "sync_engine", engine)
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool": label or getattr(pool, "logging_name", None) or "default"}
+    if not hasattr(pool, "checkedout"):
+        return stats
+
+    capacity = pool.size() + max(0, getattr(pool, "_max_overflow", 0))
+    checked_out = pool.checkedout()
+    samples = getattr(pool, "__dict__", {}).get("_checkout_wait_samples")
+    ordered = sorted(samples) if samples else []
+    stats.update({
+        "size": pool.size(),
+        "capacity": capacity,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "saturation": round(checked_out / capacity, 4) if capacity else 0.0,
+        "timeout_s": pool.timeout(),
+        "checkout_timeouts": getattr(pool, "checkout_timeouts", 0),
+        "checkout_wait": {
+            "samples": len(ordered),
+            "p50_ms": _percentile_ms(ordered, 50),
+            "p95_ms": _percentile_ms(ordered, 95),
+            "p99_ms": _percentile_ms(ordered, 99),
+            "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        },
+    })
+    return stats
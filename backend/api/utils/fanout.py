@@ -0,0 +1,141 @@
+"""
+多游戏数据库并发查询
+对所有启用的游戏数据库执行同一个查询，限制并发数和单个游戏的超时时间，
+某个游戏数据库变慢或不可用时仍返回其余游戏的结果
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Union
+
+from models import GameConfig
+from utils.db_connector import create_connector
+from utils.query_cache import CachedConnector, query_cache
+
+logger = logging.getLogger(__name__)
+
+# 并发查询配置
+GAME_FANOUT_CONCURRENCY = int(os.getenv("GAME_FANOUT_CONCURRENCY", "8"))
+GAME_FANOUT_TIMEOUT = float(os.getenv("GAME_FANOUT_TIMEOUT", "5"))
+
+# 专用线程池：超时的查询仍会占用线程直到数据库返回，避免挤占默认线程池
+_executor = ThreadPoolExecutor(
+    max_workers=GAME_FANOUT_CONCURRENCY * 2,
+    thread_name_prefix="game-fanout"
+)
+
+
+class GameQueryResult:
+    """单个游戏的查询结果"""
+
+    def __init__(self, config: GameConfig):
+        self.game_id = config.id
+        self.game_name = config.game_name
+        self.ok = False
+        self.timed_out = False
+        self.rows: Optional[List[Dict[str, Any]]] = None
+        self.error: Optional[str] = None
+        self.latency_ms = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "game_id": self.game_id,
+            "game_name": self.game_name,
+            "ok": self.ok,
+            "timed_out": self.timed_out,
+            "rows": self.rows,
+            "error": self.error,
+            "latency_ms": round(self.latency_ms, 2),
+        }
+
+
+def load_active_games(db) -> List[GameConfig]:
+    """查询所有启用的游戏配置（同步会话）"""
+    return db.query(GameConfig).filter(GameConfig.is_active == True).all()
+
+
+def _resolve_query(config: GameConfig, query: Union[str, Dict[str, Any]],
+                   collection: Optional[str] = None, params: Optional[Dict[str, Any]] = None):
+    """
+    query 可以是统一的查询，也可以是按 db_type 区分的字典
+
+    MongoDB 连接器只支持 execute_query(查询字典, collection)，SQL、绑定参数在这里直接拒绝，
+    不会在线程池中才报出连接器的 NotImplementedError。
+    """
+    if isinstance(query, dict) and config.db_type.lower() in query:
+        query = query[config.db_type.lower()]
+    elif isinstance(query, dict) and config.db_type.lower() != "mongodb":
+        raise ValueError(f"未提供 {config.db_type} 类型的查询")
+
+    if config.db_type.lower() == "mongodb":
+        if not isinstance(query, dict):
+            raise ValueError("MongoDB 游戏需要提供查询字典（query 中的 mongodb 项）")
+        if not collection:
+            raise ValueError("MongoDB 查询需要指定 collection")
+        if params:
+            raise ValueError("MongoDB 查询不支持 params，请把条件写在查询字典中")
+    return query
+
+
+def _run_query(config: GameConfig, query, collection: Optional[str],
+               cache_ttl: Optional[float] = None,
+               params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    connector = create_connector(config)
+    if connector is None:
+        raise ValueError(f"不支持的数据库类型: {config.db_type}")
+    if cache_ttl is not None:
+        connector = CachedConnector(connector, query_cache, ttl=cache_ttl)
+    try:
+        if config.db_type.lower() == "mongodb":
+            return connector.execute_query(query, collection)
+        return connector.execute(query, params)
+    finally:
+        connector.disconnect()
+
+
+async def fan_out_query(
+    configs: List[GameConfig],
+    query: Union[str, Dict[str, Any]],
+    collection: Optional[str] = None,
+    concurrency: int = GAME_FANOUT_CONCURRENCY,
+    timeout: float = GAME_FANOUT_TIMEOUT,
+    cache_ttl: Optional[float] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> List[GameQueryResult]:
+    """
+    并发地在多个游戏数据库上执行查询
+
+    - query: SQL 字符串，或 {"postgresql": "...", "mongodb": {...}} 形式按 db_type 区分
+    - collection: MongoDB 查询的集合名
+    - params: SQL 查询的绑定参数（:name 形式），不要把值拼接进 SQL
+    - cache_ttl: 设置后通过查询结果缓存执行（适合仪表盘反复执行的聚合查询）
+    - 返回每个游戏一条结果，失败或超时的游戏 ok=False，并带有错误信息和耗时
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(config: GameConfig) -> GameQueryResult:
+        result = GameQueryResult(config)
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                resolved = _resolve_query(config, query, collection, params)
+                result.rows = await asyncio.wait_for(
+                    loop.run_in_executor(_executor, _run_query, config, resolved, collection, cache_ttl, params),
+                    timeout
+                )
+                result.ok = True
+            except asyncio.TimeoutError:
+                result.timed_out = True
+                result.error = f"查询超时（{timeout}s）"
+                logger.warning(f"游戏 {config.game_name} 查询超时")
+            except Exception as e:
+                result.error = str(e)
+                logger.error(f"游戏 {config.game_name} 查询失败: {str(e)}")
+            finally:
+                result.latency_ms = (time.perf_counter() - start) * 1000
+        return result
+
+    return list(await asyncio.gather(*[run_one(config) for config in configs]))
@@ -0,0 +1,209 @@
+"""
+就绪探测
+后台定期检查主数据库和各游戏数据库的连通性并缓存结果，
+负载均衡器高频轮询 /api/ready 时只读取缓存，不会访问数据库
+
+/api/ready 只返回粗粒度的错误（超时 / 连接失败），不暴露主机名、用户名等连接细节；
+详细错误只在探测状态变为失败时记录一次日志。
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from database import SessionLocal, engine
+from utils.db_connector import create_connector
+from utils.fanout import load_active_games
+
+logger = logging.getLogger(__name__)
+
+# 探测配置
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "10"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "3"))
+HEALTH_PROBE_CONCURRENCY = int(os.getenv("HEALTH_PROBE_CONCURRENCY", "8"))
+
+MAIN_DB_PROBE = "main_db"
+
+# 专用线程池：卡住的探测最多占用这些线程，不会挤占请求使用的默认线程池
+_executor = ThreadPoolExecutor(
+    max_workers=HEALTH_PROBE_CONCURRENCY * 2,
+    thread_name_prefix="health-probe"
+)
+
+# 对外返回的错误
+PROBE_ERROR_UNSUPPORTED = "不支持的数据库类型"
+PROBE_ERROR_FAILED = "连接失败"
+
+
+class ProbeResult:
+    """单个探测的最近结果"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.ok = False
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.last_checked_at: Optional[datetime] = None
+        self.last_success_at: Optional[datetime] = None
+
+    def update(self, ok: bool, latency_ms: float, error: Optional[str] = None):
+        now = datetime.utcnow()
+        self.ok = ok
+        self.latency_ms = latency_ms
+        self.error = error
+        self.last_checked_at = now
+        if ok:
+            self.last_success_at = now
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "latency_ms": round(self.latency_ms, 2) if self.latency_ms is not None else None,
+            "error": self.error,
+            "last_checked_at": self.last_checked_at.isoformat() if self.last_checked_at else None,
+            "last_success_at": self.last_success_at.isoformat() if self.last_success_at else None,
+        }
+
+
+def _ping_main_db():
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+def _load_game_configs():
+    db = SessionLocal()
+    try:
+        return load_active_games(db)
+    finally:
+        db.close()
+
+
+def _ping_game(config) -> bool:
+    connector = create_connector(config)
+    if connector is None:
+        return False
+    connector.ping()
+    return True
+
+
+class HealthMonitor:
+    """后台探测任务与结果缓存"""
+
+    def __init__(self, interval: float = 10.0, timeout: float = 3.0, concurrency: int = 8):
+        self.interval = interval
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.results: Dict[str, ProbeResult] = {}
+        self.last_run_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _probe(self, name: str, fn, *args):
+        result = self.results.get(name) or ProbeResult(name)
+        self.results[name] = result
+        was_ok = result.ok or result.last_checked_at is None
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        detail = None
+        try:
+            ok = await asyncio.wait_for(loop.run_in_executor(_executor, fn, *args), self.timeout)
+            ok = ok is not False
+            error = None if ok else PROBE_ERROR_UNSUPPORTED
+        except asyncio.TimeoutError:
+            ok = False
+            error = detail = f"探测超时（{self.timeout}s）"
+        except Exception as e:
+            ok = False
+            error = PROBE_ERROR_FAILED
+            detail = str(e)
+        result.update(ok, (time.perf_counter() - start) * 1000, error)
+
+        # 只在状态变化时记录日志，持续失败的探测不会每轮都刷日志
+        if was_ok and not ok:
+            logger.warning(f"就绪探测失败 {name}: {detail or error}")
+        elif not was_ok and ok:
+            logger.info(f"就绪探测恢复 {name}")
+
+    async def probe_once(self):
+        """执行一轮探测"""
+        await self._probe(MAIN_DB_PROBE, _ping_main_db)
+
+        game_probes: List[str] = []
+        if self.results[MAIN_DB_PROBE].ok:
+            try:
+                configs = await asyncio.get_running_loop().run_in_executor(_executor, _load_game_configs)
+            except Exception as e:
+                logger.error(f"读取游戏配置失败: {str(e)}")
+                configs = None
+
+            if configs is not None:
+                semaphore = asyncio.Semaphore(self.concurrency)
+
+                async def probe_game(config):
+                    async with semaphore:
+                        await self._probe(f"game:{config.game_name}", _ping_game, config)
+
+                game_probes = [f"game:{config.game_name}" for config in configs]
+                await asyncio.gather(*[probe_game(config) for config in configs])
+
+                # 移除已停用游戏的结果
+                for name in list(self.results.keys()):
+                    if name.startswith("game:") and name not in game_probes:
+                        del self.results[name]
+
+        self.last_run_at = datetime.utcnow()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe_once()
+            except Exception as e:
+                logger.error(f"就绪探测失败: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """启动后台探测任务（需要在事件循环中调用）"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        缓存的探测结果
+
+        - ready：主数据库可用，且所有游戏数据库可用
+        - degraded：主数据库可用，但部分游戏数据库不可用
+        - not_ready：主数据库不可用，或尚未完成第一轮探测
+        """
+        main_db = self.results.get(MAIN_DB_PROBE)
+        games = {name: r for name, r in self.results.items() if name.startswith("game:")}
+        if main_db is None or not main_db.ok:
+            status = "not_ready"
+        elif all(result.ok for result in games.values()):
+            status = "ready"
+        else:
+            status = "degraded"
+        return {
+            "status": status,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "probes": {name: result.to_dict() for name, result in self.results.items()},
+        }
+
+
+health_monitor = HealthMonitor(
+    interval=HEALTH_PROBE_INTERVAL,
+    timeout=HEALTH_PROBE_TIMEOUT,
+    concurrency=HEALTH_PROBE_CONCURRENCY
+)
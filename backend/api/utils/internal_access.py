@@ -0,0 +1,29 @@
+"""
+内部运维端点（/metrics 等）的访问控制
+这些端点暴露连接池、缓存和限流等内部状态，只允许持有内部 Token 的调用方（如 Prometheus）访问
+"""
+import os
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+
+# 内部端点的 Bearer Token；未配置时这些端点不对外提供（返回 404）
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN", "")
+
+
+def _bearer_token(authorization: Optional[str]) -> str:
+    scheme, _, token = (authorization or "").partition(" ")
+    return token.strip() if scheme.lower() == "bearer" else ""
+
+
+async def require_internal_token(authorization: Optional[str] = Header(default=None)):
+    """FastAPI 依赖：校验 Authorization: Bearer <INTERNAL_API_TOKEN>"""
+    if not INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not secrets.compare_digest(_bearer_token(authorization).encode(), INTERNAL_API_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="无效的内部访问凭证",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
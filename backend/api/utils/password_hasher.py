@@ -0,0 +1,118 @@
+"""
+密码哈希工作池
+将 bcrypt 等 CPU 密集型计算移出事件循环，交给有界的线程池或进程池执行
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# 工作池配置
+PASSWORD_HASH_POOL = os.getenv("PASSWORD_HASH_POOL", "thread").lower()  # thread 或 process
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+password_hash_duration_seconds = REGISTRY.histogram(
+    "password_hash_duration_seconds",
+    "密码哈希/校验耗时（秒，包含排队时间）",
+    ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0, 5.0)
+)
+
+
+class HasherSaturatedError(Exception):
+    """工作池排队已满，调用方应快速拒绝请求"""
+
+
+class PasswordHasher:
+    """
+    有界的密码哈希执行器
+
+    同时在执行和排队的任务数超过 max_pending 时直接抛出 HasherSaturatedError，
+    而不是无限排队拖慢所有请求。执行器在第一次使用时才创建，
+    以便在预加载应用并 fork 出多个 worker 之后各自拥有独立的池。
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 1, max_pending: int = 64):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"不支持的工作池类型: {kind}")
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(1, max_pending)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.submitted = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers,
+                            thread_name_prefix="password-hash"
+                        )
+                    logger.info(f"密码哈希工作池已创建: {self.kind} x {self.max_workers}")
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """在工作池中执行 fn(*args)，池已满时抛出 HasherSaturatedError"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HasherSaturatedError(
+                    f"密码哈希队列已满 ({self._pending}/{self.max_pending})"
+                )
+            self._pending += 1
+            self.submitted += 1
+
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            password_hash_duration_seconds.observe(time.perf_counter() - start, fn.__name__)
+            with self._lock:
+                self._pending -= 1
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def stats(self) -> Dict[str, Any]:
+        """工作池统计信息"""
+        return {
+            "kind": self.kind,
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self, wait: bool = True):
+        """关闭工作池"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+def create_password_hasher() -> PasswordHasher:
+    """根据环境变量创建密码哈希工作池"""
+    return PasswordHasher(
+        kind=PASSWORD_HASH_POOL,
+        max_workers=PASSWORD_HASH_WORKERS,
+        max_pending=PASSWORD_HASH_MAX_PENDING
+    )
@@ -0,0 +1,112 @@
+"""
+密码哈希策略
+根据配置构建 CryptContext，并支持在启动时按目标耗时自动校准 bcrypt 成本
+"""
+import logging
+import math
+import os
+import time
+from typing import List, Optional
+
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+# 哈希方案，逗号分隔；第一个用于新密码，其余仅用于校验旧哈希并在登录时自动升级
+PASSWORD_HASH_SCHEMES = os.getenv("PASSWORD_HASH_SCHEMES", "bcrypt")
+# bcrypt 成本：留空使用 passlib 默认值，"auto" 按 PASSWORD_HASH_TARGET_MS 自动校准
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS", "")
+PASSWORD_HASH_TARGET_MS = float(os.getenv("PASSWORD_HASH_TARGET_MS", "250"))
+# argon2 参数（需要安装 argon2-cffi）
+ARGON2_TIME_COST = os.getenv("ARGON2_TIME_COST", "")
+ARGON2_MEMORY_COST = os.getenv("ARGON2_MEMORY_COST", "")
+ARGON2_PARALLELISM = os.getenv("ARGON2_PARALLELISM", "")
+
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+
+
+def _argon2_available() -> bool:
+    try:
+        import argon2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def measure_bcrypt_ms(rounds: int, samples: int = 3) -> float:
+    """测量指定成本下一次 bcrypt 计算的耗时（毫秒，取最小值）"""
+    from passlib.hash import bcrypt
+
+    secret = "calibration-password"
+    best = float("inf")
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.using(rounds=rounds).hash(secret)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def calibrate_bcrypt_rounds(target_ms: float) -> int:
+    """
+    选择耗时不超过 target_ms 的最大 bcrypt 成本
+
+    成本每加 1 耗时翻倍，因此只需测量最低成本一次再推算。
+    """
+    base_ms = measure_bcrypt_ms(BCRYPT_MIN_ROUNDS)
+    extra = math.floor(math.log2(target_ms / base_ms)) if base_ms > 0 and target_ms > base_ms else 0
+    rounds = max(BCRYPT_MIN_ROUNDS, min(BCRYPT_MAX_ROUNDS, BCRYPT_MIN_ROUNDS + extra))
+    logger.info(
+        f"bcrypt 成本校准: {BCRYPT_MIN_ROUNDS} 轮耗时 {base_ms:.1f}ms，"
+        f"目标 {target_ms:.0f}ms，选择 {rounds} 轮"
+    )
+    return rounds
+
+
+def resolve_bcrypt_rounds() -> Optional[int]:
+    """
+    解析 bcrypt 成本配置
+
+    自动校准的结果会写回环境变量，使进程池子进程和 fork 出的 worker 直接复用，不再重复校准。
+    """
+    value = os.getenv("BCRYPT_ROUNDS", BCRYPT_ROUNDS).strip().lower()
+    if not value:
+        return None
+    if value == "auto":
+        rounds = calibrate_bcrypt_rounds(PASSWORD_HASH_TARGET_MS)
+        os.environ["BCRYPT_ROUNDS"] = str(rounds)
+        return rounds
+    return int(value)
+
+
+def build_password_context() -> CryptContext:
+    """根据配置构建 CryptContext"""
+    schemes: List[str] = []
+    for scheme in (s.strip() for s in PASSWORD_HASH_SCHEMES.split(",")):
+        if not scheme:
+            continue
+        if scheme == "argon2" and not _argon2_available():
+            logger.warning("未安装 argon2-cffi，已忽略 argon2 方案")
+            continue
+        schemes.append(scheme)
+    if "bcrypt" not in schemes:
+        # 现有用户的哈希都是 bcrypt，必须保留以便校验
+        schemes.append("bcrypt")
+
+    settings = {"schemes": schemes, "deprecated": "auto"}
+
+    rounds = resolve_bcrypt_rounds()
+    if rounds is not None:
+        # 低于当前成本的旧哈希会被 needs_update 标记，登录时升级
+        settings["bcrypt__default_rounds"] = rounds
+        settings["bcrypt__min_rounds"] = rounds
+
+    if "argon2" in schemes:
+        if ARGON2_TIME_COST:
+            settings["argon2__time_cost"] = int(ARGON2_TIME_COST)
+        if ARGON2_MEMORY_COST:
+            settings["argon2__memory_cost"] = int(ARGON2_MEMORY_COST)
+        if ARGON2_PARALLELISM:
+            settings["argon2__parallelism"] = int(ARGON2_PARALLELISM)
+
+    return CryptContext(**settings)
@@ -0,0 +1,147 @@
+"""
+数据库连接池参数
+从环境变量读取各引擎的连接池配置（可被 GameConfig.pool_options 按游戏覆盖），
+并实现按空闲时间决定是否 ping 的 pre-ping 策略
+"""
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import DisconnectionError
+
+logger = logging.getLogger(__name__)
+
+# pre-ping 策略：
+# - always：每次借出连接都 ping（每次借出多一次往返）
+# - idle：连接空闲超过 pre_ping_idle 秒才 ping，繁忙时不增加往返
+# - never：不 ping，依赖 pool_recycle 和断线后的连接池失效处理
+PRE_PING_STRATEGIES = ("always", "idle", "never")
+
+_INT_FIELDS = ("pool_size", "max_overflow", "pool_recycle")
+_FLOAT_FIELDS = ("pool_timeout", "pre_ping_idle")
+
+
+def _env_bool(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class PoolSettings:
+    """一个引擎的连接池参数"""
+
+    FIELDS = ("pool_size", "max_overflow", "pool_recycle", "pool_timeout", "pre_ping", "pre_ping_idle", "use_lifo")
+
+    def __init__(
+        self,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_recycle: int = -1,
+        pool_timeout: float = 30.0,
+        pre_ping: str = "idle",
+        pre_ping_idle: float = 30.0,
+        use_lifo: bool = False,
+    ):
+        if pre_ping not in PRE_PING_STRATEGIES:
+            raise ValueError(f"未知的 pre-ping 策略: {pre_ping}（可选 {', '.join(PRE_PING_STRATEGIES)}）")
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_recycle = pool_recycle
+        self.pool_timeout = pool_timeout
+        self.pre_ping = pre_ping
+        self.pre_ping_idle = pre_ping_idle
+        self.use_lifo = use_lifo
+
+    @classmethod
+    def from_env(cls, prefix: str, **defaults: Any) -> "PoolSettings":
+        """
+        读取 {prefix}_POOL_SIZE、{prefix}_MAX_OVERFLOW、{prefix}_POOL_RECYCLE、{prefix}_POOL_TIMEOUT、
+        {prefix}_PRE_PING、{prefix}_PRE_PING_IDLE、{prefix}_POOL_USE_LIFO，未设置的使用 defaults
+        """
+        settings = cls(**defaults)
+        env = {
+            "pool_size": f"{prefix}_POOL_SIZE",
+            "max_overflow": f"{prefix}_MAX_OVERFLOW",
+            "pool_recycle": f"{prefix}_POOL_RECYCLE",
+            "pool_timeout": f"{prefix}_POOL_TIMEOUT",
+            "pre_ping": f"{prefix}_PRE_PING",
+            "pre_ping_idle": f"{prefix}_PRE_PING_IDLE",
+            "use_lifo": f"{prefix}_POOL_USE_LIFO",
+        }
+        overrides = {field: os.environ[name] for field, name in env.items() if os.getenv(name, "").strip()}
+        return settings.merged(overrides)
+
+    def merged(self, overrides: Optional[Dict[str, Any]]) -> "PoolSettings":
+        """返回应用覆盖项后的新配置（用于 GameConfig.pool_options），未知的键会被忽略"""
+        values = {field: getattr(self, field) for field in self.FIELDS}
+        for key, value in (overrides or {}).items():
+            if key not in values:
+                logger.warning(f"忽略未知的连接池参数: {key}")
+                continue
+            if key in _INT_FIELDS:
+                value = int(value)
+            elif key in _FLOAT_FIELDS:
+                value = float(value)
+            elif key == "use_lifo":
+                value = _env_bool(value) if isinstance(value, str) else bool(value)
+            elif key == "pre_ping":
+                value = str(value).strip().lower()
+            values[key] = value
+        return PoolSettings(**values)
+
+    @property
+    def capacity(self) -> int:
+        """连接池最多持有的连接数"""
+        return self.pool_size + self.max_overflow
+
+    def engine_kwargs(self) -> Dict[str, Any]:
+        """create_engine / create_async_engine 的连接池参数"""
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_recycle": self.pool_recycle,
+            "pool_timeout": self.pool_timeout,
+            "pool_pre_ping": self.pre_ping == "always",
+            "pool_use_lifo": self.use_lifo,
+        }
+
+    def apply(self, engine):
+        """创建引擎后调用：注册 idle 策略需要的连接池事件"""
+        if self.pre_ping == "idle":
+            install_idle_ping(engine, self.pre_ping_idle)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+def install_idle_ping(engine, idle_seconds: float):
+    """
+    借出连接时，如果它在池中空闲超过 idle_seconds，先执行一次 SELECT 1
+
+    ping 失败时抛出 DisconnectionError，连接池会丢弃该连接并重新建立。
+    """
+    engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        try:
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+        except Exception as e:
+            connection_record.info.pop("checked_in_at", None)
+            raise DisconnectionError(f"空闲连接已失效: {str(e)}")
+
+
+# 主数据库（DB_*）和游戏数据库（GAME_DB_*，可按游戏覆盖）的连接池参数
+MAIN_POOL_SETTINGS = PoolSettings.from_env("DB", pool_size=10, max_overflow=20)
+GAME_POOL_SETTINGS = PoolSettings.from_env("GAME_DB", pool_size=5, max_overflow=10)
@@ -0,0 +1,203 @@
+"""
+已认证用户（principal）缓存
+避免每个带 Token 的请求都查询一次用户表
+"""
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# 缓存配置
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+# 多 worker 部署时可指定 Redis 作为共享缓存（需要安装 redis 包）
+PRINCIPAL_CACHE_REDIS_URL = os.getenv("PRINCIPAL_CACHE_REDIS_URL", "")
+
+# 缓存的用户字段（不包含密码哈希）
+PRINCIPAL_FIELDS = ("id", "username", "email", "is_active", "is_superuser", "created_at", "updated_at")
+
+
+class InMemoryPrincipalBackend:
+    """进程内缓存后端（也用作测试替身）"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        self._cache.set(key, value)
+
+    def delete(self, *keys: str):
+        for key in keys:
+            self._cache.pop(key)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        return {"size": stats["size"], "evictions": stats["evictions"] + stats["expirations"]}
+
+
+class RedisPrincipalBackend:
+    """
+    Redis 共享缓存后端，所有 worker 共用同一份缓存和失效操作
+
+    请求路径上的读写使用 redis.asyncio，不阻塞事件循环。失效在提交后执行：
+    在事件循环线程中提交时作为后台任务执行，在线程池中提交时直接使用同步客户端。
+    """
+
+    def __init__(self, url: str, ttl: float, prefix: str = "principal:"):
+        import redis.asyncio  # 可选依赖，仅在配置了 Redis 时导入
+
+        self._url = url
+        self._client = redis.asyncio.Redis.from_url(url)
+        self._sync_client = None
+        self._ttl = max(1, int(ttl))
+        self._prefix = prefix
+        self._pending: Set["asyncio.Task[Any]"] = set()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = await self._client.get(self._prefix + key)
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        for field in ("created_at", "updated_at"):
+            if value.get(field):
+                value[field] = datetime.fromisoformat(value[field])
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        raw = json.dumps(value, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v))
+        await self._client.set(self._prefix + key, raw, ex=self._ttl)
+
+    def _sync(self):
+        if self._sync_client is None:
+            import redis
+
+            self._sync_client = redis.Redis.from_url(self._url)
+        return self._sync_client
+
+    def _in_background(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._finish_task)
+
+    def _finish_task(self, task: "asyncio.Task[Any]"):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"失效用户缓存失败: {str(task.exception())}")
+
+    def delete(self, *keys: str):
+        names = [self._prefix + key for key in keys]
+        if _in_event_loop():
+            self._in_background(self._client.delete(*names))
+        else:
+            self._sync().delete(*names)
+
+    async def _clear_async(self):
+        async for key in self._client.scan_iter(match=self._prefix + "*"):
+            await self._client.delete(key)
+
+    def clear(self):
+        """删除所有缓存项（只在批量修改用户表后执行，不在请求路径上）"""
+        if _in_event_loop():
+            self._in_background(self._clear_async())
+        else:
+            client = self._sync()
+            for key in client.scan_iter(match=self._prefix + "*"):
+                client.delete(key)
+
+    async def wait_pending(self):
+        """等待后台失效任务完成（测试和进程退出时使用）"""
+        while self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        # Redis 的淘汰由服务端负责，这里不做统计
+        return {"size": None, "evictions": 0}
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class PrincipalCache:
+    """按 Token subject（用户名）缓存用户快照"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, username: str) -> Optional[Dict[str, Any]]:
+        try:
+            snapshot = await self.backend.get(username)
+        except Exception as e:
+            logger.warning(f"读取用户缓存失败: {str(e)}")
+            snapshot = None
+        if snapshot is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return snapshot
+
+    async def set(self, username: str, snapshot: Dict[str, Any]):
+        try:
+            await self.backend.set(username, snapshot)
+        except Exception as e:
+            logger.warning(f"写入用户缓存失败: {str(e)}")
+
+    def invalidate(self, *usernames: str):
+        """用户被修改或禁用时显式失效（在修改提交之后调用）"""
+        if not usernames:
+            return
+        self.invalidations += len(usernames)
+        try:
+            self.backend.delete(*usernames)
+        except Exception as e:
+            logger.warning(f"失效用户缓存失败: {str(e)}")
+
+    def clear(self):
+        try:
+            self.backend.clear()
+        except Exception as e:
+            logger.warning(f"清空用户缓存失败: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            **self.backend.stats(),
+        }
+
+
+def snapshot_user(user) -> Dict[str, Any]:
+    """提取用户可缓存的字段"""
+    return {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+
+
+def create_principal_cache() -> PrincipalCache:
+    """根据环境变量创建用户缓存"""
+    if PRINCIPAL_CACHE_REDIS_URL:
+        try:
+            return PrincipalCache(RedisPrincipalBackend(PRINCIPAL_CACHE_REDIS_URL, PRINCIPAL_CACHE_TTL))
+        except ImportError:
+            logger.error("未安装 redis，用户缓存回退为进程内缓存")
+    return PrincipalCache(InMemoryPrincipalBackend(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL))
@@ -0,0 +1,227 @@
+"""
+游戏数据库查询结果缓存
+按 (游戏, 查询, 参数) 缓存 execute_query 的结果：
+- TTL 过期 + 按占用字节数的 LRU 淘汰
+- 并发的相同未命中请求合并为一次查询（single-flight）
+- 过期后的一段时间内先返回旧结果，同时在后台刷新（stale-while-revalidate）
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 缓存配置
+QUERY_CACHE_MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "30"))
+QUERY_CACHE_STALE_TTL = float(os.getenv("QUERY_CACHE_STALE_TTL", "60"))
+
+Rows = List[Dict[str, Any]]
+
+
+class _CacheEntry:
+    __slots__ = ("rows", "size", "fresh_until", "stale_until")
+
+    def __init__(self, rows: Rows, size: int, fresh_until: float, stale_until: float):
+        self.rows = rows
+        self.size = size
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+def normalize_query(query: Any) -> str:
+    """
+    缓存键中的查询文本：SQL 按原文，MongoDB 查询字典按键排序
+
+    SQL 不合并空白：引号内的字符串字面量和标识符中的空白是有意义的，
+    合并后 'a  b' 和 'a b' 会共用一个缓存项。
+    """
+    if isinstance(query, str):
+        return query
+    return json.dumps(query, sort_keys=True, default=str)
+
+
+def _estimate_size(rows: Rows) -> int:
+    return len(json.dumps(rows, default=str))
+
+
+class QueryResultCache:
+    """
+    线程安全的查询结果缓存
+
+    返回的行列表在多个调用方之间共享，调用方不应修改。
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = 30.0, stale_ttl: float = 60.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="query-cache-refresh")
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.refresh_errors = 0
+
+    @staticmethod
+    def make_key(game_key: Hashable, query: Any, params: Any = None) -> Hashable:
+        return (
+            game_key,
+            normalize_query(getattr(query, "text", query)),
+            json.dumps(params, sort_keys=True, default=str) if params is not None else "",
+        )
+
+    def _store(self, key: Hashable, rows: Rows, ttl: float):
+        size = _estimate_size(rows)
+        if size > self.max_bytes:
+            return
+        now = time.monotonic()
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = _CacheEntry(rows, size, now + ttl, now + ttl + self.stale_ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+
+    def _load(self, key: Hashable, loader: Callable[[], Rows], ttl: float, future: Future) -> Rows:
+        """执行查询并把结果交给所有等待同一个 key 的调用方"""
+        try:
+            rows = loader()
+            self._store(key, rows, ttl)
+            future.set_result(rows)
+            return rows
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Rows], ttl: float, future: Future):
+        try:
+            self._load(key, loader, ttl, future)
+        except Exception as e:
+            self.refresh_errors += 1
+            logger.warning(f"后台刷新查询缓存失败: {str(e)}")
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Rows], ttl: Optional[float] = None) -> Rows:
+        """读取缓存，未命中时调用 loader（相同 key 的并发未命中只调用一次）"""
+        ttl = self.ttl if ttl is None else ttl
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry.fresh_until:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.rows
+
+            if entry is not None and now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    future = self._inflight[key] = Future()
+                    self._refresher.submit(self._refresh, key, loader, ttl, future)
+                return entry.rows
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            return future.result()
+        return self._load(key, loader, ttl, future)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool] = lambda key: True) -> int:
+        """删除满足条件的条目，返回删除的数量"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._bytes -= self._entries.pop(key).size
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "refresh_errors": self.refresh_errors,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+class CachedConnector:
+    """
+    在 DatabaseConnector 外包一层结果缓存
+
+    缓存键包含 GameConfig 的 id 和 updated_at，修改游戏配置后旧结果自然失效。
+    """
+
+    def __init__(self, connector, cache: "QueryResultCache", ttl: Optional[float] = None):
+        self.connector = connector
+        self.cache = cache
+        self.ttl = ttl
+
+    def __getattr__(self, name):
+        return getattr(self.connector, name)
+
+    def _cached(self, method: str, query: Any, args: Tuple, kwargs: Dict[str, Any]) -> Rows:
+        config = self.connector.config
+        key = self.cache.make_key(
+            (config.id or config.game_name, config.updated_at),
+            query,
+            [method, list(args), kwargs] if args or kwargs else None,
+        )
+        connector_class = type(self.connector)
+
+        def load() -> Rows:
+            # 过期后的刷新在后台线程中执行，可能晚于调用方 disconnect()，
+            # 因此每次加载使用独立的连接器（连接池由注册表共享，创建连接器的开销很小）
+            return getattr(connector_class(config), method)(query, *args, **kwargs)
+
+        return self.cache.get_or_load(key, load, self.ttl)
+
+    def execute_query(self, query: Any, *args, **kwargs) -> Rows:
+        return self._cached("execute_query", query, args, kwargs)
+
+    def execute(self, query: Any, params: Optional[Dict[str, Any]] = None) -> Rows:
+        """参数化查询按 (语句, 绑定参数) 缓存"""
+        return self._cached("execute", query, (params,) if params else (), {})
+
+    def execute_named(self, name: str, params: Optional[Dict[str, Any]] = None) -> Rows:
+        statement = self.connector.statements.get(name)
+        if statement is None:
+            raise KeyError(f"未登记的语句: {name}")
+        return self.execute(statement, params)
+
+
+query_cache = QueryResultCache(
+    max_bytes=QUERY_CACHE_MAX_BYTES,
+    ttl=QUERY_CACHE_TTL,
+    stale_ttl=QUERY_CACHE_STALE_TTL
+)
@@ -0,0 +1,243 @@
+"""
+请求限流
+按 IP、用户名等维度的令牌桶限流，在查询数据库和计算 bcrypt 之前拒绝超额请求
+"""
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Sequence, Tuple
+
+from fastapi import HTTPException, Request, status
+
+logger = logging.getLogger(__name__)
+
+# 限流配置，格式为 "次数/秒数"，例如 "20/60" 表示每 60 秒最多 20 次（可突发）
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+LOGIN_RATE_LIMIT_IP = os.getenv("LOGIN_RATE_LIMIT_IP", "30/60")
+LOGIN_RATE_LIMIT_USERNAME = os.getenv("LOGIN_RATE_LIMIT_USERNAME", "10/60")
+REGISTER_RATE_LIMIT_IP = os.getenv("REGISTER_RATE_LIMIT_IP", "10/600")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# 多 worker 部署时可指定 Redis 共享限流状态（需要安装 redis 包）
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "")
+# 位于反向代理之后时，使用 X-Forwarded-For 的第一个地址作为客户端 IP
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+
+Rule = Tuple[str, int, float]  # (key, 容量, 周期秒数)
+
+
+def parse_rate(value: str) -> Tuple[int, float]:
+    """解析 "次数/秒数" 格式的限流配置"""
+    count, _, period = value.partition("/")
+    return int(count), float(period or 1)
+
+
+class InMemoryRateLimitBackend:
+    """
+    进程内令牌桶（也用作测试替身）
+
+    每个 key 只保存 (剩余令牌, 上次更新时间)，key 数超过上限时按 LRU 淘汰。
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max(1, max_keys)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def hit(self, key: str, capacity: int, period: float) -> float:
+        """消耗一个令牌；允许时返回 0，否则返回需要等待的秒数"""
+        refill_rate = capacity / period
+        now = time.monotonic()
+        with self._lock:
+            state = self._buckets.get(key)
+            if state is None:
+                tokens = float(capacity)
+            else:
+                tokens, updated_at = state
+                tokens = min(float(capacity), tokens + (now - updated_at) * refill_rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / refill_rate
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        return retry_after
+
+    async def hit_many(self, rules: Sequence[Rule]) -> List[float]:
+        return [self.hit(key, capacity, period) for key, capacity, period in rules]
+
+    async def reset(self, key: str):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"keys": len(self._buckets), "evictions": self.evictions}
+
+
+# 与进程内实现相同的令牌桶，在 Redis 中用一个脚本原子地完成读-改-写。
+# 每个 key 一个 hash（tokens, ts），时间取 Redis 服务器时间，各 worker 的时钟偏差不影响结果；
+# 返回需要等待的秒数（字符串，Lua 数字返回给客户端时会被截断为整数）。
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local rate = capacity / period
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+if tokens == nil then
+    tokens = capacity
+else
+    tokens = math.min(capacity, tokens + math.max(0, now - tonumber(state[2])) * rate)
+end
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(period * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend:
+    """
+    Redis 共享令牌桶（所有 worker 共用）
+
+    使用 redis.asyncio，不阻塞事件循环；一次检查的所有规则在一个 pipeline 中执行脚本，
+    只需一次往返。
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis.asyncio  # 可选依赖，仅在配置了 Redis 时导入
+
+        self._client = redis.asyncio.Redis.from_url(url)
+        self._script = self._client.register_script(_TOKEN_BUCKET_SCRIPT)
+        self._prefix = prefix
+
+    async def hit_many(self, rules: Sequence[Rule]) -> List[float]:
+        pipeline = self._client.pipeline(transaction=False)
+        for key, capacity, period in rules:
+            await self._script(keys=[self._prefix + key], args=[capacity, period], client=pipeline)
+        return [float(value) for value in await pipeline.execute()]
+
+    async def reset(self, key: str):
+        await self._client.delete(self._prefix + key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class RateLimiter:
+    """
+    按规则检查限流，超额时抛出 429（带 Retry-After）
+
+    共享后端（Redis）出错时改用进程内的备用令牌桶继续限流：此时每个 worker 单独计数，
+    限额相当于放宽到 worker 数倍，但不会完全放行，也不会因为 Redis 故障拒绝登录。
+    没有备用后端时放行（fail-open）。
+    """
+
+    def __init__(self, backend, enabled: bool = True, fallback=None):
+        self.backend = backend
+        self.fallback = fallback
+        self.enabled = enabled
+        self.allowed = 0
+        self.rejected = 0
+        self.backend_errors = 0
+        self._backend_failing = False
+
+    async def _hit_many(self, rules: Sequence[Rule]) -> List[float]:
+        try:
+            results = await self.backend.hit_many(rules)
+        except Exception as e:
+            self.backend_errors += 1
+            if not self._backend_failing:
+                # 只在开始失败时记录一次，恢复时再记录一次
+                self._backend_failing = True
+                action = "改用进程内令牌桶" if self.fallback is not None else "暂时放行"
+                logger.error(f"限流后端不可用，{action}: {str(e)}")
+            if self.fallback is None:
+                return []
+            return await self.fallback.hit_many(rules)
+        if self._backend_failing:
+            self._backend_failing = False
+            logger.info("限流后端已恢复")
+        return results
+
+    async def check(self, rules: Sequence[Rule]):
+        if not self.enabled:
+            return
+        retry_after = max(await self._hit_many(rules), default=0.0)
+        if retry_after > 0:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="请求过于频繁，请稍后重试",
+                headers={"Retry-After": str(int(math.ceil(retry_after)))},
+            )
+        self.allowed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "backend_errors": self.backend_errors,
+            "backend_failing": self._backend_failing,
+            **self.backend.stats(),
+        }
+
+
+def client_ip(request: Request) -> str:
+    """获取客户端 IP"""
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def create_rate_limiter() -> RateLimiter:
+    """根据环境变量创建限流器"""
+    if RATE_LIMIT_REDIS_URL:
+        try:
+            backend = RedisRateLimitBackend(RATE_LIMIT_REDIS_URL)
+        except ImportError:
+            logger.error("未安装 redis，限流回退为进程内令牌桶")
+        else:
+            # Redis 故障期间使用的进程内令牌桶
+            fallback = InMemoryRateLimitBackend(max_keys=RATE_LIMIT_MAX_KEYS)
+            return RateLimiter(backend, enabled=RATE_LIMIT_ENABLED, fallback=fallback)
+    return RateLimiter(InMemoryRateLimitBackend(max_keys=RATE_LIMIT_MAX_KEYS), enabled=RATE_LIMIT_ENABLED)
+
+
+rate_limiter = create_rate_limiter()
+
+_login_ip_rate = parse_rate(LOGIN_RATE_LIMIT_IP)
+_login_username_rate = parse_rate(LOGIN_RATE_LIMIT_USERNAME)
+_register_ip_rate = parse_rate(REGISTER_RATE_LIMIT_IP)
+
+
+async def limit_login(request: Request, username: str):
+    """登录限流：按 IP 和用户名"""
+    await rate_limiter.check([
+        (f"login:ip:{client_ip(request)}", *_login_ip_rate),
+        (f"login:user:{username.lower()}", *_login_username_rate),
+    ])
+
+
+async def limit_register(request: Request):
+    """注册限流：按 IP"""
+    await rate_limiter.check([
+        (f"register:ip:{client_ip(request)}", *_register_ip_rate),
+    ])
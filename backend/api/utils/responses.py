@@ -0,0 +1,81 @@
+"""
+响应序列化与压缩
+- FAST_JSON=true 时默认响应类改为 ORJSONResponse（需要安装 orjson，未安装时启动失败），
+  /me、/verify 等小而高频的接口直接返回已构造好的字典，跳过 response_model 的再次校验
+- 响应体超过阈值时才压缩（gzip，安装 brotli-asgi 后可选 brotli）
+"""
+import logging
+import os
+from typing import Any, Dict, Type
+
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+
+logger = logging.getLogger(__name__)
+
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() == "true"
+# 压缩方式：gzip、brotli 或 off；小于 COMPRESSION_MIN_SIZE 字节的响应不压缩
+COMPRESSION = os.getenv("COMPRESSION", "gzip").lower()
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "5"))
+
+
+def _orjson_available() -> bool:
+    try:
+        import orjson  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _resolve_response_class() -> Type[JSONResponse]:
+    if not FAST_JSON:
+        return JSONResponse
+    if not _orjson_available():
+        # 显式开启的优化不静默回退，否则压测和线上得到的是另一种序列化的结果
+        raise RuntimeError("FAST_JSON=true 需要安装 orjson（pip install -r requirements.txt）")
+    return ORJSONResponse
+
+
+# 应用的默认响应类，也用于快速路径直接构造响应
+DefaultJSONResponse = _resolve_response_class()
+
+
+def fast_json(content: Any, status_code: int = 200) -> Response:
+    """
+    直接构造 JSON 响应
+
+    路由返回 Response 时 FastAPI 不再按 response_model 校验和转换，
+    content 必须已经是与 response_model 一致的可序列化数据。
+    """
+    return DefaultJSONResponse(content=content, status_code=status_code)
+
+
+def user_payload(user) -> Dict[str, Any]:
+    """与 UserResponse 字段一致的用户字典（user 来自数据库或用户缓存，无需再次校验）"""
+    return {
+        "username": user.username,
+        "email": user.email,
+        "id": user.id,
+        "is_active": user.is_active,
+        "is_superuser": user.is_superuser,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+    }
+
+
+def add_compression(app):
+    """按配置添加压缩中间件"""
+    if COMPRESSION == "off":
+        return
+    if COMPRESSION == "brotli":
+        try:
+            from brotli_asgi import BrotliMiddleware
+        except ImportError:
+            logger.warning("未安装 brotli-asgi，压缩回退为 gzip")
+        else:
+            # 不支持 br 的客户端回退为 gzip
+            app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE, gzip_fallback=True)
+            return
+
+    from starlette.middleware.gzip import GZipMiddleware
+
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE, compresslevel=COMPRESSION_LEVEL)
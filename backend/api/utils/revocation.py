@@ -0,0 +1,295 @@
+"""
+Token 吊销列表
+按 jti 吊销访问令牌（退出登录）。每个 worker 在内存中保存未过期的吊销记录：
+Bloom 过滤器挡在精确集合之前，绝大多数未吊销的 Token 只需一次哈希即可判定；
+吊销记录写入 revoked_tokens 表，各 worker 定期增量同步，Token 过期后清理
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from database import engine
+from models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# 吊销列表配置
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "2"))
+# 同步连续失败（如 revoked_tokens 表尚未迁移）时按指数退避，最长间隔
+REVOCATION_SYNC_MAX_BACKOFF = float(os.getenv("REVOCATION_SYNC_MAX_BACKOFF", "60"))
+# 增量同步时重新读取最近这段时间内的记录，避免并发事务提交顺序与 id 顺序不一致时漏掉
+REVOCATION_SYNC_OVERLAP = float(os.getenv("REVOCATION_SYNC_OVERLAP", "30"))
+REVOCATION_PRUNE_INTERVAL = float(os.getenv("REVOCATION_PRUNE_INTERVAL", "300"))
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+
+
+def token_id(token: str, payload: Dict[str, Any]) -> str:
+    """Token 的吊销键：jti；没有 jti 的旧 Token 使用 Token 的 SHA-256"""
+    return payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+
+def _to_timestamp(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class BloomFilter:
+    """定长位数组的 Bloom 过滤器（一次 blake2b 摘要，双重哈希得到 k 个位置）"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        self.num_bits = max(64, int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str) -> Iterator[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        for position in self._positions(item):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+
+class RevocationList:
+    """
+    进程内吊销集合：Bloom 过滤器 + 精确的 {jti: exp}
+
+    Bloom 过滤器没有误判为"不存在"的情况，命中后再查精确集合排除误判。
+    过滤器不支持删除，prune() 清理过期条目后整体重建；条目数超过容量时按两倍容量重建。
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        self.initial_capacity = capacity
+        self.error_rate = error_rate
+        self._exact: Dict[str, float] = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+        self.bloom_rejections = 0
+        self.false_positives = 0
+        self.rebuilds = 0
+
+    def add(self, jti: str, exp: float):
+        with self._lock:
+            if jti in self._exact:
+                return
+            self._exact[jti] = exp
+            if len(self._exact) > self._bloom.capacity:
+                self._rebuild(self._bloom.capacity * 2)
+            else:
+                self._bloom.add(jti)
+
+    def __contains__(self, jti: str) -> bool:
+        if not self._exact:
+            return False
+        if jti not in self._bloom:
+            self.bloom_rejections += 1
+            return False
+        if jti in self._exact:
+            return True
+        self.false_positives += 1
+        return False
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def _rebuild(self, capacity: int):
+        bloom = BloomFilter(capacity, self.error_rate)
+        for jti in self._exact:
+            bloom.add(jti)
+        # 先建好新过滤器再替换引用，读取方不会看到半成品
+        self._bloom = bloom
+        self.rebuilds += 1
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """删除已过期的条目（过期的 Token 本身已无法通过校验），返回删除的数量"""
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [jti for jti, exp in self._exact.items() if exp <= now]
+            for jti in expired:
+                del self._exact[jti]
+            if expired:
+                # 条目减少后按初始容量（或当前条目数的两倍）重建，释放增长时占用的内存
+                self._rebuild(max(self.initial_capacity, len(self._exact) * 2))
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._exact),
+            "bloom_capacity": self._bloom.capacity,
+            "bloom_bytes": self._bloom.size_bytes,
+            "bloom_hashes": self._bloom.num_hashes,
+            "bloom_rejections": self.bloom_rejections,
+            "false_positives": self.false_positives,
+            "rebuilds": self.rebuilds,
+        }
+
+
+class TokenRevocationStore:
+    """
+    吊销记录的持久化与跨 worker 同步
+
+    revoke() 先插入 revoked_tokens，提交成功后再写入本进程的吊销集合；
+    后台任务每 sync_interval 秒增量读取其他 worker 写入的记录，并定期清理过期记录。
+    同步连续失败时按指数退避（最长 max_backoff 秒），只在开始失败和恢复时记录日志。
+    """
+
+    def __init__(self, engine, revocations: RevocationList, sync_interval: float = 2.0,
+                 sync_overlap: float = 30.0, prune_interval: float = 300.0, max_backoff: float = 60.0):
+        self.engine = engine
+        self.revocations = revocations
+        self.sync_interval = sync_interval
+        self.max_backoff = max(sync_interval, max_backoff)
+        self.sync_overlap = sync_overlap
+        self.prune_interval = prune_interval
+        self._last_id: Optional[int] = None
+        self._last_synced_at: Optional[datetime] = None
+        self._last_pruned_at = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self.synced_rows = 0
+        self.sync_errors = 0
+        self._consecutive_errors = 0
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self.revocations
+
+    def revoke(self, jti: str, exp: float):
+        """
+        吊销一个 Token（同一个 jti 重复吊销时忽略）
+
+        数据库写入失败时抛出 SQLAlchemyError，本进程也不记录吊销，
+        避免出现只有当前 worker 拒绝该 Token 的情况。
+        """
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(
+                    insert(RevokedToken).values(
+                        jti=jti,
+                        expires_at=datetime.utcfromtimestamp(exp),
+                        revoked_at=datetime.utcnow(),
+                    )
+                )
+        except IntegrityError:
+            # 已经被吊销过（重复退出登录或其他 worker 已写入）
+            pass
+        self.revocations.add(jti, exp)
+
+    def sync(self) -> int:
+        """读取新的吊销记录（首次读取全部未过期记录），返回读取的行数"""
+        now = datetime.utcnow()
+        query = select(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at).where(
+            RevokedToken.expires_at > now
+        )
+        if self._last_id is not None:
+            query = query.where(or_(
+                RevokedToken.id > self._last_id,
+                RevokedToken.revoked_at >= self._last_synced_at - timedelta(seconds=self.sync_overlap),
+            ))
+
+        with self.engine.connect() as connection:
+            rows = connection.execute(query).all()
+
+        for row in rows:
+            self.revocations.add(row.jti, _to_timestamp(row.expires_at))
+            if self._last_id is None or row.id > self._last_id:
+                self._last_id = row.id
+        if self._last_id is None:
+            self._last_id = 0
+        self._last_synced_at = now
+        self.synced_rows += len(rows)
+        return len(rows)
+
+    def prune(self) -> int:
+        """清理内存和数据库中已过期的吊销记录"""
+        removed = self.revocations.prune()
+        with self.engine.begin() as connection:
+            connection.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+        return removed
+
+    def _next_delay(self) -> float:
+        if not self._consecutive_errors:
+            return self.sync_interval
+        return min(self.max_backoff, self.sync_interval * 2 ** self._consecutive_errors)
+
+    async def _run(self):
+        while True:
+            try:
+                await run_in_threadpool(self.sync)
+                if time.monotonic() - self._last_pruned_at >= self.prune_interval:
+                    self._last_pruned_at = time.monotonic()
+                    await run_in_threadpool(self.prune)
+                if self._consecutive_errors:
+                    logger.info(f"Token 吊销列表同步已恢复（此前连续失败 {self._consecutive_errors} 次）")
+                    self._consecutive_errors = 0
+            except Exception as e:
+                self.sync_errors += 1
+                self._consecutive_errors += 1
+                if self._consecutive_errors == 1:
+                    logger.error(
+                        f"同步 Token 吊销列表失败（之后按指数退避重试，恢复前不再记录）: {str(e)}"
+                    )
+            await asyncio.sleep(self._next_delay())
+
+    def start(self):
+        """启动后台同步任务（需要在事件循环中调用），第一轮立即加载全部未过期记录"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.revocations.stats(),
+            "synced_rows": self.synced_rows,
+            "sync_errors": self.sync_errors,
+            "consecutive_sync_errors": self._consecutive_errors,
+        }
+
+
+_store: Optional[TokenRevocationStore] = None
+
+
+def get_revocation_store() -> TokenRevocationStore:
+    """进程级单例"""
+    global _store
+    if _store is None:
+        _store = TokenRevocationStore(
+            engine,
+            RevocationList(capacity=REVOCATION_BLOOM_CAPACITY, error_rate=REVOCATION_BLOOM_ERROR_RATE),
+            sync_interval=REVOCATION_SYNC_INTERVAL,
+            sync_overlap=REVOCATION_SYNC_OVERLAP,
+            prune_interval=REVOCATION_PRUNE_INTERVAL,
+            max_backoff=REVOCATION_SYNC_MAX_BACKOFF,
+        )
+    return _store
@@ -0,0 +1,58 @@
+"""
+流式响应工具
+将连接器的流式查询结果以 NDJSON（每行一个 JSON 对象）返回给客户端
+
+客户端断开时 Starlette 取消响应任务，迭代器链上的 finally 依次执行：
+同步生成器（持有数据库连接和连接池借用）通过 iterate_in_threadpool_closing 显式 close()，
+不会等到垃圾回收才归还连接。
+"""
+import json
+from typing import Any, AsyncIterator, Dict, Iterator, TypeVar
+
+import anyio
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+T = TypeVar("T")
+
+
+async def iterate_in_threadpool_closing(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """
+    在线程池中迭代同步迭代器，结束、出错、被取消（客户端断开）时都会调用它的 close()
+
+    starlette 的 iterate_in_threadpool 只负责 next()，提前退出时生成器仍挂起，
+    with 块中的连接要等垃圾回收才释放。
+    """
+    try:
+        async for item in iterate_in_threadpool(iterator):
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            # 响应任务已被取消时仍需执行完 close()
+            with anyio.CancelScope(shield=True):
+                await run_in_threadpool(close)
+
+
+async def ndjson_lines(rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """把行迭代器编码为 NDJSON 字节流（datetime、ObjectId 等转为字符串）"""
+    try:
+        async for row in rows:
+            yield (json.dumps(row, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+    finally:
+        aclose = getattr(rows, "aclose", None)
+        if aclose is not None:
+            with anyio.CancelScope(shield=True):
+                await aclose()
+
+
+def ndjson_response(rows: AsyncIterator[Dict[str, Any]], **kwargs) -> StreamingResponse:
+    """
+    构造 NDJSON 流式响应
+
+    用法：
+        return ndjson_response(connector.aiter_query("SELECT ...", batch_size=500))
+    """
+    return StreamingResponse(ndjson_lines(rows), media_type=NDJSON_MEDIA_TYPE, **kwargs)
@@ -0,0 +1,57 @@
+"""
+已验证 JWT 缓存
+对热点 Token 跳过重复的签名校验和 JSON 解析
+"""
+import hashlib
+import os
+import time
+from typing import Any, Dict, Optional
+
+from utils.ttl_cache import TTLCache
+
+# 缓存配置
+TOKEN_CACHE_ENABLED = os.getenv("TOKEN_CACHE_ENABLED", "true").lower() == "true"
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+
+
+class VerifiedTokenCache:
+    """
+    以 Token 摘要为键缓存解码后的 payload
+
+    条目的过期时间不会晚于 Token 自身的 exp，过期 Token 一定会重新走完整校验。
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(self._key(token))
+
+    def set(self, token: str, payload: Dict[str, Any]):
+        ttl = self.ttl
+        exp = payload.get("exp")
+        if exp is not None:
+            ttl = min(ttl, float(exp) - time.time())
+        self._cache.set(self._key(token), payload, ttl=ttl)
+
+    def invalidate(self, token: str):
+        self._cache.pop(self._key(token))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+def create_token_cache() -> Optional[VerifiedTokenCache]:
+    """根据环境变量创建 Token 缓存，禁用时返回 None"""
+    if not TOKEN_CACHE_ENABLED:
+        return None
+    return VerifiedTokenCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)